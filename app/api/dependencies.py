@@ -1,23 +1,31 @@
+from typing import NamedTuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
 from app.core.security import decode_access_token
 from app.db.sessions import get_db
-from app.models.user import User
+from app.models.user import User, UserRole
+from app.services.user_service import auth_user_cache
 
 # Створюємо схему безпеки для отримання токена з заголовка
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+
+class Principal(NamedTuple):
+    """Lightweight identity of the authenticated user."""
+    id: int
+    email: str
+    role: UserRole
+
+
+def get_token_subject(token: str) -> str:
     """
-    Receive user information by token
+    Validates the token and returns its subject (user email)
     """
-    token = credentials.credentials
     payload = decode_access_token(token)
     
     if not payload:
@@ -35,6 +43,24 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    return email
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Receive user information by token.
+    The user row is cached for AUTH_USER_CACHE_TTL seconds, so most requests
+    skip the database; UserService invalidates the entry when the user changes.
+    """
+    email = get_token_subject(credentials.credentials)
+
+    user = auth_user_cache.get(email)
+    if user is not None:
+        return user
+
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
     if not user:
@@ -44,4 +70,25 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    auth_user_cache.set(email, user)
+    return user
+
+
+async def get_current_principal(user: User = Depends(get_current_user)) -> Principal:
+    """
+    Receive only the id, email and role of the user by token,
+    for endpoints that do not need the full user profile
+    """
+    return Principal(id=user.id, email=user.email, role=user.role)
+
+
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    """
+    The current user if their email is listed in ADMIN_EMAILS, otherwise 403
+    """
+    if user.email.lower() not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
     return user
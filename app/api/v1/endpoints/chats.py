@@ -1,11 +1,11 @@
 from typing import List, Optional, Dict, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import Principal, get_current_principal
+from app.core.config import settings
 from app.db.sessions import get_db
-from app.models.user import User
 from app.schemas.chat import ChatCreate, ChatOut
 from app.schemas.messages import MessageOut
 from app.services.chat_service import ChatService
@@ -16,7 +16,7 @@ router = APIRouter(tags=["chats"])
 @router.post("/", response_model=ChatOut)
 async def create_chat(
         chat_data: ChatCreate,
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_principal),
         db: AsyncSession = Depends(get_db)
 ):
     """
@@ -28,33 +28,58 @@ async def create_chat(
 
 @router.get("/", response_model=List[ChatOut])
 async def list_user_chats(
+        request: Request,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_principal)
 ):
     """
     Lists all chats where the current_user is either the student or the psychologist,
-    along with the last message for each chat.
+    along with the last message for each chat and whether the other participant is online.
     """
     chats = await ChatService.list_chats_for_user(db, current_user.id)
+    participants = [chat["participant_info"] for chat in chats if chat["participant_info"]]
+    online = await request.app.state.connected_users.online_users(
+        participant["id"] for participant in participants
+    )
+    for participant in participants:
+        participant["is_online"] = participant["id"] in online
     return chats
 
 
 @router.get("/{chat_id}/messages", response_model=List[MessageOut])
 async def get_chat_messages(
         chat_id: int,
+        before: Optional[int] = Query(None, description="Return messages older than this message ID"),
+        after: Optional[int] = Query(None, description="Return messages newer than this message ID"),
+        limit: int = Query(
+            settings.CHAT_MESSAGES_PAGE_SIZE, ge=1, le=settings.CHAT_MESSAGES_MAX_PAGE_SIZE,
+            description="Page size"
+        ),
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_principal)
 ):
     """
-    Retrieves all messages for a given chat.
+    Retrieves a page of messages for a given chat in chronological order.
+    Without a cursor the latest page is returned; pass `before` with the oldest
+    loaded message ID to scroll back, or `after` with the newest one to catch up.
+    A cursor that is not a message of this chat is rejected with 400.
     """
-    chat = await ChatService.get_chat_by_id(db, chat_id)
-    if not chat:
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
+    participants = await ChatService.get_chat_participants(db, chat_id)
+    if not participants:
         raise HTTPException(status_code=404, detail="Chat not found")
 
     # Ensure the user is part of this chat
-    if chat.student_id != current_user.id and chat.psychologist_id != current_user.id:
+    if not participants.includes(current_user.id):
         raise HTTPException(status_code=403, detail="You are not a participant of this chat")
 
-    messages = await ChatService.get_chat_messages(db, chat_id)
+    messages = await ChatService.get_chat_messages(
+        db, chat_id, before_id=before, after_id=after, limit=limit
+    )
+    # Порожня сторінка з курсором з іншого чату виглядала б як початок історії
+    cursor = before if before is not None else after
+    if not messages and cursor is not None and not await ChatService.is_chat_message(db, chat_id, cursor):
+        raise HTTPException(status_code=400, detail="Cursor is not a message of this chat")
     return messages
@@ -1,23 +1,92 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Callable, List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_admin, get_current_user
+from app.core.config import settings
 from app.db.sessions import get_db
 from app.models.user import User
-from app.schemas.materials import MaterialOut, CategoryOut, MaterialCreate, CategoryCreate
+from app.schemas.materials import (
+    CategoryCreate, CategoryFacet, CategoryOut, ImportReport, MaterialCreate, MaterialListItem, MaterialOut,
+    MaterialSearchResult
+)
+from app.services.material_catalog import CatalogSnapshot, category_facets_json, material_catalog, materials_json
+from app.services.material_import import MaterialImporter, iter_csv, iter_lines, iter_ndjson
+from app.services.material_search import material_search
 from app.services.material_service import MaterialService
 
 router = APIRouter(tags=["materials"])
 
-@router.get("/", response_model=List[MaterialOut])
+
+def catalog_response(
+        request: Request,
+        snapshot: CatalogSnapshot,
+        key: object,
+        build: Callable[[], Tuple[int, bytes]]
+) -> Response:
+    """
+    Serves a serialized view of the catalog snapshot with its ETag and X-Total-Count.
+    Clients revalidate on every request and get 304 while the catalog is unchanged.
+    """
+    headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or snapshot.etag in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    total, body = snapshot.body(key, build)
+    headers["X-Total-Count"] = str(total)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/", response_model=List[MaterialListItem])
 async def get_materials(
+    request: Request,
     category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    category_ids: List[int] = Query([], description="Only materials in all of these categories"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(settings.MATERIALS_PAGE_SIZE, ge=1, le=settings.MATERIALS_MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all materials, optionally filtered by category"""
-    return await MaterialService.get_all_materials(db, category_id)
+    """
+    Get a page of materials with excerpts instead of full content, optionally filtered
+    by categories (a material must belong to every requested category).
+    The total number of matches is returned in the X-Total-Count header.
+    """
+    required = frozenset(category_ids + ([category_id] if category_id else []))
+    snapshot = await material_catalog.get(db)
+
+    def build() -> Tuple[int, bytes]:
+        materials = snapshot.list_materials(required)
+        return len(materials), materials_json(materials[offset:offset + limit])
+
+    return catalog_response(request, snapshot, ("materials", required, offset, limit), build)
+
+@router.get("/search", response_model=List[MaterialSearchResult])
+async def search_materials(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Search query"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(settings.MATERIALS_PAGE_SIZE, ge=1, le=settings.MATERIALS_MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over material titles and contents, best matches first.
+    The total number of matches is returned in the X-Total-Count header.
+    """
+    await material_search.ensure_current(db)
+    total, hits = await material_search.search_async(q, offset=offset, limit=limit)
+    snapshot = await material_catalog.get(db)
+
+    response.headers["X-Total-Count"] = str(total)
+    return [
+        MaterialSearchResult(**snapshot.materials[material_id].model_dump(), score=score)
+        for material_id, score in hits
+        if material_id in snapshot.materials
+    ]
 
 @router.get("/{material_id}", response_model=MaterialOut)
 async def get_material(
@@ -34,35 +103,59 @@ async def get_material(
 @router.post("/", response_model=MaterialOut, status_code=status.HTTP_201_CREATED)
 async def create_material(
     material_data: MaterialCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new material (admin only)"""
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
     return await MaterialService.create_material(db, material_data)
 
-@router.get("/categories/", response_model=List[CategoryOut])
+@router.post("/import", response_model=ImportReport)
+async def import_materials(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(
+        None, description="Body format; by default taken from Content-Type (text/csv or NDJSON)"
+    ),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import of materials from a streamed NDJSON or CSV body (admin only).
+    Categories are referenced by slug; NDJSON records with `slug` and `name` create
+    or update categories. Invalid rows are reported and skipped.
+    """
+    format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    lines = iter_lines(request.stream())
+    records = iter_csv(lines) if format == "csv" else iter_ndjson(lines)
+    report = await MaterialImporter(db, author_id=current_user.id).run(records)
+
+    if report.imported or report.categories:
+        material_catalog.invalidate()
+        material_search.refresh_in_background()
+    return report
+
+@router.get("/categories/", response_model=List[CategoryFacet])
 async def get_categories(
+    request: Request,
+    category_ids: List[int] = Query([], description="Currently selected category filters"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all categories"""
-    return await MaterialService.get_all_categories(db)
+    """
+    Get all categories with their material counts: `material_count` over the whole
+    catalog and `matching_count` among materials in all of the selected `category_ids`.
+    """
+    selected = frozenset(category_ids)
+    snapshot = await material_catalog.get(db)
+    return catalog_response(
+        request, snapshot, ("categories", selected),
+        lambda: (len(snapshot.categories), category_facets_json(snapshot, selected))
+    )
 
 @router.post("/categories/", response_model=CategoryOut, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category_data: CategoryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new category (admin only)"""
-    if current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
     return await MaterialService.create_category(db, category_data.name, category_data.description) 
\ No newline at end of file
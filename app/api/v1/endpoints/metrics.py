@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Request
+
+from app.api.dependencies import get_current_admin
+from app.core.security import password_hash_metrics
+from app.db.instrumentation import pool_status, query_metrics
+from app.db.sessions import async_engine
+from app.services.chat_service import chat_participants_cache
+from app.services.user_service import auth_user_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("", dependencies=[Depends(get_current_admin)])
+async def get_metrics(request: Request):
+    """
+    Counters collected by this worker since it started (admins only):
+    DB pool, per-route SQL work, password hashing queue, auth and chat participant caches and session scheduler
+    """
+    return {
+        "db_pool": pool_status(async_engine),
+        "queries": query_metrics,
+        "password_hashing": password_hash_metrics,
+        "auth_user_cache": auth_user_cache.stats(),
+        "chat_participants_cache": chat_participants_cache.stats(),
+        "session_scheduler": request.app.state.session_scheduler.metrics,
+    }
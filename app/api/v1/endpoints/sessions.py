@@ -1,13 +1,15 @@
 import logging
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import Principal, get_current_principal
+from app.core.config import settings
 from app.db.sessions import get_db
-from app.models.user import User
-from app.schemas.sessions import SessionCreate, SessionOut, SessionUpdate
+from app.models.session import SessionStatus
+from app.schemas.sessions import SessionCreate, SessionListItem, SessionOut, SessionUpdate
 from app.services.session_service import SessionService
 
 router = APIRouter(tags=["sessions"])
@@ -19,7 +21,7 @@ logger = logging.getLogger(__name__)
 async def create_session(
         session_data: SessionCreate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_principal)
 ):
     """
     Creates a new session booking.
@@ -28,19 +30,33 @@ async def create_session(
     return session_dict
 
 
-@router.get("/", response_model=List[SessionOut])
+@router.get("/", response_model=List[SessionListItem])
 async def get_sessions(
-    current_user: User = Depends(get_current_user),
+    date_from: Optional[datetime] = Query(None, description="Sessions starting at or after this moment"),
+    date_to: Optional[datetime] = Query(None, description="Sessions starting before this moment"),
+    status: Optional[SessionStatus] = Query(None, description="Filter by session status"),
+    upcoming: bool = Query(False, description="Only sessions that have not ended yet, including ones in progress"),
+    after: Optional[int] = Query(None, description="Return sessions following this session ID"),
+    limit: int = Query(settings.SESSIONS_PAGE_SIZE, ge=1, le=settings.SESSIONS_MAX_PAGE_SIZE, description="Page size"),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all sessions for the current user"""
-    return await SessionService.get_user_sessions(db, current_user.id)
+    """
+    Get a page of sessions of the current user in chronological order, from the oldest,
+    optionally limited to a date range, status or (`upcoming=true`) sessions not yet ended.
+    Pass `after` with the last loaded session ID to get the next page.
+    Notes are only included in GET /sessions/{session_id}.
+    """
+    return await SessionService.get_user_sessions(
+        db, current_user.id, current_user.role, starts_from=date_from, starts_to=date_to, status=status,
+        upcoming=upcoming, after_id=after, limit=limit
+    )
 
 
 @router.get("/{session_id}", response_model=SessionOut)
 async def get_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific session by ID"""
@@ -55,21 +71,14 @@ async def update_session(
         session_id: int,
         session_data: SessionUpdate,
         db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_principal)
 ):
     """
     Updates a session with new data.
     """
-    session = await SessionService.get_session_by_id(db, session_id, current_user.id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    if session["student_id"] != current_user.id and session["psychologist_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="You are not a participant of this session")
-
-    updated_session = await SessionService.update_session(db, session_id, session_data)
+    updated_session = await SessionService.update_session(db, session_id, current_user.id, session_data)
     if not updated_session:
-        raise HTTPException(status_code=404, detail="Failed to update session")
+        raise HTTPException(status_code=404, detail="Session not found")
     
     return updated_session
 
@@ -77,13 +86,12 @@ async def update_session(
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Cancel a session"""
-    session = await SessionService.get_session_by_id(db, session_id, current_user.id)
-    if not session:
+    cancelled = await SessionService.cancel_session(db, session_id, current_user.id)
+    if not cancelled:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     
-    await SessionService.cancel_session(db, session_id)
     return {"detail": "Session cancelled successfully"}
@@ -1,24 +1,90 @@
-from typing import List, Any, Optional
+from datetime import datetime, timedelta
+from typing import List, Any, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_user
+from app.core.config import settings
 from app.db.sessions import get_db
-from app.models.user import User
+from app.models.user import User, UserRole
+from app.schemas.availability import AvailabilityInterval, AvailabilityUpdate, SlotOut
 from app.schemas.users import UserOut, UserUpdate
-from app.services.user_service import AuthService, UserService
+from app.services.availability_service import AvailabilityService
+from app.services.psychologist_directory import psychologist_directory
+from app.services.user_service import UserService
 
 router = APIRouter(tags=["users"])
 
 
 @router.get("/psychologists", response_model=List[UserOut])
 async def get_psychologists(
+        response: Response,
+        specialization: Optional[str] = Query(None, description="Частина назви спеціалізації"),
+        min_experience: Optional[float] = Query(None, ge=0, description="Мінімальний досвід, років"),
+        max_experience: Optional[float] = Query(None, ge=0, description="Максимальний досвід, років"),
+        sort_by: Literal["last_name", "first_name", "experience_years"] = Query("last_name"),
+        order: Literal["asc", "desc"] = Query("asc"),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(settings.PSYCHOLOGISTS_PAGE_SIZE, ge=1, le=settings.PSYCHOLOGISTS_MAX_PAGE_SIZE),
         current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db)
 ):
-    """Get all psychologists"""
-    return await AuthService.get_psychologists(db)
+    """
+    Get psychologists filtered by specialization and experience, sorted and paginated.
+    The total number of matches is returned in the X-Total-Count header.
+    """
+    await psychologist_directory.ensure_loaded(db)
+    total, psychologists = psychologist_directory.search(
+        specialization=specialization,
+        min_experience=min_experience,
+        max_experience=max_experience,
+        sort_by=sort_by,
+        descending=order == "desc",
+        offset=offset,
+        limit=limit
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return psychologists
+
+
+@router.get("/psychologists/{psychologist_id}/availability", response_model=List[AvailabilityInterval])
+async def get_psychologist_availability(
+        psychologist_id: int,
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Робочі години психолога на тиждень."""
+    return await AvailabilityService.get_availability(db, psychologist_id)
+
+
+@router.get("/psychologists/{psychologist_id}/slots", response_model=List[SlotOut])
+async def get_psychologist_slots(
+        psychologist_id: int,
+        date_from: datetime = Query(..., alias="from", description="Початок періоду"),
+        date_to: datetime = Query(..., alias="to", description="Кінець періоду"),
+        duration: int = Query(60, ge=1, le=settings.SESSION_MAX_DURATION_MINUTES, description="Тривалість сесії, хв"),
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Вільні слоти психолога в межах робочих годин (будь-який час, якщо їх не задано),
+    що не перетинаються з іншими сесіями.
+    """
+    # Час сесій зберігається без часового поясу
+    date_from, date_to = date_from.replace(tzinfo=None), date_to.replace(tzinfo=None)
+    if date_to <= date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' має бути пізніше за 'from'"
+        )
+    if date_to - date_from > timedelta(days=settings.SESSION_SLOTS_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Період не може перевищувати {settings.SESSION_SLOTS_MAX_DAYS} днів"
+        )
+
+    return await AvailabilityService.get_free_slots(db, psychologist_id, date_from, date_to, duration)
 
 
 @router.get("/search", response_model=Optional[UserOut])
@@ -52,6 +118,21 @@ async def read_current_user(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@router.put("/me/availability", response_model=List[AvailabilityInterval])
+async def update_my_availability(
+        availability: AvailabilityUpdate,
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Замінити робочі години поточного психолога."""
+    if current_user.role != UserRole.psychologist:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Робочі години можуть задавати лише психологи"
+        )
+    return await AvailabilityService.set_availability(db, current_user.id, availability.intervals)
+
+
 @router.get("/{user_id}", response_model=UserOut)
 async def get_user_by_id(
         user_id: int,
@@ -104,6 +185,8 @@ async def update_avatar(
             avatar=avatar
         )
         return updated_user
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error updating avatar: {str(e)}")
         raise HTTPException(
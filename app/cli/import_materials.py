@@ -0,0 +1,53 @@
+"""
+Bulk import of materials from an NDJSON or CSV file.
+
+    python -m app.cli.import_materials materials.ndjson
+    python -m app.cli.import_materials materials.csv --batch-size 2000
+
+Running servers pick the new materials up within MATERIAL_CATALOG_TTL /
+MATERIAL_SEARCH_REFRESH_SECONDS seconds.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from app.core.config import settings
+from app.db.sessions import AsyncSessionLocal, async_engine
+from app.services.material_import import MaterialImporter, iter_csv, iter_lines, iter_ndjson
+
+
+async def read_chunks(path: str, chunk_size: int = 1024 * 1024):
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Import materials from an NDJSON or CSV file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="By default taken from the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.MATERIAL_IMPORT_BATCH_SIZE)
+    parser.add_argument("--author-id", type=int, default=None)
+    args = parser.parse_args()
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    lines = iter_lines(read_chunks(args.path))
+    records = iter_csv(lines) if file_format == "csv" else iter_ndjson(lines)
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        report = await MaterialImporter(db, author_id=args.author_id, batch_size=args.batch_size).run(records)
+    await async_engine.dispose()
+
+    for error in report.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    print(
+        f"Imported {report.imported} materials and {report.categories} categories, "
+        f"{report.failed} rows failed, in {time.perf_counter() - started:.1f}s"
+    )
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
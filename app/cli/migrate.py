@@ -0,0 +1,46 @@
+"""
+Creates missing tables and brings the schema up to date.
+
+    python -m app.cli.migrate
+    python -m app.cli.migrate --drop-legacy-session-columns
+
+Run once per deploy, before the new workers start (in development the workers
+do it themselves, see DB_MIGRATE_ON_STARTUP). Concurrent runs wait for each other.
+sessions.date/time are kept after the switch to sessions.starts_at; drop them with
+--drop-legacy-session-columns once the converted start times have been checked.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.locks import named_lock
+from app.db.migrations import MIGRATION_LOCK_TIMEOUT, drop_legacy_session_columns, migrate_database
+from app.db.sessions import async_engine
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Create missing tables and run the schema migrations")
+    parser.add_argument(
+        "--drop-legacy-session-columns", action="store_true",
+        help="Drop sessions.date/time; refused while some of their values could not be converted"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="With --drop-legacy-session-columns: drop even if some values could not be converted"
+    )
+    args = parser.parse_args()
+
+    try:
+        await migrate_database(async_engine)
+        if not args.drop_legacy_session_columns:
+            return 0
+        async with named_lock(async_engine, "mindspace:migrations", timeout=MIGRATION_LOCK_TIMEOUT):
+            async with async_engine.begin() as conn:
+                dropped = await drop_legacy_session_columns(conn, force=args.force)
+        return 0 if dropped else 1
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
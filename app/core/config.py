@@ -4,6 +4,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# development або production: від цього залежать значення за замовчуванням для підключення до БД
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development").lower()
+_PRODUCTION = ENVIRONMENT in ("production", "prod")
+
+
+def _env_default(name: str, development: str, production: str) -> str:
+    return os.getenv(name, production if _PRODUCTION else development)
+
 
 class Settings:
     PROJECT_NAME: str = "MindSpace"
@@ -13,6 +21,101 @@ class Settings:
     MYSQL_PORT: str = os.getenv("MYSQL_PORT", "3306")
     MYSQL_DB: str = os.getenv("MYSQL_DB", "mindspace_db")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "REALLY__TRUE__SECRET")
+    # Адміністратори (через кому): створення й імпорт матеріалів, службові метрики
+    ADMIN_EMAILS: frozenset = frozenset(
+        email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+    )
+    ENVIRONMENT: str = ENVIRONMENT
+
+    # Пул з'єднань з БД. DB_ECHO логує кожен SQL-запит синхронно, тому в production вимкнено.
+    DB_ECHO: bool = _env_default("DB_ECHO", "true", "false").lower() == "true"
+    DB_POOL_SIZE: int = int(_env_default("DB_POOL_SIZE", "5", "20"))
+    DB_MAX_OVERFLOW: int = int(_env_default("DB_MAX_OVERFLOW", "10", "20"))
+    # Скільки секунд чекати на вільне з'єднання, перш ніж запит завершиться помилкою
+    DB_POOL_TIMEOUT: int = int(_env_default("DB_POOL_TIMEOUT", "30", "10"))
+    # Перевідкривати з'єднання, старші за N секунд (менше за wait_timeout MySQL і таймаути проксі)
+    DB_POOL_RECYCLE: int = int(_env_default("DB_POOL_RECYCLE", "3600", "1800"))
+    DB_POOL_PRE_PING: bool = _env_default("DB_POOL_PRE_PING", "true", "true").lower() == "true"
+    # max_execution_time для SELECT-запитів, мс (0 - без обмеження)
+    DB_STATEMENT_TIMEOUT_MS: int = int(_env_default("DB_STATEMENT_TIMEOUT_MS", "0", "30000"))
+    # Створювати таблиці й виконувати міграції при старті кожного воркера. В production
+    # міграції запускаються один раз під час деплою: python -m app.cli.migrate
+    DB_MIGRATE_ON_STARTUP: bool = _env_default("DB_MIGRATE_ON_STARTUP", "true", "false").lower() == "true"
+
+    # Скільки хешувань паролів (argon2) виконується одночасно в пулі потоків
+    PASSWORD_HASH_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "4"))
+
+    # Кеш автентифікованих користувачів (get_current_user), секунди
+    AUTH_USER_CACHE_TTL: int = int(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+    AUTH_USER_CACHE_SIZE: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+
+    # Каталог психологів у пам'яті (GET /users/psychologists)
+    PSYCHOLOGIST_DIRECTORY_TTL: int = int(os.getenv("PSYCHOLOGIST_DIRECTORY_TTL", "300"))
+    PSYCHOLOGISTS_PAGE_SIZE: int = int(os.getenv("PSYCHOLOGISTS_PAGE_SIZE", "50"))
+    PSYCHOLOGISTS_MAX_PAGE_SIZE: int = int(os.getenv("PSYCHOLOGISTS_MAX_PAGE_SIZE", "200"))
+
+    # Знімок каталогу матеріалів у пам'яті: як довго (секунди) інший воркер може віддавати застарілі дані
+    MATERIAL_CATALOG_TTL: int = int(os.getenv("MATERIAL_CATALOG_TTL", "300"))
+    MATERIALS_PAGE_SIZE: int = int(os.getenv("MATERIALS_PAGE_SIZE", "50"))
+    MATERIALS_MAX_PAGE_SIZE: int = int(os.getenv("MATERIALS_MAX_PAGE_SIZE", "200"))
+    # Як часто (секунди) пошуковий індекс матеріалів підтягує матеріали, створені іншими воркерами
+    MATERIAL_SEARCH_REFRESH_SECONDS: int = int(os.getenv("MATERIAL_SEARCH_REFRESH_SECONDS", "60"))
+    # Масовий імпорт матеріалів: рядків в одному INSERT/коміті, скільки помилок повертати у звіті
+    MATERIAL_IMPORT_BATCH_SIZE: int = int(os.getenv("MATERIAL_IMPORT_BATCH_SIZE", "1000"))
+    MATERIAL_IMPORT_MAX_ERRORS: int = int(os.getenv("MATERIAL_IMPORT_MAX_ERRORS", "1000"))
+
+    # Бронювання сесій: максимальна тривалість, крок вільних слотів (хв), максимальний діапазон пошуку слотів (дні)
+    SESSION_MAX_DURATION_MINUTES: int = int(os.getenv("SESSION_MAX_DURATION_MINUTES", "240"))
+    SESSION_SLOT_STEP_MINUTES: int = int(os.getenv("SESSION_SLOT_STEP_MINUTES", "30"))
+    SESSION_SLOTS_MAX_DAYS: int = int(os.getenv("SESSION_SLOTS_MAX_DAYS", "31"))
+    # Розмір сторінки списку сесій (за замовчуванням і максимальний)
+    SESSIONS_PAGE_SIZE: int = int(os.getenv("SESSIONS_PAGE_SIZE", "50"))
+    SESSIONS_MAX_PAGE_SIZE: int = int(os.getenv("SESSIONS_MAX_PAGE_SIZE", "200"))
+
+    # Фоновий планувальник сесій: завершення минулих сесій і нагадування.
+    # При кількох воркерах завдання виконує лише воркер, що тримає блокування GET_LOCK.
+    SESSION_SCHEDULER_ENABLED: bool = os.getenv("SESSION_SCHEDULER_ENABLED", "true").lower() == "true"
+    SESSION_SCHEDULER_INTERVAL_SECONDS: int = int(os.getenv("SESSION_SCHEDULER_INTERVAL_SECONDS", "60"))
+    SESSION_SCHEDULER_BATCH_SIZE: int = int(os.getenv("SESSION_SCHEDULER_BATCH_SIZE", "500"))
+    SESSION_REMINDER_OFFSETS_MINUTES: tuple = tuple(
+        int(offset) for offset in os.getenv("SESSION_REMINDER_OFFSETS_MINUTES", "60,10").split(",") if offset.strip()
+    )
+
+    # Аватари: максимальний розмір файлу (байти), розміри мініатюр (px), потоки для мініатюр
+    AVATAR_MAX_BYTES: int = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+    AVATAR_THUMBNAIL_SIZES: tuple = tuple(
+        int(size) for size in os.getenv("AVATAR_THUMBNAIL_SIZES", "64,256").split(",") if size.strip()
+    )
+    AVATAR_THUMBNAIL_WORKERS: int = int(os.getenv("AVATAR_THUMBNAIL_WORKERS", "2"))
+
+    # Спільна шина Socket.IO для кількох воркерів (redis://...); порожньо - лише в пам'яті процесу
+    SOCKETIO_MESSAGE_QUEUE: str = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+
+    # Пагінація історії чату
+    CHAT_MESSAGES_PAGE_SIZE: int = int(os.getenv("CHAT_MESSAGES_PAGE_SIZE", "50"))
+    CHAT_MESSAGES_MAX_PAGE_SIZE: int = int(os.getenv("CHAT_MESSAGES_MAX_PAGE_SIZE", "200"))
+
+    # Догрузка пропущених повідомлень після перепідключення (подія sync)
+    CHAT_SYNC_BATCH_SIZE: int = int(os.getenv("CHAT_SYNC_BATCH_SIZE", "100"))
+    CHAT_SYNC_MAX_MESSAGES: int = int(os.getenv("CHAT_SYNC_MAX_MESSAGES", "1000"))
+
+    # Як часто зберігати в БД позначки прочитання (mark_read), мс
+    CHAT_READ_RECEIPT_FLUSH_MS: int = int(os.getenv("CHAT_READ_RECEIPT_FLUSH_MS", "1000"))
+
+    # Кеш учасників чату
+    CHAT_MEMBERSHIP_CACHE_SIZE: int = int(os.getenv("CHAT_MEMBERSHIP_CACHE_SIZE", "10000"))
+    CHAT_MEMBERSHIP_CACHE_TTL: int = int(os.getenv("CHAT_MEMBERSHIP_CACHE_TTL", "3600"))
+
+    # Групове збереження повідомлень чату (див. app.services.message_writer)
+    CHAT_BATCH_WRITES: bool = os.getenv("CHAT_BATCH_WRITES", "false").lower() == "true"
+    CHAT_BATCH_WINDOW_MS: int = int(os.getenv("CHAT_BATCH_WINDOW_MS", "5"))
+    CHAT_BATCH_MAX_SIZE: int = int(os.getenv("CHAT_BATCH_MAX_SIZE", "100"))
+
+    # Облік SQL-запитів на HTTP-запит / Socket.IO-подію (заголовки Server-Timing, X-DB-Query-Count).
+    # У production вимкнено: заголовки видно будь-якому origin (CORS expose_headers=["*"])
+    SQL_INSTRUMENTATION_ENABLED: bool = _env_default("SQL_INSTRUMENTATION_ENABLED", "true", "false").lower() == "true"
+    # Скільки разів однаковий запит може повторитися в межах одного запиту, перш ніж це вважати N+1
+    SQL_REPEATED_QUERY_THRESHOLD: int = int(os.getenv("SQL_REPEATED_QUERY_THRESHOLD", "10"))
 
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
@@ -1,4 +1,8 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
 
 import jwt
 from passlib.context import CryptContext
@@ -11,6 +15,22 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# argon2 звільняє GIL, тому пулу потоків достатньо, щоб не блокувати event loop.
+# Семафор обмежує кількість одночасних хешувань, решта запитів чекає в черзі.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_CONCURRENCY,
+    thread_name_prefix="password-hash"
+)
+_password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_CONCURRENCY)
+
+password_hash_metrics: Dict[str, float] = {
+    "calls": 0,
+    "waiting": 0,
+    "queue_time_total": 0.0,
+    "queue_time_max": 0.0,
+    "run_time_total": 0.0,
+}
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -20,6 +40,37 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_password_job(func: Callable, *args):
+    """
+    Runs a CPU-heavy password function in the bounded pool and records
+    how long it waited for a free slot and how long it ran.
+    """
+    metrics = password_hash_metrics
+    enqueued_at = time.perf_counter()
+    metrics["waiting"] += 1
+    async with _password_slots:
+        started_at = time.perf_counter()
+        metrics["waiting"] -= 1
+        queue_time = started_at - enqueued_at
+        metrics["calls"] += 1
+        metrics["queue_time_total"] += queue_time
+        metrics["queue_time_max"] = max(metrics["queue_time_max"], queue_time)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+        finally:
+            metrics["run_time_total"] += time.perf_counter() - started_at
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password that does not block the event loop"""
+    return await _run_password_job(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password that does not block the event loop"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -3,4 +3,4 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 # Import all models so that Alembic can detect them
-from app.models import user, chat, message, material, session  # noqa
+from app.models import user, availability, chat, chat_read_state, message, material, session  # noqa
@@ -0,0 +1,16 @@
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class minutes_after(FunctionElement):
+    """SQL ``timestamp + minutes`` (TIMESTAMPADD in MySQL): minutes_after(Session.starts_at, Session.duration)"""
+    type = DateTime()
+    name = "minutes_after"
+    inherit_cache = True
+
+
+@compiles(minutes_after)
+def _compile_minutes_after(element, compiler, **kw):
+    timestamp, minutes = list(element.clauses)
+    return f"TIMESTAMPADD(MINUTE, {compiler.process(minutes, **kw)}, {compiler.process(timestamp, **kw)})"
@@ -0,0 +1,201 @@
+import functools
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+# Статистика запитів поточного HTTP-запиту / Socket.IO-події
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+_NUMBERS = re.compile(r"\b\d+\b")
+
+# Сумарні показники за маршрутом або подією: {"GET /api/v1/chats/": {...}}
+query_metrics: Dict[str, Dict[str, float]] = {}
+
+# Отримання з'єднань з пулу: скільки, скільки часу чекали, скільки разів не дочекалися
+pool_metrics: Dict[str, float] = {
+    "checkouts": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "timeouts": 0,
+}
+
+
+class QueryStats:
+    """
+    Queries executed inside one ``track_queries`` block.
+    Nested blocks also report to their parents, so a test-wide budget sees the
+    queries of the request it wraps.
+    """
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements executed at least ``threshold`` times, a typical N+1 pattern"""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fails with AssertionError when the wrapped code (e.g. a test client call)
+    runs more than ``max_queries`` SQL statements.
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        statements = "\n".join(f"  {count}x {statement}" for statement, count in stats.statements.most_common(10))
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{statements}")
+
+
+def record_metrics(name: str, stats: QueryStats, elapsed: float) -> None:
+    """Adds one request/event to ``query_metrics`` and warns about repeated statements"""
+    metrics = query_metrics.setdefault(
+        name, {"calls": 0, "queries": 0, "db_seconds": 0.0, "max_queries": 0, "total_seconds": 0.0}
+    )
+    metrics["calls"] += 1
+    metrics["queries"] += stats.count
+    metrics["db_seconds"] += stats.duration
+    metrics["total_seconds"] += elapsed
+    metrics["max_queries"] = max(metrics["max_queries"], stats.count)
+
+    for statement, count in stats.repeated(settings.SQL_REPEATED_QUERY_THRESHOLD).items():
+        print(f"⚠️ Possible N+1 in {name}: {count}x {statement[:200]}")
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Counts and times every statement executed through ``engine``"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.query_started
+        stats = _current.get()
+        if stats is not None:
+            # Числа в тексті (розміри IN-списків тощо) не роблять запит іншим
+            stats.record(_NUMBERS.sub("?", " ".join(statement.split())), duration)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a connection
+    (including opening a new one) in ``pool_metrics``. A growing average or max
+    wait means the pool is too small for the traffic.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        pool_metrics["checkouts"] += 1
+        pool_metrics["wait_seconds_total"] += waited
+        pool_metrics["wait_seconds_max"] = max(pool_metrics["wait_seconds_max"], waited)
+        return connection
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, float]:
+    """Current pool occupancy together with the accumulated checkout metrics"""
+    pool = engine.sync_engine.pool
+    return {
+        **pool_metrics,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+class QueryTimingMiddleware:
+    """
+    ASGI middleware reporting the SQL work of each HTTP request in the
+    ``Server-Timing`` (db and app durations) and ``X-DB-Query-Count`` headers,
+    and aggregating it per route in ``query_metrics``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with track_queries() as stats:
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    headers = list(message.get("headers", []))
+                    headers.append((
+                        b"server-timing",
+                        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                        f'app;dur={elapsed_ms:.1f}'.encode()
+                    ))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # Статика й невідомі шляхи йдуть в одну групу, щоб не плодити ключі метрик
+                route = scope.get("route")
+                path = getattr(route, "path", None) or "<unrouted>"
+                record_metrics(f"{scope['method']} {path}", stats, time.perf_counter() - started)
+
+
+def instrument_event(name: str):
+    """Decorator for Socket.IO handlers: tracks their queries in ``query_metrics`` as ``sio:<name>``"""
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            with track_queries() as stats:
+                try:
+                    return await handler(*args, **kwargs)
+                finally:
+                    record_metrics(f"sio:{name}", stats, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
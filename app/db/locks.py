@@ -0,0 +1,29 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+# Імена блокувань MySQL обмежені 64 символами
+_MAX_NAME = 64
+
+
+@asynccontextmanager
+async def named_lock(engine: AsyncEngine, name: str, timeout: int = 10) -> AsyncIterator[AsyncConnection]:
+    """
+    MySQL advisory lock (GET_LOCK) shared by every worker and process using the database.
+    Held on a dedicated connection, so the caller's session may commit (and return its
+    connection to the pool) while the lock is held. Raises TimeoutError if the lock
+    is not acquired within ``timeout`` seconds.
+    """
+    name = name[:_MAX_NAME]
+    async with engine.connect() as conn:
+        acquired = (await conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}
+        )).scalar()
+        if acquired != 1:
+            raise TimeoutError(f"Could not acquire lock {name!r} within {timeout}s")
+        try:
+            yield conn
+        finally:
+            await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
@@ -0,0 +1,205 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.db.base import Base
+from app.db.locks import named_lock
+from app.services.avatar_storage import existing_thumbnail_sizes
+
+# Скільки секунд чекати, поки інший процес завершить міграції
+MIGRATION_LOCK_TIMEOUT = 600
+
+
+async def _get_columns(conn: AsyncConnection, table: str) -> set:
+    return await conn.run_sync(
+        lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns(table)}
+    )
+
+
+async def _get_indexes(conn: AsyncConnection, table: str) -> set:
+    return await conn.run_sync(
+        lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes(table)}
+    )
+
+
+async def _get_nullable(conn: AsyncConnection, table: str) -> dict:
+    return await conn.run_sync(
+        lambda sync_conn: {column["name"]: column["nullable"] for column in inspect(sync_conn).get_columns(table)}
+    )
+
+
+_LEGACY_START = "STR_TO_DATE(CONCAT(LEFT(`date`, 10), ' ', LEFT(`time`, 5)), '%Y-%m-%d %H:%i')"
+
+
+async def migrate_session_start_times(conn: AsyncConnection) -> None:
+    """
+    sessions.date (ISO string) + sessions.time ("HH:MM") -> sessions.starts_at DATETIME.
+
+    The legacy columns are kept, only made NULLable because new rows no longer fill
+    them, until drop_legacy_session_columns has checked the conversion. Rows whose
+    strings cannot be parsed are listed and get their created_at as a placeholder;
+    their original values stay in date/time for manual repair.
+    Finished once starts_at is NOT NULL.
+    """
+    nullable = await _get_nullable(conn, "sessions")
+    if "date" not in nullable or "time" not in nullable or nullable.get("starts_at") is False:
+        return
+
+    print("Migrating sessions.date/time to sessions.starts_at")
+    if "starts_at" not in nullable:
+        await conn.execute(text("ALTER TABLE sessions ADD COLUMN starts_at DATETIME NULL AFTER psychologist_id"))
+
+    await conn.execute(text(f"UPDATE sessions SET starts_at = {_LEGACY_START} WHERE starts_at IS NULL"))
+
+    unparsed = (await conn.execute(text(
+        "SELECT id, `date`, `time` FROM sessions WHERE starts_at IS NULL ORDER BY id"
+    ))).all()
+    for row in unparsed:
+        print(f"⚠️ Session {row.id}: cannot parse date={row.date!r} time={row.time!r}, starts_at set to created_at")
+    if unparsed:
+        await conn.execute(text(
+            "UPDATE sessions SET starts_at = COALESCE(created_at, NOW()) WHERE starts_at IS NULL"
+        ))
+
+    await conn.execute(text(
+        "ALTER TABLE sessions MODIFY `date` VARCHAR(20) NULL, MODIFY `time` VARCHAR(10) NULL, "
+        "MODIFY starts_at DATETIME NOT NULL"
+    ))
+
+
+async def drop_legacy_session_columns(conn: AsyncConnection, force: bool = False) -> bool:
+    """
+    Drops sessions.date/time once migrate_session_start_times has run. Refuses (returns
+    False) while some legacy values could not be parsed, i.e. their starts_at is only
+    the created_at placeholder, unless ``force`` is set.
+    """
+    nullable = await _get_nullable(conn, "sessions")
+    if "date" not in nullable and "time" not in nullable:
+        return True
+    if nullable.get("starts_at") is not False:
+        print("sessions.starts_at is not migrated yet, run the migrations first")
+        return False
+
+    unparsed = (await conn.execute(text(
+        f"SELECT id, `date`, `time` FROM sessions WHERE `date` IS NOT NULL AND {_LEGACY_START} IS NULL ORDER BY id"
+    ))).all()
+    for row in unparsed:
+        print(f"Session {row.id}: unparseable legacy date={row.date!r} time={row.time!r}")
+    if unparsed and not force:
+        print(f"{len(unparsed)} sessions still need their starts_at checked; not dropping date/time")
+        return False
+
+    print("Dropping sessions.date and sessions.time")
+    await conn.execute(text("ALTER TABLE sessions DROP COLUMN `date`, DROP COLUMN `time`"))
+    return True
+
+
+async def migrate_chat_last_message(conn: AsyncConnection) -> None:
+    """
+    Adds the denormalized chats.last_message_id / last_message_at and fills them
+    from the latest message (MAX(messages.id)) of every chat.
+    """
+    columns = await _get_columns(conn, "chats")
+    added = [
+        definition for name, definition in (
+            ("last_message_id", "ADD COLUMN last_message_id INT NULL"),
+            ("last_message_at", "ADD COLUMN last_message_at DATETIME NULL"),
+        )
+        if name not in columns
+    ]
+    if not added:
+        return
+
+    print("Adding chats.last_message_id/last_message_at")
+    await conn.execute(text(f"ALTER TABLE chats {', '.join(added)}"))
+    await conn.execute(text(
+        "UPDATE chats "
+        "JOIN (SELECT chat_id, MAX(id) AS last_id FROM messages GROUP BY chat_id) AS latest "
+        "    ON latest.chat_id = chats.id "
+        "JOIN messages ON messages.id = latest.last_id "
+        "SET chats.last_message_id = messages.id, chats.last_message_at = messages.created_at"
+    ))
+
+
+async def migrate_avatar_thumbnail_sizes(conn: AsyncConnection) -> None:
+    """
+    Adds users.avatar_thumbnail_sizes and fills it for avatars stored before it
+    existed from the thumbnails found on disk, once per distinct avatar.
+    """
+    if "avatar_thumbnail_sizes" in await _get_columns(conn, "users"):
+        return
+
+    print("Adding users.avatar_thumbnail_sizes")
+    await conn.execute(text("ALTER TABLE users ADD COLUMN avatar_thumbnail_sizes VARCHAR(64) NULL"))
+    result = await conn.execute(text("SELECT DISTINCT avatar_url FROM users WHERE avatar_url IS NOT NULL"))
+    for avatar_url in result.scalars().all():
+        sizes = existing_thumbnail_sizes(avatar_url)
+        if sizes:
+            await conn.execute(
+                text("UPDATE users SET avatar_thumbnail_sizes = :sizes WHERE avatar_url = :avatar_url"),
+                {"sizes": sizes, "avatar_url": avatar_url}
+            )
+
+
+async def backfill_chat_read_states(conn: AsyncConnection) -> None:
+    """
+    Creates the read states of chats that existed before chat_read_states: with no
+    read position yet, every message from the other participant counts as unread.
+    Runs while the table is still empty, i.e. once.
+    """
+    if (await conn.execute(text("SELECT 1 FROM chat_read_states LIMIT 1"))).first() is not None:
+        return
+
+    print("Backfilling chat_read_states")
+    for participant in ("student_id", "psychologist_id"):
+        await conn.execute(text(
+            "INSERT INTO chat_read_states (chat_id, user_id, unread_count) "
+            f"SELECT chats.id, chats.{participant}, ("
+            "    SELECT COUNT(*) FROM messages "
+            f"    WHERE messages.chat_id = chats.id AND messages.sender_id <> chats.{participant}"
+            ") "
+            "FROM chats "
+            "WHERE NOT EXISTS ("
+            "    SELECT 1 FROM chat_read_states "
+            f"    WHERE chat_read_states.chat_id = chats.id AND chat_read_states.user_id = chats.{participant}"
+            ")"
+        ))
+
+
+async def create_missing_indexes(conn: AsyncConnection) -> None:
+    """
+    Creates indexes declared on the models but missing from tables that already existed
+    when they were added (create_all only creates indexes together with new tables).
+    """
+    for table in Base.metadata.sorted_tables:
+        if not table.indexes:
+            continue
+        existing = await _get_indexes(conn, table.name)
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"Creating missing index {index.name}")
+                await conn.run_sync(index.create)
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    """
+    Brings tables created by an older version of the models up to date.
+    create_all never alters existing tables, so every change of an existing column
+    gets a function here; each one checks the current schema first and does
+    nothing once applied.
+    """
+    await migrate_session_start_times(conn)
+    await migrate_chat_last_message(conn)
+    await migrate_avatar_thumbnail_sizes(conn)
+    await backfill_chat_read_states(conn)
+    await create_missing_indexes(conn)
+
+
+async def migrate_database(engine: AsyncEngine) -> None:
+    """
+    Creates missing tables and runs the migrations, holding a database-wide lock so
+    that concurrent runs (several workers or deploy jobs) apply them one at a time.
+    """
+    async with named_lock(engine, "mindspace:migrations", timeout=MIGRATION_LOCK_TIMEOUT):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(conn)
@@ -1,10 +1,27 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.core.config import settings
+from app.db.instrumentation import InstrumentedPool
 
 DATABASE_URL = settings.SQLALCHEMY_DATABASE_URI
 
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+connect_args = {}
+if settings.DB_STATEMENT_TIMEOUT_MS:
+    # Обмежує час виконання SELECT на рівні сесії MySQL
+    connect_args["init_command"] = f"SET SESSION max_execution_time={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DB_ECHO,
+    future=True,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=connect_args
+)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -7,24 +7,54 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from app.api.v1.endpoints import auth, chats, sessions, users, materials
+from app.api.v1.endpoints import auth, chats, sessions, users, materials, metrics
 from app.core.config import settings
-from app.db.base import Base
-from app.db.sessions import async_engine
-from app.socketio_events import sio
+from app.db.instrumentation import QueryTimingMiddleware, instrument_engine
+from app.db.migrations import migrate_database
+from app.db.sessions import async_engine, AsyncSessionLocal
+from app.services.avatar_storage import AVATAR_MAX_REQUEST_BYTES, cleanup_partial_uploads
+from app.services.material_catalog import material_catalog
+from app.services.material_search import material_search
+from app.services.message_writer import message_writer
+from app.services.psychologist_directory import psychologist_directory
+from app.services.read_receipts import read_receipts
+from app.services.session_scheduler import SessionScheduler
+from app.socketio_events import sio, connected_users, emit_to_user
+from app.utils.request_limits import BodySizeLimitMiddleware
+from app.utils.static_files import ImmutableStaticFiles
+
+session_scheduler = SessionScheduler(emit=emit_to_user)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀Initializing")
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.DB_MIGRATE_ON_STARTUP:
+        await migrate_database(async_engine)
 
     os.makedirs("static/avatars", exist_ok=True)
+    cleanup_partial_uploads()
+
+    async with AsyncSessionLocal() as db:
+        await psychologist_directory.rebuild(db)
+        await material_catalog.rebuild(db)
+
+    # Пошуковий індекс будується у фоні, щоб великий каталог не затримував старт
+    search_index_task = material_search.refresh_in_background()
+
+    connected_users.start()
+    if settings.SESSION_SCHEDULER_ENABLED:
+        session_scheduler.start()
 
     yield
 
     print("🛑 Finishing")
+    search_index_task.cancel()
+    material_search.close()
+    await session_scheduler.stop()
+    await connected_users.stop()
+    await message_writer.close()
+    await read_receipts.close()
     await async_engine.dispose()
 
 
@@ -34,6 +64,15 @@ app = FastAPI(
     description="MindSpace API",
     lifespan=lifespan
 )
+# Для /api/v1/metrics і статусу "онлайн" у списку чатів
+app.state.session_scheduler = session_scheduler
+app.state.connected_users = connected_users
+
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_engine(async_engine)
+    app.add_middleware(QueryTimingMiddleware)
+
+app.add_middleware(BodySizeLimitMiddleware, limits={"/api/v1/users/me/avatar": AVATAR_MAX_REQUEST_BYTES})
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,8 +83,11 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-os.makedirs("static", exist_ok=True)
+os.makedirs("static/avatars", exist_ok=True)
 
+# Аватари мають унікальні імена й ніколи не змінюються, тож кешуються клієнтами назавжди.
+# Монтується раніше за /static, щоб перехоплювати ці шляхи.
+app.mount("/static/avatars", ImmutableStaticFiles(directory="static/avatars"), name="avatars")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
@@ -53,6 +95,7 @@ app.include_router(chats.router, prefix="/api/v1/chats")
 app.include_router(sessions.router, prefix="/api/v1/sessions")
 app.include_router(users.router, prefix="/api/v1/users")
 app.include_router(materials.router, prefix="/api/v1/materials")
+app.include_router(metrics.router, prefix="/api/v1/metrics")
 
 socket_app = socketio.ASGIApp(
     socketio_server=sio,
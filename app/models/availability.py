@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, Time, Index
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class PsychologistAvailability(Base):
+    """One weekly working-hours interval of a psychologist."""
+    __tablename__ = "psychologist_availability"
+    __table_args__ = (
+        Index("ix_psychologist_availability_psychologist_id_weekday", "psychologist_id", "weekday"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    psychologist_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    weekday = Column(Integer, nullable=False)  # 0 - понеділок, 6 - неділя
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+
+    psychologist = relationship("User")
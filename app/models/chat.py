@@ -8,10 +8,15 @@ class Chat(Base):
     __tablename__ = "chats"
 
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    psychologist_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    psychologist_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # denormalized pointer to the latest message, maintained by ChatService.save_message
+    # (no FK to avoid a chats <-> messages dependency cycle)
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+
     # relationships to the User table
     student = relationship("User", foreign_keys=[student_id])
     psychologist = relationship("User", foreign_keys=[psychologist_id])
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+
+from app.db.base import Base
+
+
+class ChatReadState(Base):
+    """
+    Read position and unread counter of one participant in one chat.
+    unread_count is maintained incrementally: bumped by ChatService.save_message(s)
+    and reset by ChatService.mark_chats_read.
+    """
+    __tablename__ = "chat_read_states"
+
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_read_message_id = Column(Integer, nullable=True)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, DateTime, func, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, DateTime, func, Boolean, case
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
@@ -29,12 +29,23 @@ class Material(Base):
     categories = relationship("Category", secondary=material_category, back_populates="materials")
     author = relationship("User", back_populates="materials")
 
+    EXCERPT_LENGTH = 150
+
     @hybrid_property
     def excerpt(self):
         """Повертає короткий уривок контенту для попереднього перегляду"""
-        if len(self.content) <= 150:
+        if len(self.content) <= self.EXCERPT_LENGTH:
             return self.content
-        return self.content[:150] + "..."
+        return self.content[:self.EXCERPT_LENGTH] + "..."
+
+    @excerpt.inplace.expression
+    @classmethod
+    def _excerpt_expression(cls):
+        """Той самий уривок, обчислений у SQL, щоб списки не читали весь текст статті"""
+        return case(
+            (func.char_length(cls.content) <= cls.EXCERPT_LENGTH, cls.content),
+            else_=func.concat(func.substr(cls.content, 1, cls.EXCERPT_LENGTH), "...")
+        )
 
 
 class Category(Base):
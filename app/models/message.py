@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func, Text, Index
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -6,6 +6,10 @@ from app.db.base import Base
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # keyset pagination of chat history: WHERE chat_id = ? AND (created_at, id) < (?, ?)
+        Index("ix_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
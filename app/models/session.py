@@ -1,9 +1,12 @@
 import enum
+from datetime import timedelta
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Float, Enum, func
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Float, Enum, func, Index
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
+from app.db.functions import minutes_after
 
 
 class SessionStatus(enum.Enum):
@@ -14,12 +17,19 @@ class SessionStatus(enum.Enum):
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # календар психолога / студента: WHERE <participant>_id = ? AND starts_at BETWEEN ? AND ?
+        Index("ix_sessions_psychologist_id_starts_at", "psychologist_id", "starts_at"),
+        Index("ix_sessions_student_id_starts_at", "student_id", "starts_at"),
+        # фоновий планувальник: WHERE status = 'upcoming' AND starts_at < ?
+        Index("ix_sessions_status_starts_at", "status", "starts_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     psychologist_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    date = Column(String(20), nullable=False)
-    time = Column(String(10), nullable=False)
+    # Початок сесії (локальний час, без часового поясу, як його обрав користувач)
+    starts_at = Column(DateTime, nullable=False)
     duration = Column(Integer, nullable=False)
     status = Column(Enum(SessionStatus), nullable=False, default=SessionStatus.upcoming)
     notes = Column(String(500), nullable=True)
@@ -29,3 +39,11 @@ class Session(Base):
     # relationships
     student = relationship("User", foreign_keys=[student_id], back_populates="sessions")
     psychologist = relationship("User", foreign_keys=[psychologist_id], back_populates="psychologist_sessions")
+
+    @hybrid_property
+    def ends_at(self):
+        return self.starts_at + timedelta(minutes=self.duration)
+
+    @ends_at.expression
+    def ends_at(cls):
+        return minutes_after(cls.starts_at, cls.duration)
@@ -24,7 +24,9 @@ class User(Base):
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     bio = Column(Text, nullable=True)
-    avatar_url = Column(String(512), nullable=True)
+    avatar_url = Column(String(512), nullable=True, index=True)
+    # Розміри мініатюр аватара через кому ("64,256"), визначені під час збереження
+    avatar_thumbnail_sizes = Column(String(64), nullable=True)
     birth_date = Column(Date, nullable=False)
     phone_number = Column(String(20), nullable=False)
 
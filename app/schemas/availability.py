@@ -0,0 +1,28 @@
+from datetime import datetime, time
+from typing import List
+
+from pydantic import BaseModel, Field, validator
+
+
+class AvailabilityInterval(BaseModel):
+    weekday: int = Field(..., ge=0, le=6)  # 0 - понеділок, 6 - неділя
+    start_time: time
+    end_time: time
+
+    @validator('end_time')
+    def validate_end_time(cls, v, values):
+        if 'start_time' in values and v <= values['start_time']:
+            raise ValueError('Кінець робочого інтервалу має бути пізніше за початок')
+        return v
+
+    class Config:
+        from_attributes = True
+
+
+class AvailabilityUpdate(BaseModel):
+    intervals: List[AvailabilityInterval]
+
+
+class SlotOut(BaseModel):
+    starts_at: datetime
+    ends_at: datetime
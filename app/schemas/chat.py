@@ -21,6 +21,8 @@ class ChatParticipantInfo(BaseModel):
     first_name: str
     last_name: str
     avatar_url: Optional[str] = None
+    avatar_thumbnail_url: Optional[str] = None
+    is_online: bool = False
     
     class Config:
         from_attributes = True
@@ -29,7 +31,10 @@ class ChatParticipantInfo(BaseModel):
 class ChatOut(ChatBase):
     id: int
     created_at: datetime
+    last_message_at: Optional[datetime] = None
     last_message: Optional[MessageOut] = None
+    unread_count: int = 0
+    last_read_message_id: Optional[int] = None
     participant_info: Optional[ChatParticipantInfo] = None
 
     class Config:
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 
 
 class CategoryBase(BaseModel):
@@ -19,6 +19,12 @@ class CategoryOut(CategoryBase):
         from_attributes = True
 
 
+class CategoryFacet(CategoryOut):
+    """Category with the number of its materials, overall and within the selected filters"""
+    material_count: int
+    matching_count: int
+
+
 class MaterialBase(BaseModel):
     title: str
     content: str
@@ -36,3 +42,58 @@ class MaterialOut(MaterialBase):
 
     class Config:
         from_attributes = True
+
+
+class MaterialListItem(BaseModel):
+    """Material as shown in lists: an excerpt instead of the full content"""
+    id: int
+    title: str
+    type: str
+    image_url: Optional[str] = None
+    excerpt: str
+    categories: List[CategoryOut]
+
+
+class MaterialSearchResult(MaterialListItem):
+    score: float
+
+
+class CategoryImportRow(BaseModel):
+    """Category record of a bulk import; created or updated by slug"""
+    slug: str = Field(..., min_length=1, max_length=100)
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+
+
+class MaterialImportRow(BaseModel):
+    """Material record of a bulk import; categories are given by slug"""
+    title: str = Field(..., min_length=1, max_length=255)
+    content: str = Field(..., min_length=1)
+    type: str = Field(..., min_length=1, max_length=50)
+    image_url: Optional[str] = Field(None, max_length=512)
+    categories: List[str] = []
+
+    @validator('image_url', pre=True)
+    def empty_image_url(cls, v):
+        return v or None
+
+    @validator('categories', pre=True)
+    def split_categories(cls, v):
+        # У CSV категорії передаються одним полем: "anxiety|sleep"
+        if v is None:
+            return []
+        if isinstance(v, str):
+            return [slug.strip() for slug in v.split("|") if slug.strip()]
+        return v
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    categories: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
@@ -1,10 +1,35 @@
+from datetime import date as date_type, datetime, time as time_type
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 from app.models.session import SessionStatus
 
 
+def normalize_session_date(v: Optional[str]) -> Optional[str]:
+    """Accepts an ISO date (or the date part of an ISO datetime), returns YYYY-MM-DD"""
+    if v is None:
+        return v
+    try:
+        return date_type.fromisoformat(v[:10]).isoformat()
+    except ValueError:
+        raise ValueError("Дата має бути у форматі YYYY-MM-DD")
+
+
+def normalize_session_time(v: Optional[str]) -> Optional[str]:
+    """Accepts HH:MM (seconds are ignored), returns HH:MM"""
+    if v is None:
+        return v
+    try:
+        return datetime.strptime(v[:5], "%H:%M").strftime("%H:%M")
+    except ValueError:
+        raise ValueError("Час має бути у форматі HH:MM")
+
+
+def combine_session_start(date: str, time: str) -> datetime:
+    return datetime.combine(date_type.fromisoformat(date), time_type.fromisoformat(time))
+
+
 class SessionBase(BaseModel):
     psychologist_id: int
     date: str  # ISO формат дати
@@ -12,6 +37,18 @@ class SessionBase(BaseModel):
     duration: int  # Тривалість у хвилинах
     price: float
 
+    @validator('date')
+    def validate_date(cls, v):
+        return normalize_session_date(v)
+
+    @validator('time')
+    def validate_time(cls, v):
+        return normalize_session_time(v)
+
+    @property
+    def starts_at(self) -> datetime:
+        return combine_session_start(self.date, self.time)
+
 
 class SessionCreate(SessionBase):
     pass
@@ -24,6 +61,14 @@ class SessionUpdate(BaseModel):
     notes: Optional[str] = None
     status: Optional[SessionStatus] = None
 
+    @validator('date')
+    def validate_date(cls, v):
+        return normalize_session_date(v)
+
+    @validator('time')
+    def validate_time(cls, v):
+        return normalize_session_time(v)
+
 
 class SessionOut(BaseModel):
     id: int
@@ -31,12 +76,30 @@ class SessionOut(BaseModel):
     psychologist_id: int
     date: str
     time: str
+    starts_at: datetime
     duration: int
     status: SessionStatus
     notes: Optional[str] = None
     price: Optional[float] = None
     psychologist_name: str
     psychologist_avatar: Optional[str] = None
+    psychologist_avatar_thumbnail: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class SessionListItem(BaseModel):
+    """Compact session row for list views; notes are only returned by GET /sessions/{id}"""
+    id: int
+    student_id: int
+    psychologist_id: int
+    date: str
+    time: str
+    starts_at: datetime
+    duration: int
+    status: SessionStatus
+    price: Optional[float] = None
+    psychologist_name: str
+    psychologist_avatar: Optional[str] = None
+    psychologist_avatar_thumbnail: Optional[str] = None
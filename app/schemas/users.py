@@ -48,7 +48,7 @@ class UserUpdate(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     bio: Optional[str] = None
-    avatar_url: Optional[str] = None
+    # avatar_url тут немає: аватар змінюється лише через POST /me/avatar, який прибирає старі файли
     birth_date: Optional[date] = None
     phone_number: Optional[str] = None
     # Додаткові поля для психологів
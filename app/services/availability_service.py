@@ -0,0 +1,225 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.availability import PsychologistAvailability
+from app.models.session import Session, SessionStatus
+from app.schemas.availability import AvailabilityInterval
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Sequence[Interval]) -> List[Interval]:
+    """Sorts intervals and merges the overlapping ones."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(interval: Interval, busy: List[Interval], busy_ends: List[datetime]) -> List[Interval]:
+    """
+    Returns the parts of ``interval`` not covered by ``busy``
+    (merged, sorted; ``busy_ends`` are their end points for bisecting).
+    """
+    start, end = interval
+    free: List[Interval] = []
+    i = bisect_right(busy_ends, start)
+    while i < len(busy) and busy[i][0] < end:
+        busy_start, busy_end = busy[i]
+        if busy_start > start:
+            free.append((start, busy_start))
+        start = max(start, busy_end)
+        i += 1
+    if start < end:
+        free.append((start, end))
+    return free
+
+
+def working_intervals(
+        availability: Sequence[PsychologistAvailability],
+        start: datetime,
+        end: datetime
+) -> List[Interval]:
+    """Expands the weekly schedule into concrete intervals within [start, end)."""
+    by_weekday = {}
+    for item in availability:
+        by_weekday.setdefault(item.weekday, []).append(item)
+
+    intervals: List[Interval] = []
+    day = start.date()
+    while day <= end.date():
+        for item in by_weekday.get(day.weekday(), ()):
+            interval_start = max(datetime.combine(day, item.start_time), start)
+            interval_end = min(datetime.combine(day, item.end_time), end)
+            if interval_start < interval_end:
+                intervals.append((interval_start, interval_end))
+        day += timedelta(days=1)
+    return merge_intervals(intervals)
+
+
+def _align(moment: datetime, step_minutes: int) -> datetime:
+    """Rounds up to the next multiple of ``step_minutes`` since midnight."""
+    moment = moment.replace(second=0, microsecond=0) + (
+        timedelta(minutes=1) if moment.second or moment.microsecond else timedelta()
+    )
+    remainder = (moment.hour * 60 + moment.minute) % step_minutes
+    return moment + timedelta(minutes=step_minutes - remainder) if remainder else moment
+
+
+class AvailabilityService:
+    @staticmethod
+    async def get_availability(db: AsyncSession, psychologist_id: int) -> List[PsychologistAvailability]:
+        """
+        Returns the weekly working hours of a psychologist.
+        """
+        result = await db.execute(
+            select(PsychologistAvailability)
+            .where(PsychologistAvailability.psychologist_id == psychologist_id)
+            .order_by(PsychologistAvailability.weekday, PsychologistAvailability.start_time)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def set_availability(
+            db: AsyncSession,
+            psychologist_id: int,
+            intervals: List[AvailabilityInterval]
+    ) -> List[PsychologistAvailability]:
+        """
+        Replaces the weekly working hours of a psychologist.
+        """
+        await db.execute(
+            delete(PsychologistAvailability).where(PsychologistAvailability.psychologist_id == psychologist_id)
+        )
+        items = [
+            PsychologistAvailability(
+                psychologist_id=psychologist_id,
+                weekday=interval.weekday,
+                start_time=interval.start_time,
+                end_time=interval.end_time
+            )
+            for interval in intervals
+        ]
+        db.add_all(items)
+        await db.commit()
+        return sorted(items, key=lambda item: (item.weekday, item.start_time))
+
+    @staticmethod
+    async def get_busy_intervals(
+            db: AsyncSession,
+            psychologist_id: int,
+            start: datetime,
+            end: datetime,
+            exclude_session_id: Optional[int] = None,
+            locking: bool = False
+    ) -> List[Interval]:
+        """
+        Returns merged intervals of the psychologist's sessions that overlap [start, end).
+        Sessions last at most SESSION_MAX_DURATION_MINUTES, which bounds the
+        (psychologist_id, starts_at) index range that has to be read.
+
+        With ``locking`` the rows are read with a locking read (FOR SHARE): under
+        REPEATABLE READ a plain SELECT would return the transaction's snapshot and
+        miss a session committed by the booking that held the lock before us.
+        """
+        query = select(Session.starts_at, Session.duration).where(
+            Session.psychologist_id == psychologist_id,
+            Session.starts_at < end,
+            Session.starts_at > start - timedelta(minutes=settings.SESSION_MAX_DURATION_MINUTES),
+            Session.status != SessionStatus.cancelled
+        )
+        if exclude_session_id is not None:
+            query = query.where(Session.id != exclude_session_id)
+        if locking:
+            query = query.with_for_update(read=True)
+
+        result = await db.execute(query)
+        return merge_intervals([
+            (row.starts_at, row.starts_at + timedelta(minutes=row.duration))
+            for row in result
+            if row.starts_at + timedelta(minutes=row.duration) > start
+        ])
+
+    @staticmethod
+    async def get_free_slots(
+            db: AsyncSession,
+            psychologist_id: int,
+            start: datetime,
+            end: datetime,
+            duration: int
+    ) -> List[dict]:
+        """
+        Returns bookable slots of ``duration`` minutes within [start, end), starting on
+        SESSION_SLOT_STEP_MINUTES boundaries, inside working hours (any time when none
+        are set, as in ensure_bookable) and not overlapping any session.
+        Costs two indexed queries regardless of the range length.
+        """
+        availability = await AvailabilityService.get_availability(db, psychologist_id)
+        working = working_intervals(availability, start, end) if availability else [(start, end)]
+        if not working:
+            return []
+
+        busy = await AvailabilityService.get_busy_intervals(db, psychologist_id, start, end)
+        busy_ends = [busy_end for _, busy_end in busy]
+        length = timedelta(minutes=duration)
+        step = settings.SESSION_SLOT_STEP_MINUTES
+
+        slots = []
+        for interval in working:
+            for free_start, free_end in subtract_intervals(interval, busy, busy_ends):
+                slot_start = _align(free_start, step)
+                while slot_start + length <= free_end:
+                    slots.append({"starts_at": slot_start, "ends_at": slot_start + length})
+                    slot_start += timedelta(minutes=step)
+        return slots
+
+    @staticmethod
+    async def ensure_bookable(
+            db: AsyncSession,
+            psychologist_id: int,
+            starts_at: datetime,
+            duration: int,
+            exclude_session_id: Optional[int] = None
+    ) -> None:
+        """
+        Raises 400/409 unless [starts_at, starts_at + duration) fits the psychologist's
+        working hours (when they are set) and overlaps no other session.
+        The caller must hold the psychologist's row lock so that concurrent
+        bookings are checked one after another; sessions are read with a locking
+        read, so bookings committed while we waited for that lock are seen.
+        """
+        if duration <= 0 or duration > settings.SESSION_MAX_DURATION_MINUTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Тривалість сесії має бути від 1 до {settings.SESSION_MAX_DURATION_MINUTES} хвилин"
+            )
+        ends_at = starts_at + timedelta(minutes=duration)
+
+        availability = await AvailabilityService.get_availability(db, psychologist_id)
+        if availability:
+            working = working_intervals(availability, starts_at, ends_at)
+            if not any(start <= starts_at and ends_at <= end for start, end in working):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Обраний час поза робочими годинами психолога"
+                )
+
+        busy = await AvailabilityService.get_busy_intervals(
+            db, psychologist_id, starts_at, ends_at, exclude_session_id=exclude_session_id, locking=True
+        )
+        if busy:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Цей час уже заброньовано"
+            )
@@ -0,0 +1,221 @@
+import asyncio
+import glob
+import hashlib
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+from app.db.locks import named_lock
+from app.db.sessions import async_engine
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: without it only the originals are stored
+    Image = None
+
+AVATAR_DIR = os.path.join("static", "avatars")
+AVATAR_URL_PREFIX = "/static/avatars/"
+CHUNK_SIZE = 64 * 1024
+# Межа всього multipart-запиту з аватаром: сам файл плюс заголовки частин і межі
+AVATAR_MAX_REQUEST_BYTES = settings.AVATAR_MAX_BYTES + 64 * 1024
+
+ALLOWED_TYPES = {
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/png": "png",
+}
+
+# Аватари, збережені за хешем вмісту: <sha256>.<ext>, мініатюри: <sha256>_<size>.jpg
+_HASHED_NAME = re.compile(r"^([0-9a-f]{64})\.(jpg|png)$")
+
+_thumbnail_executor = ThreadPoolExecutor(
+    max_workers=settings.AVATAR_THUMBNAIL_WORKERS,
+    thread_name_prefix="avatar-thumbnails"
+)
+
+
+def _thumbnail_name(digest: str, size: int) -> str:
+    return f"{digest}_{size}.jpg"
+
+
+def _make_thumbnails(path: str, digest: str) -> Tuple[int, ...]:
+    """
+    Generates every configured thumbnail size that is missing; runs in the thumbnail pool.
+    Returns the sizes available afterwards.
+    """
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        for size in settings.AVATAR_THUMBNAIL_SIZES:
+            thumbnail_path = os.path.join(AVATAR_DIR, _thumbnail_name(digest, size))
+            if os.path.exists(thumbnail_path):
+                continue
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            tmp_path = f"{thumbnail_path}.{uuid.uuid4().hex}.part"
+            thumbnail.save(tmp_path, "JPEG", quality=85, optimize=True)
+            os.replace(tmp_path, thumbnail_path)
+    return tuple(sorted(settings.AVATAR_THUMBNAIL_SIZES))
+
+
+class StagedAvatar(NamedTuple):
+    """An upload written to a temporary file, not yet under its content-addressed name"""
+    tmp_path: str
+    digest: str
+    extension: str
+
+    @property
+    def filename(self) -> str:
+        return f"{self.digest}.{self.extension}"
+
+    @property
+    def url(self) -> str:
+        return f"{AVATAR_URL_PREFIX}{self.filename}"
+
+
+async def receive_avatar(avatar: UploadFile) -> StagedAvatar:
+    """
+    Streams the upload to a temporary file in chunks, enforcing AVATAR_MAX_BYTES,
+    and hashes it. The request body as a whole is capped by BodySizeLimitMiddleware
+    before it is parsed (AVATAR_MAX_REQUEST_BYTES).
+    """
+    extension = ALLOWED_TYPES.get(avatar.content_type)
+    if not extension:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Дозволені лише файли формату JPEG, JPG або PNG"
+        )
+
+    os.makedirs(AVATAR_DIR, exist_ok=True)
+    tmp_path = os.path.join(AVATAR_DIR, f".upload-{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out_file:
+            while chunk := await avatar.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.AVATAR_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Розмір аватара не може перевищувати {settings.AVATAR_MAX_BYTES // 1024} КБ"
+                    )
+                digest.update(chunk)
+                await out_file.write(chunk)
+    except BaseException:
+        discard_staged_avatar(tmp_path)
+        raise
+
+    return StagedAvatar(tmp_path, digest.hexdigest(), extension)
+
+
+def discard_staged_avatar(tmp_path: str) -> None:
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+def avatar_lock(avatar_url: str):
+    """
+    Cross-worker lock of one avatar file. Placing a file and committing the user row
+    that references it, and checking that nobody references a file and deleting it,
+    both run under this lock, so a file is never deleted between another upload
+    reusing it and that upload's commit.
+    """
+    return named_lock(async_engine, f"avatar:{os.path.basename(avatar_url)}")
+
+
+async def place_avatar(staged: StagedAvatar) -> Optional[str]:
+    """
+    Moves a staged upload to its content-addressed name (identical images are kept
+    once) and generates the missing thumbnails. Call under ``avatar_lock(staged.url)``.
+    Returns the available thumbnail sizes, to be stored with the avatar URL
+    (``User.avatar_thumbnail_sizes``), or None if there are none.
+    """
+    file_path = os.path.join(AVATAR_DIR, staged.filename)
+    if os.path.exists(file_path):
+        discard_staged_avatar(staged.tmp_path)
+    else:
+        os.replace(staged.tmp_path, file_path)
+
+    if Image is None or not settings.AVATAR_THUMBNAIL_SIZES:
+        return None
+    try:
+        sizes = await asyncio.get_running_loop().run_in_executor(
+            _thumbnail_executor, _make_thumbnails, file_path, staged.digest
+        )
+    except Exception as e:
+        print(f"Error generating thumbnails for {staged.filename}: {e}")
+        return None
+    return ",".join(map(str, sizes))
+
+
+def delete_avatar_files(avatar_url: Optional[str]) -> None:
+    """Removes an avatar that is no longer referenced, with all its thumbnails."""
+    if not avatar_url or not avatar_url.startswith(AVATAR_URL_PREFIX):
+        return
+
+    filename = os.path.basename(avatar_url)
+    stem = os.path.splitext(filename)[0]
+    paths = [os.path.join(AVATAR_DIR, filename)]
+    paths.extend(glob.glob(os.path.join(AVATAR_DIR, glob.escape(stem) + "_*.jpg")))
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def cleanup_partial_uploads() -> None:
+    """Deletes temporary files left behind by interrupted uploads; call on startup."""
+    for path in glob.glob(os.path.join(AVATAR_DIR, ".upload-*.part")):
+        os.remove(path)
+
+
+def existing_thumbnail_sizes(avatar_url: Optional[str]) -> Optional[str]:
+    """
+    Thumbnail sizes found on disk for an avatar, in the ``User.avatar_thumbnail_sizes``
+    format. Only for backfilling avatars stored before the sizes were recorded.
+    """
+    if not avatar_url or not avatar_url.startswith(AVATAR_URL_PREFIX):
+        return None
+    match = _HASHED_NAME.match(os.path.basename(avatar_url))
+    if not match:
+        return None
+    sizes = [
+        size for size in sorted(settings.AVATAR_THUMBNAIL_SIZES)
+        if os.path.isfile(os.path.join(AVATAR_DIR, _thumbnail_name(match.group(1), size)))
+    ]
+    return ",".join(map(str, sizes)) or None
+
+
+def avatar_thumbnail_url(
+        avatar_url: Optional[str],
+        thumbnail_sizes: Optional[str],
+        size: Optional[int] = None
+) -> Optional[str]:
+    """
+    URL of the avatar thumbnail closest to ``size`` (the smallest one by default).
+    ``thumbnail_sizes`` are the sizes recorded when the avatar was stored
+    (``User.avatar_thumbnail_sizes``), so no file is checked here. Falls back to the
+    original for avatars that have no thumbnails.
+    """
+    if not avatar_url or not thumbnail_sizes:
+        return avatar_url
+
+    match = _HASHED_NAME.match(os.path.basename(avatar_url))
+    if not match:
+        return avatar_url
+
+    sizes = sorted(int(s) for s in thumbnail_sizes.split(","))
+    if size is None:
+        chosen = sizes[0]
+    else:
+        chosen = next((s for s in sizes if s >= size), sizes[-1])
+    return f"{AVATAR_URL_PREFIX}{_thumbnail_name(match.group(1), chosen)}"
@@ -1,14 +1,40 @@
-from typing import List, Optional, Dict, Any
+from collections import Counter
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 
+from sqlalchemy import and_, or_, case, func, update, insert, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 
+from app.core.config import settings
 from app.models.chat import Chat
+from app.models.chat_read_state import ChatReadState
 from app.models.message import Message
 from app.models.user import User
 from app.schemas.chat import ChatCreate
 from app.schemas.messages import MessageCreate
+from app.services.avatar_storage import avatar_thumbnail_url
+from app.utils.cache import TTLCache
+
+
+class ChatParticipants(NamedTuple):
+    student_id: int
+    psychologist_id: int
+
+    def includes(self, user_id: int) -> bool:
+        return user_id == self.student_id or user_id == self.psychologist_id
+
+    def other(self, user_id: int) -> int:
+        """Returns the participant on the other side of the chat."""
+        return self.psychologist_id if user_id == self.student_id else self.student_id
+
+
+# chat_id -> ChatParticipants; membership never changes after create_chat
+chat_participants_cache = TTLCache(
+    maxsize=settings.CHAT_MEMBERSHIP_CACHE_SIZE,
+    ttl=settings.CHAT_MEMBERSHIP_CACHE_TTL
+)
 
 
 class ChatService:
@@ -21,6 +47,7 @@ class ChatService:
         db.add(chat)
         await db.commit()
         await db.refresh(chat)
+        chat_participants_cache.set(chat.id, ChatParticipants(chat.student_id, chat.psychologist_id))
         return chat
 
     @staticmethod
@@ -31,34 +58,89 @@ class ChatService:
         result = await db.execute(select(Chat).where(Chat.id == chat_id))
         return result.scalars().first()
 
+    @staticmethod
+    async def get_chat_participants(db: AsyncSession, chat_id: int) -> Optional[ChatParticipants]:
+        """
+        Returns the student and psychologist of a chat, served from the in-process
+        membership cache when possible. Missing chats are not cached.
+        """
+        participants = chat_participants_cache.get(chat_id)
+        if participants is not None:
+            return participants
+
+        result = await db.execute(
+            select(Chat.student_id, Chat.psychologist_id).where(Chat.id == chat_id)
+        )
+        row = result.first()
+        if not row:
+            return None
+
+        participants = ChatParticipants(row.student_id, row.psychologist_id)
+        chat_participants_cache.set(chat_id, participants)
+        return participants
+
+    @staticmethod
+    def invalidate_chat_participants(chat_id: Optional[int] = None) -> None:
+        """
+        Drops a chat (or, without chat_id, every chat) from the membership cache.
+        Must be called by anything that deletes a chat or changes its participants.
+        """
+        if chat_id is None:
+            chat_participants_cache.clear()
+        else:
+            chat_participants_cache.invalidate(chat_id)
+
     @staticmethod
     async def list_chats_for_user(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
         """
         Returns all chats where the user is either the student or the psychologist,
         along with the last message for each chat and information about the other participant.
+        Everything is fetched in a single query; chats are sorted by recent activity.
         """
-        # Отримуємо всі чати користувача
-        result = await db.execute(
-            select(Chat).where(
-                (Chat.student_id == user_id) | (Chat.psychologist_id == user_id)
-            ).order_by(Chat.created_at)
+        # ID співрозмовника: студент для психолога і навпаки
+        participant_id = case(
+            (Chat.psychologist_id == user_id, Chat.student_id),
+            else_=Chat.psychologist_id
+        )
+        query = (
+            select(
+                Chat,
+                Message,
+                User.id.label("participant_id"),
+                User.first_name,
+                User.last_name,
+                User.avatar_url,
+                User.avatar_thumbnail_sizes,
+                ChatReadState.unread_count,
+                ChatReadState.last_read_message_id
+            )
+            .outerjoin(Message, Message.id == Chat.last_message_id)
+            .outerjoin(User, User.id == participant_id)
+            .outerjoin(
+                ChatReadState,
+                (ChatReadState.chat_id == Chat.id) & (ChatReadState.user_id == user_id)
+            )
+            .where((Chat.student_id == user_id) | (Chat.psychologist_id == user_id))
+            .order_by(func.coalesce(Chat.last_message_at, Chat.created_at).desc(), Chat.id.desc())
         )
-        chats = result.scalars().all()
-        
-        # Для кожного чату отримуємо останнє повідомлення та інформацію про співрозмовника
+        result = await db.execute(query)
+
         chat_dicts = []
-        for chat in chats:
+        for row in result:
+            chat = row.Chat
+            last_message = row.Message
             chat_dict = {
                 "id": chat.id,
                 "student_id": chat.student_id,
                 "psychologist_id": chat.psychologist_id,
                 "created_at": chat.created_at,
+                "last_message_at": chat.last_message_at,
                 "last_message": None,
+                "unread_count": row.unread_count or 0,
+                "last_read_message_id": row.last_read_message_id,
                 "participant_info": None
             }
-            
-            # Отримуємо останнє повідомлення для чату
-            last_message = await ChatService.get_last_message(db, chat.id)
+
             if last_message:
                 chat_dict["last_message"] = {
                     "id": last_message.id,
@@ -67,64 +149,209 @@ class ChatService:
                     "text": last_message.text,
                     "created_at": last_message.created_at
                 }
-            
-            # Визначаємо ID співрозмовника
-            participant_id = chat.student_id if user_id == chat.psychologist_id else chat.psychologist_id
-            
-            # Отримуємо інформацію про співрозмовника
-            participant = await ChatService.get_user_by_id(db, participant_id)
-            if participant:
+
+            if row.participant_id:
                 chat_dict["participant_info"] = {
-                    "id": participant.id,
-                    "first_name": participant.first_name,
-                    "last_name": participant.last_name,
-                    "avatar_url": participant.avatar_url
+                    "id": row.participant_id,
+                    "first_name": row.first_name,
+                    "last_name": row.last_name,
+                    "avatar_url": row.avatar_url,
+                    "avatar_thumbnail_url": avatar_thumbnail_url(row.avatar_url, row.avatar_thumbnail_sizes)
                 }
-            
+
             chat_dicts.append(chat_dict)
-            
+
         return chat_dicts
 
     @staticmethod
-    async def get_chat_messages(db: AsyncSession, chat_id: int) -> List[Message]:
+    async def get_chat_messages(
+            db: AsyncSession,
+            chat_id: int,
+            before_id: Optional[int] = None,
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None
+    ) -> List[Message]:
         """
-        Returns all messages for a given chat, sorted by creation time.
+        Returns a page of messages for a given chat, sorted by creation time.
+
+        Pages are addressed by a message id cursor: ``before_id`` returns the messages
+        preceding that message, ``after_id`` the ones following it, and without a cursor
+        the latest page is returned. The (created_at, id) keyset is served by the
+        composite chat index, so every page costs the same regardless of chat age.
         """
+        limit = limit or settings.CHAT_MESSAGES_PAGE_SIZE
+        query = select(Message).where(Message.chat_id == chat_id)
+
+        if after_id is not None:
+            cursor_created_at = (
+                select(Message.created_at)
+                .where(Message.id == after_id, Message.chat_id == chat_id)
+                .scalar_subquery()
+            )
+            query = query.where(
+                or_(
+                    Message.created_at > cursor_created_at,
+                    and_(Message.created_at == cursor_created_at, Message.id > after_id)
+                )
+            ).order_by(Message.created_at, Message.id).limit(limit)
+            result = await db.execute(query)
+            return list(result.scalars().all())
+
+        if before_id is not None:
+            cursor_created_at = (
+                select(Message.created_at)
+                .where(Message.id == before_id, Message.chat_id == chat_id)
+                .scalar_subquery()
+            )
+            query = query.where(
+                or_(
+                    Message.created_at < cursor_created_at,
+                    and_(Message.created_at == cursor_created_at, Message.id < before_id)
+                )
+            )
+
+        # Беремо останні `limit` повідомлень і повертаємо їх у хронологічному порядку
         result = await db.execute(
-            select(Message)
-            .where(Message.chat_id == chat_id)
-            .order_by(Message.created_at)
+            query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
         )
-        return result.scalars().all()
+        messages = list(result.scalars().all())
+        messages.reverse()
+        return messages
 
     @staticmethod
-    async def get_last_message(db: AsyncSession, chat_id: int) -> Optional[Message]:
+    async def is_chat_message(db: AsyncSession, chat_id: int, message_id: int) -> bool:
         """
-        Returns the last message for a given chat.
+        Checks that a message id (e.g. a client's cursor) belongs to the chat.
         """
         result = await db.execute(
-            select(Message)
-            .where(Message.chat_id == chat_id)
-            .order_by(Message.created_at.desc())
-            .limit(1)
+            select(Message.id).where(Message.id == message_id, Message.chat_id == chat_id)
         )
-        return result.scalars().first()
-
-    @staticmethod
-    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
-        """
-        Returns user by ID.
-        """
-        result = await db.execute(select(User).where(User.id == user_id))
-        return result.scalars().first()
+        return result.first() is not None
 
     @staticmethod
     async def save_message(db: AsyncSession, msg_data: MessageCreate) -> Message:
         """
-        Saves a new message in the given chat.
+        Saves a new message in the given chat and moves the chat's last message pointer to it.
         """
         msg = Message(**msg_data.dict())
         db.add(msg)
+        await db.flush()
+
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == msg.chat_id)
+            .values(last_message_id=msg.id, last_message_at=func.now())
+        )
+        participants = await ChatService.get_chat_participants(db, msg.chat_id)
+        if participants:
+            await ChatService.increment_unread_counts(
+                db, {(msg.chat_id, participants.other(msg.sender_id)): 1}
+            )
         await db.commit()
         await db.refresh(msg)
         return msg
+
+    @staticmethod
+    async def save_messages(db: AsyncSession, msgs_data: List[MessageCreate]) -> List[Message]:
+        """
+        Saves several messages with one multi-row INSERT and one commit.
+        Returned messages are in the same order as ``msgs_data``.
+        """
+        if not msgs_data:
+            return []
+
+        result = await db.execute(insert(Message).values([msg_data.dict() for msg_data in msgs_data]))
+        # MySQL повертає лише перший ID; InnoDB видає ID такого INSERT одним блоком,
+        # і рядки перевіряються до commit, тож хибне припущення відкотить пакет
+        first_id = result.lastrowid
+        step = (await db.execute(text("SELECT @@auto_increment_increment"))).scalar() or 1
+        ids = [first_id + i * step for i in range(len(msgs_data))]
+
+        rows = await db.execute(select(Message).where(Message.id.in_(ids)))
+        messages_by_id = {msg.id: msg for msg in rows.scalars().all()}
+        messages = [messages_by_id.get(msg_id) for msg_id in ids]
+        for msg, msg_data in zip(messages, msgs_data):
+            if msg is None or msg.chat_id != msg_data.chat_id or msg.sender_id != msg_data.sender_id:
+                await db.rollback()
+                raise RuntimeError("Inserted message IDs are not consecutive, batch rolled back")
+
+        # Останнє повідомлення кожного чату в пакеті
+        last_by_chat: Dict[int, Message] = {}
+        for msg in messages:
+            last_by_chat[msg.chat_id] = msg
+        await db.execute(
+            update(Chat),
+            [
+                {"id": chat_id, "last_message_id": msg.id, "last_message_at": msg.created_at}
+                for chat_id, msg in last_by_chat.items()
+            ]
+        )
+
+        unread: Counter = Counter()
+        for msg in messages:
+            participants = await ChatService.get_chat_participants(db, msg.chat_id)
+            if participants:
+                unread[(msg.chat_id, participants.other(msg.sender_id))] += 1
+        await ChatService.increment_unread_counts(db, unread)
+
+        await db.commit()
+        return messages
+
+    @staticmethod
+    async def increment_unread_counts(db: AsyncSession, counts: Dict[Tuple[int, int], int]) -> None:
+        """
+        Adds new messages to the unread counters of (chat_id, user_id) pairs with one
+        upsert statement. Does not commit: runs inside the transaction saving the messages.
+        """
+        if not counts:
+            return
+
+        stmt = mysql_insert(ChatReadState).values([
+            {"chat_id": chat_id, "user_id": user_id, "unread_count": count}
+            for (chat_id, user_id), count in counts.items()
+        ])
+        stmt = stmt.on_duplicate_key_update(
+            unread_count=ChatReadState.unread_count + stmt.inserted.unread_count
+        )
+        await db.execute(stmt)
+
+    @staticmethod
+    async def mark_chats_read(db: AsyncSession, marks: Dict[Tuple[int, int], int]) -> None:
+        """
+        Stores read positions: (chat_id, user_id) -> last read message id.
+        The position only moves forward and never past the chat's latest message.
+        """
+        if not marks:
+            return
+
+        for (chat_id, user_id), message_id in marks.items():
+            latest_id = select(Chat.last_message_id).where(Chat.id == chat_id).scalar_subquery()
+            unread_after = (
+                select(func.count())
+                .select_from(Message)
+                .where(
+                    Message.chat_id == chat_id,
+                    Message.id > message_id,
+                    Message.sender_id != user_id
+                )
+                .scalar_subquery()
+            )
+            stmt = mysql_insert(ChatReadState).values(
+                chat_id=chat_id,
+                user_id=user_id,
+                last_read_message_id=func.least(message_id, func.coalesce(latest_id, 0)),
+                unread_count=case((func.coalesce(latest_id, 0) <= message_id, 0), else_=unread_after)
+            )
+            is_newer = stmt.inserted.last_read_message_id > func.coalesce(ChatReadState.last_read_message_id, 0)
+            # MySQL застосовує присвоєння по черзі, тому лічильник оновлюємо першим
+            stmt = stmt.on_duplicate_key_update([
+                ("unread_count", case((is_newer, stmt.inserted.unread_count), else_=ChatReadState.unread_count)),
+                ("last_read_message_id", case(
+                    (is_newer, stmt.inserted.last_read_message_id),
+                    else_=ChatReadState.last_read_message_id
+                )),
+            ])
+            await db.execute(stmt)
+
+        await db.commit()
+
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.material import Category, Material, material_category
+from app.schemas.materials import CategoryFacet, CategoryOut, MaterialListItem
+
+_materials_adapter = TypeAdapter(List[MaterialListItem])
+_categories_adapter = TypeAdapter(List[CategoryOut])
+_facets_adapter = TypeAdapter(List[CategoryFacet])
+
+# Скільки серіалізованих відповідей (фільтр + сторінка) тримати на один знімок
+_MAX_CACHED_BODIES = 256
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the whole materials catalog as list items (excerpts, no content).
+    ``etag`` is a hash of the catalog content, so every worker holding the same
+    data answers with the same ETag. Serialized response bodies are memoized per
+    snapshot and are dropped together with it.
+
+    ``category_counts`` holds the number of materials per category. It is counted
+    once on load and then carried over and adjusted by ``with_material`` /
+    ``with_category`` when the catalog grows.
+    """
+
+    def __init__(
+            self,
+            version: int,
+            materials: List[MaterialListItem],
+            categories: List[CategoryOut],
+            category_counts: Optional[Dict[int, int]] = None
+    ):
+        self.version = version
+        self.materials: Dict[int, MaterialListItem] = {material.id: material for material in materials}
+        self.categories = categories
+        self._category_ids: Dict[int, FrozenSet[int]] = {
+            material.id: frozenset(category.id for category in material.categories) for material in materials
+        }
+        if category_counts is None:
+            category_counts = dict.fromkeys((category.id for category in categories), 0)
+            for ids in self._category_ids.values():
+                for category_id in ids:
+                    category_counts[category_id] = category_counts.get(category_id, 0) + 1
+        self.category_counts = category_counts
+        self._bodies: Dict[object, Tuple[int, bytes]] = {}
+
+        digest = hashlib.sha256(_materials_adapter.dump_json(materials))
+        digest.update(_categories_adapter.dump_json(categories))
+        self.etag = f'"{digest.hexdigest()[:32]}"'
+
+    def body(self, key: object, build: Callable[[], Tuple[int, bytes]]) -> Tuple[int, bytes]:
+        """Returns the memoized (total, body) of a view, building it on first use"""
+        entry = self._bodies.get(key)
+        if entry is None:
+            if len(self._bodies) >= _MAX_CACHED_BODIES:
+                self._bodies.clear()
+            entry = self._bodies[key] = build()
+        return entry
+
+    def list_materials(self, category_ids: Iterable[int] = ()) -> List[MaterialListItem]:
+        """Materials that belong to every one of ``category_ids``, ordered by id"""
+        required = frozenset(category_ids)
+        if not required:
+            return list(self.materials.values())
+        return [
+            material for material in self.materials.values()
+            if required <= self._category_ids[material.id]
+        ]
+
+    def facet_counts(self, category_ids: Iterable[int] = ()) -> Dict[int, int]:
+        """
+        Number of materials per category among the materials matching every one of
+        ``category_ids``, i.e. how many results each category would add to the filter.
+        """
+        required = frozenset(category_ids)
+        if not required:
+            return self.category_counts
+
+        counts = dict.fromkeys(self.category_counts, 0)
+        for material in self.list_materials(required):
+            for category_id in self._category_ids[material.id]:
+                counts[category_id] += 1
+        return counts
+
+    def with_material(self, material: MaterialListItem) -> "CatalogSnapshot":
+        """A new snapshot with ``material`` added and the category counts adjusted"""
+        counts = dict(self.category_counts)
+        for category in material.categories:
+            counts[category.id] = counts.get(category.id, 0) + 1
+        materials = [m for m in self.materials.values() if m.id != material.id]
+        if material.id in self.materials:
+            for category_id in self._category_ids[material.id]:
+                counts[category_id] -= 1
+        materials.append(material)
+        materials.sort(key=lambda m: m.id)
+        return CatalogSnapshot(self.version + 1, materials, self.categories, counts)
+
+    def with_category(self, category: CategoryOut) -> "CatalogSnapshot":
+        categories = [c for c in self.categories if c.id != category.id] + [category]
+        categories.sort(key=lambda c: c.id)
+        counts = dict(self.category_counts)
+        counts.setdefault(category.id, 0)
+        return CatalogSnapshot(self.version + 1, list(self.materials.values()), categories, counts)
+
+
+class MaterialCatalog:
+    """
+    Warm in-process snapshot of materials and categories behind the /materials endpoints.
+
+    The catalog changes only through the admin create paths, which apply the new
+    material or category to the snapshot (``add_material`` / ``add_category``)
+    instead of reloading it. Changes made by
+    other workers become visible after at most ``ttl`` seconds. Article bodies are
+    never loaded here: excerpts are computed by the database.
+    """
+
+    def __init__(self, ttl: int = settings.MATERIAL_CATALOG_TTL):
+        self.ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at: Optional[float] = None
+        self._version = 0
+        self._invalidations = 0
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        if not self.is_fresh():
+            async with self._lock:
+                if not self.is_fresh():
+                    await self.rebuild(db)
+        return self._snapshot
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reloads the whole catalog from the database"""
+        # Знімок ставимо лише після завантаження, тож паралельні запити бачать попередню версію
+        version = self._version + 1
+        invalidations = self._invalidations
+
+        result = await db.execute(select(Category).order_by(Category.id))
+        categories = [CategoryOut.model_validate(category) for category in result.scalars().all()]
+        categories_by_id = {category.id: category for category in categories}
+
+        result = await db.execute(select(material_category.c.material_id, material_category.c.category_id))
+        material_categories: Dict[int, List[CategoryOut]] = {}
+        for material_id, category_id in result:
+            material_categories.setdefault(material_id, []).append(categories_by_id[category_id])
+
+        result = await db.execute(
+            select(
+                Material.id,
+                Material.title,
+                Material.type,
+                Material.image_url,
+                Material.excerpt.label("excerpt")
+            ).order_by(Material.id)
+        )
+        materials = [
+            MaterialListItem(
+                id=row.id,
+                title=row.title,
+                type=row.type,
+                image_url=row.image_url,
+                excerpt=row.excerpt,
+                categories=sorted(material_categories.get(row.id, []), key=lambda category: category.id)
+            )
+            for row in result
+        ]
+
+        self._snapshot = CatalogSnapshot(version, materials, categories)
+        self._version = version
+        # Якщо каталог змінився під час завантаження, знімок вже може бути застарілим
+        if invalidations == self._invalidations:
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        self._invalidations += 1
+        self._loaded_at = None
+
+    def add_material(self, material: MaterialListItem) -> None:
+        """Applies a created material to the current snapshot without reloading it"""
+        if self._snapshot is None or self._lock.locked():
+            # Завантаження, що триває, могло не побачити новий матеріал
+            self.invalidate()
+            return
+        self._snapshot = self._snapshot.with_material(material)
+        self._version = self._snapshot.version
+
+    def add_category(self, category: CategoryOut) -> None:
+        """Applies a created category to the current snapshot without reloading it"""
+        if self._snapshot is None or self._lock.locked():
+            self.invalidate()
+            return
+        self._snapshot = self._snapshot.with_category(category)
+        self._version = self._snapshot.version
+
+
+def materials_json(materials: List[MaterialListItem]) -> bytes:
+    return _materials_adapter.dump_json(materials)
+
+
+def category_facets_json(snapshot: CatalogSnapshot, category_ids: Iterable[int] = ()) -> bytes:
+    counts = snapshot.facet_counts(category_ids)
+    return _facets_adapter.dump_json([
+        CategoryFacet(
+            **category.model_dump(),
+            material_count=snapshot.category_counts.get(category.id, 0),
+            matching_count=counts.get(category.id, 0)
+        )
+        for category in snapshot.categories
+    ])
+
+
+material_catalog = MaterialCatalog()
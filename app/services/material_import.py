@@ -0,0 +1,220 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.material import Category, Material, material_category
+from app.schemas.materials import CategoryImportRow, ImportReport, ImportRowError, MaterialImportRow
+
+# (номер рядка, запис) або (номер рядка, текст помилки розбору)
+Record = Tuple[int, object]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Splits a stream of UTF-8 byte chunks into lines (line endings kept)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        # Ділимо лише по \n: JSON-рядки можуть містити інші символи розриву рядка
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_ndjson(lines: AsyncIterable[str]) -> AsyncIterator[Record]:
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, f"Invalid JSON: {e.msg}"
+
+
+async def iter_csv(lines: AsyncIterable[str]) -> AsyncIterator[Record]:
+    """
+    Parses CSV with a header row (title, content, type, image_url, categories).
+    A quoted field may span several lines; a record is complete once its quotes are balanced.
+    """
+    header: Optional[List[str]] = None
+    record, record_line, line_no = "", 0, 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            record_line = line_no
+        record += line
+        if record.count('"') % 2:
+            continue
+
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield record_line, dict(zip(header, values))
+
+    if record:
+        yield record_line, "Unterminated quoted field"
+
+
+class MaterialImporter:
+    """
+    Bulk import of materials (and optionally categories) from a stream of records.
+
+    Categories are resolved by slug from one lookup of the whole categories table;
+    records with ``slug`` and ``name`` but no ``title`` create or update a category.
+    Materials are inserted ``batch_size`` at a time with one multi-row INSERT for the
+    materials, one for their ``material_category`` links and one commit per batch.
+    Invalid records are reported with their line number and skipped; if a batch is
+    rejected by the database, its rows are retried one by one to find the bad ones.
+    """
+
+    def __init__(
+            self,
+            db: AsyncSession,
+            author_id: Optional[int] = None,
+            batch_size: int = settings.MATERIAL_IMPORT_BATCH_SIZE,
+            max_errors: int = settings.MATERIAL_IMPORT_MAX_ERRORS
+    ):
+        self.db = db
+        self.author_id = author_id
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.report = ImportReport()
+        self._category_ids: Dict[str, int] = {}
+        self._batch: List[Tuple[int, MaterialImportRow, List[int]]] = []
+
+    def _error(self, line: int, error: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(ImportRowError(line=line, error=error))
+
+    async def run(self, records: AsyncIterable[Record]) -> ImportReport:
+        result = await self.db.execute(select(Category.slug, Category.id))
+        self._category_ids = dict(result.all())
+
+        async for line, record in records:
+            if isinstance(record, str):
+                self._error(line, record)
+            elif not isinstance(record, dict):
+                self._error(line, "Record must be an object")
+            elif "title" not in record and "slug" in record:
+                await self._import_category(line, record)
+            else:
+                self._add_material(line, record)
+                if len(self._batch) >= self.batch_size:
+                    await self._flush()
+        await self._flush()
+        return self.report
+
+    async def _import_category(self, line: int, record: dict) -> None:
+        try:
+            row = CategoryImportRow(**record)
+        except ValidationError as e:
+            self._error(line, _validation_message(e))
+            return
+
+        # Категорія має бути в базі раніше за матеріали, що на неї посилаються
+        await self._flush()
+        values = row.dict()
+        try:
+            await self.db.execute(
+                mysql_insert(Category).values(**values)
+                .on_duplicate_key_update(name=values["name"], description=values["description"])
+            )
+            category_id = (await self.db.execute(select(Category.id).where(Category.slug == row.slug))).scalar_one()
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            self._error(line, f"Category was not saved: {e}")
+            return
+        self._category_ids[row.slug] = category_id
+        self.report.categories += 1
+
+    def _add_material(self, line: int, record: dict) -> None:
+        try:
+            row = MaterialImportRow(**record)
+        except ValidationError as e:
+            self._error(line, _validation_message(e))
+            return
+
+        unknown = [slug for slug in row.categories if slug not in self._category_ids]
+        if unknown:
+            self._error(line, f"Unknown categories: {', '.join(unknown)}")
+            return
+        category_ids = list(dict.fromkeys(self._category_ids[slug] for slug in row.categories))
+        self._batch.append((line, row, category_ids))
+
+    async def _flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        try:
+            await self._insert(batch)
+        except Exception:
+            await self.db.rollback()
+            for item in batch:
+                try:
+                    await self._insert([item])
+                except Exception as e:
+                    await self.db.rollback()
+                    self._error(item[0], f"Material was not saved: {e}")
+
+    async def _insert(self, batch: List[Tuple[int, MaterialImportRow, List[int]]]) -> None:
+        """
+        Inserts one batch in one transaction.
+        As in ChatService.save_messages, the IDs of a multi-row INSERT are derived from
+        the first one and checked against the titles before committing.
+        """
+        result = await self.db.execute(insert(Material).values([
+            {
+                "title": row.title,
+                "content": row.content,
+                "type": row.type,
+                "image_url": row.image_url,
+                "author_id": self.author_id
+            }
+            for _, row, _ in batch
+        ]))
+        first_id = result.lastrowid
+        step = (await self.db.execute(text("SELECT @@auto_increment_increment"))).scalar() or 1
+        ids = [first_id + i * step for i in range(len(batch))]
+
+        rows = await self.db.execute(select(Material.id, Material.title).where(Material.id.in_(ids)))
+        titles = dict(rows.all())
+        if any(titles.get(material_id) != row.title for material_id, (_, row, _) in zip(ids, batch)):
+            raise RuntimeError("Inserted material IDs are not consecutive")
+
+        links = [
+            {"material_id": material_id, "category_id": category_id}
+            for material_id, (_, _, category_ids) in zip(ids, batch)
+            for category_id in category_ids
+        ]
+        if links:
+            await self.db.execute(insert(material_category).values(links))
+        await self.db.commit()
+        self.report.imported += len(batch)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
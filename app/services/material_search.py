@@ -0,0 +1,310 @@
+import asyncio
+import heapq
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.sessions import AsyncSessionLocal
+from app.models.material import Material
+
+_TOKEN_RE = re.compile(r"\w+")
+# Апостроф усередині слова (м'який, п’ять) не розриває його
+_APOSTROPHES = str.maketrans("", "", "'’ʼ`")
+
+_STOP_WORDS = frozenset({
+    "і", "й", "та", "а", "але", "або", "чи", "що", "як", "це", "не", "ні", "у", "в", "на", "з", "із", "зі",
+    "до", "від", "для", "по", "про", "при", "за", "під", "над", "без", "через", "так", "же", "ж", "би", "б",
+    "ще", "вже", "його", "її", "їх", "ми", "ви", "ти", "я", "він", "вона", "воно", "вони", "цей", "ця", "ці",
+    "the", "and", "or", "of", "to", "in", "on", "a", "an", "is", "for", "with",
+})
+
+# Найуживаніші закінчення українських іменників, прикметників і дієслів
+_SUFFIXES = frozenset({
+    "ість", "ості", "істю", "остей", "остям", "остями", "остях",
+    "ами", "ями", "ові", "еві", "ого", "ому", "ими", "ій", "их", "ім", "ою", "ею", "ом", "ем", "ах", "ях",
+    "ів", "ей", "ий", "ої", "ая", "ую", "ться", "ся", "ла", "ли", "ло",
+    "а", "я", "и", "і", "у", "ю", "е", "о", "ь", "ї", "й",
+})
+_MAX_SUFFIX = max(map(len, _SUFFIXES))
+_MIN_STEM = 3
+
+
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    """Light suffix stripping (longest ending first) so that inflected forms of a word share one term"""
+    for size in range(min(_MAX_SUFFIX, len(word) - _MIN_STEM), 0, -1):
+        if word[-size:] in _SUFFIXES:
+            return word[:-size]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    words = _TOKEN_RE.findall(text.casefold().translate(_APOSTROPHES))
+    return [stem(word) for word in words if word not in _STOP_WORDS]
+
+
+class _Postings:
+    """
+    Postings of one term: material ids in ascending order with their term frequencies
+    in parallel arrays, plus the largest frequency and the shortest document among them
+    for the term's score upper bound.
+    """
+    __slots__ = ("ids", "frequencies", "max_frequency", "min_length")
+
+    def __init__(self):
+        self.ids = array("I")
+        self.frequencies = array("I")
+        self.max_frequency = 0
+        self.min_length = 0
+
+    def add(self, material_id: int, frequency: int, length: int) -> None:
+        ids = self.ids
+        if ids and ids[-1] > material_id:
+            position = bisect_left(ids, material_id)
+            ids.insert(position, material_id)
+            self.frequencies.insert(position, frequency)
+        else:
+            ids.append(material_id)
+            self.frequencies.append(frequency)
+        self.max_frequency = max(self.max_frequency, frequency)
+        self.min_length = min(self.min_length, length) if len(ids) > 1 else length
+
+
+class MaterialSearchIndex:
+    """
+    In-process inverted index over material titles and contents with BM25 ranking.
+
+    The index is built at startup and extended by ``add`` when a material is created.
+    Materials are never edited or deleted through the API, so other workers' additions
+    are picked up by ``catch_up``, which loads only materials past the last id it has
+    read, at most every ``refresh_interval`` seconds.
+    Title terms are counted ``title_weight`` times.
+
+    ``add`` and ``search`` are CPU-bound and not thread-safe: the event loop calls them
+    only through ``add_async`` / ``search_async``, which run them one at a time on the
+    index's own thread.
+    """
+
+    def __init__(
+            self,
+            refresh_interval: int = settings.MATERIAL_SEARCH_REFRESH_SECONDS,
+            batch_size: int = 200,
+            title_weight: int = 3,
+            k1: float = 1.2,
+            b: float = 0.75
+    ):
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.title_weight = title_weight
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, _Postings] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._max_id = 0
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._background: Set[asyncio.Task] = set()
+        # Побудова й пошук - чистий Python, тож потік не звільняє GIL сам, але інтерпретатор
+        # перемикається на event loop кожні sys.getswitchinterval() (5 мс), і цикл не стоїть
+        # на весь запит. Один потік: індекс змінюється й читається лише з нього.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="material-search")
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, material_id: int, title: str, content: str) -> None:
+        if material_id in self._lengths:
+            return
+        terms = Counter(tokenize(content))
+        for term in tokenize(title):
+            terms[term] += self.title_weight
+
+        length = sum(terms.values())
+        postings = self._postings
+        for term, frequency in terms.items():
+            term_postings = postings.get(term)
+            if term_postings is None:
+                term_postings = postings[term] = _Postings()
+            term_postings.add(material_id, frequency, length)
+        self._lengths[material_id] = length
+        self._total_length += length
+
+    def _add_rows(self, rows: Sequence) -> None:
+        for row in rows:
+            self.add(row.id, row.title, row.content)
+
+    async def _run(self, func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def add_async(self, material_id: int, title: str, content: str) -> None:
+        """add on the index thread"""
+        await self._run(self.add, material_id, title, content)
+
+    async def search_async(
+            self, query: str, offset: int = 0, limit: int = settings.MATERIALS_PAGE_SIZE
+    ) -> Tuple[int, List[Tuple[int, float]]]:
+        """search on the index thread"""
+        return await self._run(self.search, query, offset, limit)
+
+    async def ensure_current(self, db: AsyncSession) -> None:
+        # Поки індекс будується (або доганяє), пошук працює з уже проіндексованою частиною
+        if self._lock.locked():
+            return
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        async with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at >= self.refresh_interval:
+                await self.catch_up(db)
+
+    async def catch_up(self, db: AsyncSession) -> int:
+        """
+        Indexes materials with ids above the last one read, ``batch_size`` rows
+        per query, so only one batch of article bodies is held in memory at a time.
+        Callers hold ``_lock``; use ``ensure_current`` or ``build``.
+        """
+        added = 0
+        while True:
+            result = await db.execute(
+                select(Material.id, Material.title, Material.content)
+                .where(Material.id > self._max_id)
+                .order_by(Material.id)
+                .limit(self.batch_size)
+            )
+            rows = result.all()
+            await self._run(self._add_rows, rows)
+            added += len(rows)
+            if rows:
+                # Курсор рухає лише catch_up: матеріали, додані через add(), можуть мати більший
+                # id, ніж ще не підтягнуті матеріали інших воркерів
+                self._max_id = rows[-1].id
+            if len(rows) < self.batch_size:
+                break
+
+        self._checked_at = time.monotonic()
+        return added
+
+    async def build(self, db: AsyncSession) -> None:
+        """Loads all not yet indexed materials; searches meanwhile use the partial index"""
+        async with self._lock:
+            started = time.perf_counter()
+            added = await self.catch_up(db)
+            print(f"Material search index: {added} materials in {time.perf_counter() - started:.1f}s")
+
+    def refresh_in_background(self) -> asyncio.Task:
+        """Runs ``build`` as a task: at startup and after bulk imports"""
+
+        async def refresh():
+            async with AsyncSessionLocal() as db:
+                await self.build(db)
+
+        task = asyncio.create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def close(self) -> None:
+        """Drops queued index jobs and stops the index thread"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def search(self, query: str, offset: int = 0, limit: int = settings.MATERIALS_PAGE_SIZE) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        Returns the number of matching materials and the requested page of
+        (material_id, score) pairs, best match first.
+
+        Top-k pruning (MaxScore): terms are scored in order of their score upper bound.
+        Once the bounds of the remaining terms add up to less than the current k-th
+        best score, no unseen material can reach the page, so the remaining terms only
+        update the materials that still can.
+        """
+        terms = [self._postings[term] for term in set(tokenize(query)) if term in self._postings]
+        if not terms:
+            return 0, []
+
+        k1, b = self.k1, self.b
+        documents = len(self._lengths)
+        average_length = self._total_length / documents
+        wanted = offset + limit
+
+        ranked = []
+        for postings in terms:
+            idf = math.log(1 + (documents - len(postings.ids) + 0.5) / (len(postings.ids) + 0.5))
+            norm = k1 * (1 - b + b * postings.min_length / average_length)
+            # Запас на похибку округлення, щоб межа не опинилась нижчою за реальну оцінку
+            bound = idf * postings.max_frequency * (k1 + 1) / (postings.max_frequency + norm) * (1 + 1e-9)
+            ranked.append((bound, idf, postings))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        remaining = list(accumulate((bound for bound, _, _ in reversed(ranked)), initial=0.0))[::-1]
+
+        if len(ranked) == 1:
+            total = len(ranked[0][2].ids)
+        else:
+            total = len(set().union(*(postings.ids for _, _, postings in ranked)))
+
+        scores: Dict[int, float] = {}
+        threshold = 0.0
+        lengths = self._lengths
+        base, slope = k1 * (1 - b), k1 * b / average_length
+        for position, (_, idf, postings) in enumerate(ranked):
+            if len(scores) >= wanted and remaining[position] < threshold:
+                break
+            weight = idf * (k1 + 1)
+            if not scores:
+                scores = {
+                    material_id: weight * frequency / (frequency + base + slope * lengths[material_id])
+                    for material_id, frequency in zip(postings.ids, postings.frequencies)
+                }
+            else:
+                get = scores.get
+                for material_id, frequency in zip(postings.ids, postings.frequencies):
+                    scores[material_id] = get(material_id, 0.0) + (
+                        weight * frequency / (frequency + base + slope * lengths[material_id])
+                    )
+            if len(scores) >= wanted:
+                threshold = heapq.nlargest(wanted, scores.values())[-1]
+        else:
+            position = len(ranked)
+
+        for position in range(position, len(ranked)):
+            _, idf, postings = ranked[position]
+            ids, frequencies = postings.ids, postings.frequencies
+            weight = idf * (k1 + 1)
+            candidates = [
+                material_id for material_id, score in scores.items()
+                if score + remaining[position] >= threshold
+            ]
+            if len(candidates) * 16 > len(ids):
+                candidate_set = set(candidates)
+                matches = (
+                    (material_id, frequency) for material_id, frequency in zip(ids, frequencies)
+                    if material_id in candidate_set
+                )
+            else:
+                matches = []
+                for material_id in candidates:
+                    found = bisect_left(ids, material_id)
+                    if found < len(ids) and ids[found] == material_id:
+                        matches.append((material_id, frequencies[found]))
+            for material_id, frequency in matches:
+                scores[material_id] += weight * frequency / (frequency + base + slope * lengths[material_id])
+            threshold = heapq.nlargest(wanted, scores.values())[-1]
+
+        if len(scores) > wanted:
+            cutoff = heapq.nlargest(wanted, scores.values())[-1]
+            scores = {material_id: score for material_id, score in scores.items() if score >= cutoff}
+        top = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:wanted]
+        return total, top[offset:]
+
+
+material_search = MaterialSearchIndex()
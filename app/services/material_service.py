@@ -4,20 +4,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.material import Material, Category
-from app.schemas.materials import MaterialCreate
+from app.schemas.materials import CategoryOut, MaterialCreate, MaterialListItem
+from app.services.material_catalog import material_catalog
+from app.services.material_search import material_search
 
 class MaterialService:
-    @staticmethod
-    async def get_all_materials(db: AsyncSession, category_id: Optional[int] = None):
-        """Get all materials, optionally filtered by category"""
-        query = select(Material).options(selectinload(Material.categories))
-        
-        if category_id:
-            query = query.join(Material.categories).filter(Category.id == category_id)
-            
-        result = await db.execute(query)
-        return result.scalars().all()
-
     @staticmethod
     async def get_material_by_id(db: AsyncSession, material_id: int):
         """Get a material by ID"""
@@ -40,16 +31,18 @@ class MaterialService:
         
         db.add(material)
         await db.commit()
+        material_catalog.add_material(MaterialListItem(
+            id=material.id,
+            title=material.title,
+            type=material.type,
+            image_url=material.image_url,
+            excerpt=material.excerpt,
+            categories=sorted((CategoryOut.model_validate(category) for category in categories), key=lambda c: c.id)
+        ))
+        await material_search.add_async(material.id, material.title, material.content)
         await db.refresh(material)
         return material
 
-    @staticmethod
-    async def get_all_categories(db: AsyncSession):
-        """Get all categories"""
-        query = select(Category)
-        result = await db.execute(query)
-        return result.scalars().all()
-
     @staticmethod
     async def create_category(db: AsyncSession, name: str, description: Optional[str] = None):
         """Create a new category"""
@@ -57,4 +50,5 @@ class MaterialService:
         db.add(category)
         await db.commit()
         await db.refresh(category)
+        material_catalog.add_category(CategoryOut.model_validate(category))
         return category 
\ No newline at end of file
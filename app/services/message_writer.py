@@ -0,0 +1,91 @@
+import asyncio
+from typing import Callable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.db.sessions import AsyncSessionLocal
+from app.models.message import Message
+from app.schemas.messages import MessageCreate
+from app.services.chat_service import ChatService
+
+
+class MessageBatchWriter:
+    """
+    Group-commit write path for chat messages (enabled with CHAT_BATCH_WRITES).
+
+    Messages submitted within ``window_ms`` of the first pending one, up to
+    ``max_batch`` of them, are stored by ChatService.save_messages with one multi-row
+    INSERT and one COMMIT. Batches are flushed one at a time, in submission order.
+
+    Durability semantics:
+    * ``submit`` returns only after the transaction containing the message has been
+      committed, so a ``message_sent`` ack is never sent for a message that is not
+      durably stored;
+    * a batch is all-or-nothing: if it fails, every submitter in it gets the exception,
+      nothing is acked and the clients are expected to resend;
+    * a message waits in memory for at most ``window_ms`` before its batch is written.
+      If the process is killed during that time the message is lost, but it has not been
+      acked either. ``close`` flushes the buffer on a graceful shutdown.
+    """
+
+    def __init__(
+            self,
+            window_ms: int = settings.CHAT_BATCH_WINDOW_MS,
+            max_batch: int = settings.CHAT_BATCH_MAX_SIZE,
+            session_factory: Callable = AsyncSessionLocal
+    ):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._session_factory = session_factory
+        self._pending: List[Tuple[MessageCreate, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, msg_data: MessageCreate) -> Message:
+        """Queues a message and waits until the batch containing it is committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((msg_data, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[MessageCreate, asyncio.Future]]) -> None:
+        async with self._flush_lock:
+            try:
+                async with self._session_factory() as db:
+                    messages = await ChatService.save_messages(db, [msg_data for msg_data, _ in batch])
+            except Exception as e:
+                print(f"Error saving a batch of {len(batch)} messages: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), msg in zip(batch, messages):
+                if not future.done():
+                    future.set_result(msg)
+
+    async def close(self) -> None:
+        """Writes out everything still buffered; call on shutdown."""
+        self._start_flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+message_writer = MessageBatchWriter()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.schemas.users import UserOut
+
+
+class PsychologistDirectory:
+    """
+    Warm in-process index of psychologist profiles behind GET /users/psychologists.
+
+    Profiles are loaded once (at startup or on first use) and then kept up to date
+    by UserService through ``upsert``; filtering, sorting and pagination run in
+    memory. Changes made by other workers become visible after at most ``ttl``
+    seconds, when the index is reloaded.
+    """
+
+    def __init__(self, ttl: int = settings.PSYCHOLOGIST_DIRECTORY_TTL):
+        self.ttl = ttl
+        self._profiles: Dict[int, UserOut] = {}
+        self._order: Dict[Tuple[str, bool], List[int]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self.is_fresh():
+            return
+        async with self._lock:
+            if not self.is_fresh():
+                await self.rebuild(db)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """Reloads every psychologist from the database"""
+        result = await db.execute(select(User).where(User.role == UserRole.psychologist))
+        self._profiles = {user.id: UserOut.model_validate(user) for user in result.scalars().all()}
+        self._order.clear()
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, user: User) -> None:
+        """Applies a created or updated user to the index"""
+        if self._loaded_at is None:
+            return
+        if user.role == UserRole.psychologist:
+            self._profiles[user.id] = UserOut.model_validate(user)
+        elif self._profiles.pop(user.id, None) is None:
+            return
+        self._order.clear()
+
+    def _sorted_ids(self, sort_by: str, descending: bool) -> List[int]:
+        key = (sort_by, descending)
+        order = self._order.get(key)
+        if order is None:
+            if sort_by == "experience_years":
+                sort_key = lambda p: (p.experience_years or 0, p.last_name, p.first_name, p.id)
+            else:
+                sort_key = lambda p: (getattr(p, sort_by).casefold(), p.id)
+            order = [p.id for p in sorted(self._profiles.values(), key=sort_key, reverse=descending)]
+            self._order[key] = order
+        return order
+
+    def search(
+            self,
+            specialization: Optional[str] = None,
+            min_experience: Optional[float] = None,
+            max_experience: Optional[float] = None,
+            sort_by: str = "last_name",
+            descending: bool = False,
+            offset: int = 0,
+            limit: int = settings.PSYCHOLOGISTS_PAGE_SIZE
+    ) -> Tuple[int, List[UserOut]]:
+        """
+        Returns the total number of matching psychologists and the requested page.
+        Specialization matches case-insensitively by substring.
+        """
+        needle = specialization.casefold() if specialization else None
+        matches = []
+        for user_id in self._sorted_ids(sort_by, descending):
+            profile = self._profiles[user_id]
+            if needle and needle not in (profile.specialization or "").casefold():
+                continue
+            experience = profile.experience_years or 0
+            if min_experience is not None and experience < min_experience:
+                continue
+            if max_experience is not None and experience > max_experience:
+                continue
+            matches.append(profile)
+
+        return len(matches), matches[offset:offset + limit]
+
+
+psychologist_directory = PsychologistDirectory()
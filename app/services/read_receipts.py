@@ -0,0 +1,61 @@
+import asyncio
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.db.sessions import AsyncSessionLocal
+from app.services.chat_service import ChatService
+
+
+class ReadReceiptBuffer:
+    """
+    Coalesces mark_read events before they reach the database.
+
+    Only the highest message id per (chat_id, user_id) is kept, and the buffer is
+    written with ChatService.mark_chats_read at most once per ``flush_ms``, so a client
+    scrolling through a chat costs one write per interval instead of one per message.
+    A crash loses at most the last interval of read positions; the next mark_read
+    restores them.
+    """
+
+    def __init__(
+            self,
+            flush_ms: int = settings.CHAT_READ_RECEIPT_FLUSH_MS,
+            session_factory: Callable = AsyncSessionLocal
+    ):
+        self.interval = flush_ms / 1000
+        self._session_factory = session_factory
+        self._pending: Dict[Tuple[int, int], int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def mark(self, chat_id: int, user_id: int, message_id: int) -> None:
+        key = (chat_id, user_id)
+        if message_id > self._pending.get(key, 0):
+            self._pending[key] = message_id
+
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        marks, self._pending = self._pending, {}
+        if marks:
+            self._flush_task = asyncio.create_task(self._flush(marks))
+
+    async def _flush(self, marks: Dict[Tuple[int, int], int]) -> None:
+        try:
+            async with self._session_factory() as db:
+                await ChatService.mark_chats_read(db, marks)
+        except Exception as e:
+            print(f"Error saving {len(marks)} read receipts: {e}")
+
+    async def close(self) -> None:
+        """Writes out the buffered read positions; call on shutdown."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._start_flush()
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+
+
+read_receipts = ReadReceiptBuffer()
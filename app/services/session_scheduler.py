@@ -0,0 +1,270 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text, update
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.locks import named_lock
+from app.db.sessions import AsyncSessionLocal, async_engine
+from app.models.session import Session, SessionStatus
+
+# (fire_at, session_id, offset_minutes, starts_at)
+Reminder = Tuple[datetime, int, int, datetime]
+
+
+def scheduler_lock(timeout: int) -> AsyncContextManager:
+    """The lock whose holder is the only worker running the scheduler"""
+    return named_lock(async_engine, "mindspace:session-scheduler", timeout=timeout)
+
+
+class SessionScheduler:
+    """
+    In-process background jobs for the session lifecycle, run from the FastAPI lifespan.
+
+    * Sessions whose end has passed are moved from ``upcoming`` to ``completed`` in
+      batches of ``batch_size`` using the (status, starts_at) index.
+    * Reminders are pushed to both participants ``reminder_offsets`` minutes before
+      ``starts_at``. Upcoming sessions within the reminder horizon are loaded with one
+      range query per ``interval`` into a heap ordered by fire time; the reminder task
+      sleeps until the earliest entry is due instead of polling every row, and re-checks
+      due sessions in one query (so cancelled or rescheduled ones are skipped).
+
+    Every worker starts the scheduler, but only the one holding ``leader_lock``
+    (a MySQL GET_LOCK) runs the jobs; the others keep waiting for the lock and take
+    over when the leader's connection goes away. ``leader_lock=None`` runs the jobs
+    unconditionally (tests, single process).
+
+    Times are naive local datetimes, like ``Session.starts_at``.
+    """
+
+    def __init__(
+            self,
+            emit: Callable[[int, str, dict], Awaitable[None]],
+            session_factory: Callable = AsyncSessionLocal,
+            interval: int = settings.SESSION_SCHEDULER_INTERVAL_SECONDS,
+            batch_size: int = settings.SESSION_SCHEDULER_BATCH_SIZE,
+            reminder_offsets: Sequence[int] = settings.SESSION_REMINDER_OFFSETS_MINUTES,
+            leader_lock: Optional[Callable[[int], AsyncContextManager]] = scheduler_lock
+    ):
+        self._emit = emit
+        self._session_factory = session_factory
+        self._leader_lock = leader_lock
+        self.interval = interval
+        self.batch_size = batch_size
+        self.reminder_offsets = tuple(sorted(set(reminder_offsets)))
+        self._heap: List[Reminder] = []
+        self._scheduled: Dict[Tuple[int, int, datetime], datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "leader": 0,
+            "completed_total": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "completion_lag_seconds": 0.0,
+            "reminders_sent": 0,
+            "reminders_pending": 0,
+            "reminder_lag_seconds": 0.0,
+            "reminder_lag_max_seconds": 0.0,
+            "last_run_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        if self._leader_lock is None:
+            await self._run_jobs()
+            return
+
+        while True:
+            try:
+                async with self._leader_lock(self.interval) as conn:
+                    print("Session scheduler: this worker runs the session jobs")
+                    self.metrics["leader"] = 1
+                    try:
+                        await self._run_jobs(conn)
+                    finally:
+                        self.metrics["leader"] = 0
+                        # Новий лідер сам завантажить нагадування
+                        self._heap.clear()
+                        self._scheduled.clear()
+            except TimeoutError:
+                # Планувальник працює на іншому воркері
+                continue
+            except Exception as e:
+                print(f"Session scheduler lost its lock: {e}")
+                await asyncio.sleep(self.interval)
+
+    async def _run_jobs(self, lock_connection=None) -> None:
+        reminders = asyncio.create_task(self._reminder_loop())
+        try:
+            await self._periodic_loop(lock_connection)
+        finally:
+            reminders.cancel()
+            await asyncio.gather(reminders, return_exceptions=True)
+
+    async def _periodic_loop(self, lock_connection=None) -> None:
+        while True:
+            # Якщо з'єднання з блокуванням обірвалося, блокування вже може мати інший воркер
+            if lock_connection is not None:
+                await lock_connection.execute(text("SELECT 1"))
+            started = time.perf_counter()
+            try:
+                await self.complete_finished_sessions()
+                await self.load_reminders()
+            except Exception as e:
+                print(f"Session scheduler error: {e}")
+            self.metrics["last_run_seconds"] = time.perf_counter() - started
+            await asyncio.sleep(self.interval)
+
+    async def complete_finished_sessions(self, now: Optional[datetime] = None) -> int:
+        """
+        Marks upcoming sessions that have ended as completed, one bounded batch per
+        transaction. Returns the number of completed sessions.
+        """
+        now = now or datetime.now()
+        total = 0
+        lag = 0.0
+
+        while True:
+            async with self._session_factory() as db:
+                result = await db.execute(
+                    select(Session.id, Session.starts_at, Session.duration)
+                    .where(
+                        Session.status == SessionStatus.upcoming,
+                        Session.starts_at < now,
+                        Session.ends_at <= now
+                    )
+                    .order_by(Session.starts_at)
+                    .limit(self.batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+
+                await db.execute(
+                    update(Session)
+                    .where(Session.id.in_([row.id for row in rows]), Session.status == SessionStatus.upcoming)
+                    .values(status=SessionStatus.completed)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+
+            oldest_end = rows[0].starts_at + timedelta(minutes=rows[0].duration)
+            lag = max(lag, (now - oldest_end).total_seconds())
+            total += len(rows)
+            self.metrics["last_batch_size"] = len(rows)
+            self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], len(rows))
+            if len(rows) < self.batch_size:
+                break
+
+        self.metrics["completed_total"] += total
+        self.metrics["completion_lag_seconds"] = lag
+        return total
+
+    async def load_reminders(self, now: Optional[datetime] = None) -> None:
+        """
+        Pushes reminders due before the next load into the heap.
+        """
+        if not self.reminder_offsets:
+            return
+
+        now = now or datetime.now()
+        horizon = now + timedelta(minutes=max(self.reminder_offsets), seconds=2 * self.interval)
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(Session.id, Session.starts_at)
+                .where(
+                    Session.status == SessionStatus.upcoming,
+                    Session.starts_at > now,
+                    Session.starts_at <= horizon
+                )
+            )
+            rows = result.all()
+
+        added = False
+        for row in rows:
+            for offset in self.reminder_offsets:
+                fire_at = row.starts_at - timedelta(minutes=offset)
+                key = (row.id, offset, row.starts_at)
+                if fire_at <= now or key in self._scheduled:
+                    continue
+                self._scheduled[key] = fire_at
+                heapq.heappush(self._heap, (fire_at, row.id, offset, row.starts_at))
+                added = True
+
+        # Забуваємо про давно надіслані нагадування
+        expired_before = now - timedelta(hours=1)
+        self._scheduled = {key: fire_at for key, fire_at in self._scheduled.items() if fire_at >= expired_before}
+        self.metrics["reminders_pending"] = len(self._heap)
+        if added:
+            self._wakeup.set()
+
+    async def _reminder_loop(self) -> None:
+        while True:
+            timeout = None
+            if self._heap:
+                timeout = max((self._heap[0][0] - datetime.now()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.send_due_reminders()
+            except Exception as e:
+                print(f"Session reminder error: {e}")
+
+    async def send_due_reminders(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now()
+        due: List[Reminder] = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        self.metrics["reminders_pending"] = len(self._heap)
+        if not due:
+            return 0
+
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(Session.id, Session.student_id, Session.psychologist_id, Session.starts_at)
+                .where(
+                    Session.id.in_({reminder[1] for reminder in due}),
+                    Session.status == SessionStatus.upcoming
+                )
+            )
+            sessions = {row.id: row for row in result}
+
+        sent = 0
+        for fire_at, session_id, offset, starts_at in due:
+            session = sessions.get(session_id)
+            if not session or session.starts_at != starts_at:
+                continue
+
+            payload = {
+                "session_id": session_id,
+                "starts_at": starts_at.isoformat(),
+                "minutes_before": offset
+            }
+            await self._emit(session.student_id, "session_reminder", payload)
+            await self._emit(session.psychologist_id, "session_reminder", payload)
+
+            lag = (datetime.now() - fire_at).total_seconds()
+            self.metrics["reminder_lag_seconds"] = lag
+            self.metrics["reminder_lag_max_seconds"] = max(self.metrics["reminder_lag_max_seconds"], lag)
+            sent += 1
+
+        self.metrics["reminders_sent"] += sent
+        return sent
@@ -1,50 +1,114 @@
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, union, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
 from app.models.session import Session, SessionStatus
 from app.models.user import User, UserRole
-from app.schemas.sessions import SessionCreate, SessionUpdate
+from app.schemas.sessions import SessionCreate, SessionUpdate, combine_session_start
+from app.services.availability_service import AvailabilityService
+from app.services.avatar_storage import avatar_thumbnail_url
+
+
+def session_to_dict(
+        session: Session,
+        first_name: Optional[str],
+        last_name: Optional[str],
+        avatar_url: Optional[str],
+        avatar_thumbnail_sizes: Optional[str]
+) -> dict:
+    """
+    Builds the SessionOut payload; date and time are derived from starts_at
+    so the response keeps its original string fields.
+    """
+    data = session_list_item(session, first_name, last_name, avatar_url, avatar_thumbnail_sizes)
+    data["notes"] = session.notes
+    return data
+
+
+def session_list_item(
+        session,
+        first_name: Optional[str],
+        last_name: Optional[str],
+        avatar_url: Optional[str],
+        avatar_thumbnail_sizes: Optional[str]
+) -> dict:
+    """
+    Builds the SessionListItem payload from a Session or a row with the same column names.
+    """
+    return {
+        "id": session.id,
+        "student_id": session.student_id,
+        "psychologist_id": session.psychologist_id,
+        "date": session.starts_at.date().isoformat(),
+        "time": session.starts_at.strftime("%H:%M"),
+        "starts_at": session.starts_at,
+        "duration": session.duration,
+        "status": session.status,
+        "price": session.price,
+        "psychologist_name": f"{first_name} {last_name}" if first_name and last_name else "Невідомий психолог",
+        "psychologist_avatar": avatar_url,
+        "psychologist_avatar_thumbnail": avatar_thumbnail_url(avatar_url, avatar_thumbnail_sizes)
+    }
 
 
 class SessionService:
+    @staticmethod
+    async def lock_psychologist(db: AsyncSession, psychologist_id: int) -> User:
+        """
+        Locks the psychologist's row (SELECT ... FOR UPDATE) until the end of the
+        transaction. Every booking change of the psychologist takes this lock first,
+        so overlap checks for the same psychologist never run concurrently.
+        """
+        result = await db.execute(
+            select(User)
+            .where(User.id == psychologist_id, User.role == UserRole.psychologist)
+            .with_for_update()
+        )
+        psychologist = result.scalars().first()
+        if not psychologist:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Психолога не знайдено")
+        return psychologist
+
     @staticmethod
     async def create_session(db: AsyncSession, session_data: SessionCreate, student_id: int) -> dict:
         """
         Creates a new session booking.
+        The slot is checked for overlaps under the psychologist's row lock, so two
+        concurrent bookings of the same time cannot both succeed. The overlap check
+        uses locking reads, so it sees bookings committed while we waited for the lock
+        even if this transaction already read something (e.g. the current user).
         """
+        psychologist = await SessionService.lock_psychologist(db, session_data.psychologist_id)
+        try:
+            await AvailabilityService.ensure_bookable(
+                db, session_data.psychologist_id, session_data.starts_at, session_data.duration
+            )
+        except HTTPException:
+            await db.rollback()
+            raise
+
         session = Session(
             student_id=student_id,
             psychologist_id=session_data.psychologist_id,
-            date=session_data.date,
-            time=session_data.time,
+            starts_at=session_data.starts_at,
             duration=session_data.duration,
             price=session_data.price,
-            status="upcoming"
+            status=SessionStatus.upcoming
         )
         db.add(session)
         await db.commit()
         await db.refresh(session)
-        
-        query = select(User).where(User.id == session_data.psychologist_id)
-        result = await db.execute(query)
-        psychologist = result.scalars().first()
-        
-        return {
-            "id": session.id,
-            "student_id": session.student_id,
-            "psychologist_id": session.psychologist_id,
-            "date": session.date,
-            "time": session.time,
-            "duration": session.duration,
-            "status": session.status,
-            "notes": session.notes,
-            "price": session.price,
-            "psychologist_name": f"{psychologist.first_name} {psychologist.last_name}" if psychologist else "Невідомий психолог",
-            "psychologist_avatar": psychologist.avatar_url if psychologist else None
-        }
+
+        return session_to_dict(
+            session, psychologist.first_name, psychologist.last_name,
+            psychologist.avatar_url, psychologist.avatar_thumbnail_sizes
+        )
 
     @staticmethod
     async def get_session_by_id(db: AsyncSession, session_id: int, user_id: int) -> Optional[dict]:
@@ -56,7 +120,8 @@ class SessionService:
                 Session,
                 User.first_name,
                 User.last_name,
-                User.avatar_url
+                User.avatar_url,
+                User.avatar_thumbnail_sizes
             )
             .join(User, Session.psychologist_id == User.id)
             .where(
@@ -71,62 +136,96 @@ class SessionService:
         if not row:
             return None
         
-        session = row[0]
-        
-        return {
-            "id": session.id,
-            "student_id": session.student_id,
-            "psychologist_id": session.psychologist_id,
-            "date": session.date,
-            "time": session.time,
-            "duration": session.duration,
-            "status": session.status,
-            "notes": session.notes,
-            "price": session.price,
-            "psychologist_name": f"{row.first_name} {row.last_name}" if row.first_name and row.last_name else "Невідомий психолог",
-            "psychologist_avatar": row.avatar_url
-        }
+        return session_to_dict(row[0], row.first_name, row.last_name, row.avatar_url, row.avatar_thumbnail_sizes)
 
     @staticmethod
-    async def get_user_sessions(db: AsyncSession, user_id: int) -> List[dict]:
+    async def get_user_sessions(
+            db: AsyncSession,
+            user_id: int,
+            role: UserRole,
+            starts_from: Optional[datetime] = None,
+            starts_to: Optional[datetime] = None,
+            status: Optional[SessionStatus] = None,
+            upcoming: bool = False,
+            after_id: Optional[int] = None,
+            limit: Optional[int] = None
+    ) -> List[dict]:
         """
-        Returns all sessions where the user is either the student or the psychologist,
-        including psychologist name and avatar.
+        Returns a page of the user's sessions (as student or psychologist) in (starts_at, id)
+        order, starting from the oldest; ``upcoming`` keeps only sessions that have not ended.
+        ``after_id`` is the last session id of the previous page.
         """
+        limit = limit or settings.SESSIONS_PAGE_SIZE
+
+        conditions = []
+        if starts_from is not None:
+            conditions.append(Session.starts_at >= starts_from)
+        if starts_to is not None:
+            conditions.append(Session.starts_at < starts_to)
+        if status is not None:
+            conditions.append(Session.status == status)
+        if upcoming:
+            now = datetime.now()
+            # Нижня межа starts_at дає діапазон індексу, ends_at залишає сесії, що вже йдуть
+            conditions.append(Session.starts_at > now - timedelta(minutes=settings.SESSION_MAX_DURATION_MINUTES))
+            conditions.append(Session.ends_at > now)
+        if after_id is not None:
+            cursor_starts_at = (
+                select(Session.starts_at)
+                .where(
+                    Session.id == after_id,
+                    (Session.student_id == user_id) | (Session.psychologist_id == user_id)
+                )
+                .scalar_subquery()
+            )
+            conditions.append(
+                or_(
+                    Session.starts_at > cursor_starts_at,
+                    and_(Session.starts_at == cursor_starts_at, Session.id > after_id)
+                )
+            )
+
         query = (
             select(
-                Session,
+                Session.id,
+                Session.student_id,
+                Session.psychologist_id,
+                Session.starts_at,
+                Session.duration,
+                Session.status,
+                Session.price,
                 User.first_name,
                 User.last_name,
-                User.avatar_url
+                User.avatar_url,
+                User.avatar_thumbnail_sizes
             )
             .join(User, Session.psychologist_id == User.id)
-            .where((Session.student_id == user_id) | (Session.psychologist_id == user_id))
-            .order_by(Session.date, Session.time)
+            .order_by(Session.starts_at, Session.id)
+            .limit(limit)
         )
-        
+        if role == UserRole.psychologist:
+            def first_page(participant):
+                return (
+                    select(Session.id)
+                    .where(participant == user_id, *conditions)
+                    .order_by(Session.starts_at, Session.id)
+                    .limit(limit)
+                    .subquery()
+                )
+
+            as_student, as_psychologist = first_page(Session.student_id), first_page(Session.psychologist_id)
+            # UNION, а не UNION ALL: психолог міг забронювати сесію сам у себе
+            page_ids = union(select(as_student.c.id), select(as_psychologist.c.id)).subquery()
+            query = query.join(page_ids, page_ids.c.id == Session.id)
+        else:
+            query = query.where(Session.student_id == user_id, *conditions)
+
         result = await db.execute(query)
-        
-        session_dicts = []
-        for row in result:
-            session = row[0]
-            
-            session_dict = {
-                "id": session.id,
-                "student_id": session.student_id,
-                "psychologist_id": session.psychologist_id,
-                "date": session.date,
-                "time": session.time,
-                "duration": session.duration,
-                "status": session.status,
-                "notes": session.notes,
-                "price": session.price,
-                "psychologist_name": f"{row.first_name} {row.last_name}" if row.first_name and row.last_name else "Невідомий психолог",
-                "psychologist_avatar": row.avatar_url
-            }
-            session_dicts.append(session_dict)
-        
-        return session_dicts
+
+        return [
+            session_list_item(row, row.first_name, row.last_name, row.avatar_url, row.avatar_thumbnail_sizes)
+            for row in result
+        ]
 
     @staticmethod
     async def get_psychologist_by_id(db: AsyncSession, psychologist_id: int) -> Optional[User]:
@@ -141,57 +240,102 @@ class SessionService:
         return result.scalars().first()
 
     @staticmethod
-    async def update_session(db: AsyncSession, session_id: int, session_data: SessionUpdate) -> Optional[dict]:
+    async def update_session(
+            db: AsyncSession,
+            session_id: int,
+            user_id: int,
+            session_data: SessionUpdate
+    ) -> Optional[dict]:
         """
-        Updates a session with new data.
+        Updates a session of the given participant; None if it is not found or not theirs.
+        Rescheduling or reviving a cancelled session re-checks the slot under the psychologist lock.
         """
-        query = select(Session).where(Session.id == session_id)
-        result = await db.execute(query)
-        session = result.scalars().first()
-        
-        if not session:
-            return None
-
         try:
             update_data = session_data.model_dump(exclude_unset=True)
         except AttributeError:
             update_data = session_data.dict(exclude_unset=True)
-        
-        for key, value in update_data.items():
-            setattr(session, key, value)
+
+        is_participant = (Session.student_id == user_id) | (Session.psychologist_id == user_id)
+        new_date = update_data.pop("date", None)
+        new_time = update_data.pop("time", None)
+
+        reschedule = bool(new_date or new_time or "duration" in update_data)
+        reactivate = update_data.get("status") not in (None, SessionStatus.cancelled)
+
+        if reschedule or reactivate:
+            result = await db.execute(
+                select(Session.psychologist_id).where(Session.id == session_id, is_participant)
+            )
+            psychologist_id = result.scalar()
+            if psychologist_id is None:
+                return None
+
+            # Перенесення сесії перевіряємо на накладки так само, як нове бронювання.
+            # Сесію перечитуємо вже під блокуванням (locking read), а не з моментального знімка транзакції.
+            await SessionService.lock_psychologist(db, psychologist_id)
+            result = await db.execute(
+                select(Session)
+                .where(Session.id == session_id, is_participant)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+            session = result.scalars().first()
+            if not session:
+                await db.rollback()
+                return None
+
+            # Дата й час зберігаються разом у starts_at
+            if new_date or new_time:
+                update_data["starts_at"] = combine_session_start(
+                    new_date or session.starts_at.date().isoformat(),
+                    new_time or session.starts_at.strftime("%H:%M")
+                )
+
+            # Скасована сесія слот не займає; перевіряємо, якщо після зміни вона його займатиме
+            occupies_slot = update_data.get("status", session.status) != SessionStatus.cancelled
+            if occupies_slot and (reschedule or session.status == SessionStatus.cancelled):
+                try:
+                    await AvailabilityService.ensure_bookable(
+                        db,
+                        session.psychologist_id,
+                        update_data.get("starts_at", session.starts_at),
+                        update_data.get("duration", session.duration),
+                        exclude_session_id=session.id
+                    )
+                except HTTPException:
+                    await db.rollback()
+                    raise
+
+            for key, value in update_data.items():
+                setattr(session, key, value)
+        elif update_data:
+            result = await db.execute(
+                update(Session)
+                .where(Session.id == session_id, is_participant)
+                .values(**update_data)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                await db.rollback()
+                return None
 
         await db.commit()
-        await db.refresh(session)
-        
-        psych_query = select(User).where(User.id == session.psychologist_id)
-        psych_result = await db.execute(psych_query)
-        psychologist = psych_result.scalars().first()
-        
-        return {
-            "id": session.id,
-            "student_id": session.student_id,
-            "psychologist_id": session.psychologist_id,
-            "date": session.date,
-            "time": session.time,
-            "duration": session.duration,
-            "status": session.status,
-            "notes": session.notes,
-            "price": session.price,
-            "psychologist_name": f"{psychologist.first_name} {psychologist.last_name}" if psychologist else "Невідомий психолог",
-            "psychologist_avatar": psychologist.avatar_url if psychologist else None
-        }
+        return await SessionService.get_session_by_id(db, session_id, user_id)
 
     @staticmethod
-    async def cancel_session(db: AsyncSession, session_id: int) -> bool:
+    async def cancel_session(db: AsyncSession, session_id: int, user_id: int) -> bool:
         """
-        Cancels a session by setting its status to cancelled.
+        Cancels a session of the given participant by setting its status to cancelled.
+        A single conditional UPDATE; returns False if no such session is visible to the user.
         """
-        query = select(Session).where(Session.id == session_id)
-        result = await db.execute(query)
-        session = result.scalars().first()
-        
-        if session:
-            session.status = "cancelled"
-            await db.commit()
-            return True
-        return False
+        result = await db.execute(
+            update(Session)
+            .where(
+                Session.id == session_id,
+                (Session.student_id == user_id) | (Session.psychologist_id == user_id)
+            )
+            .values(status=SessionStatus.cancelled)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount > 0
@@ -2,18 +2,27 @@ from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from fastapi import UploadFile, HTTPException, status
+from fastapi import UploadFile
 
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.config import settings
+from app.core.security import hash_password_async, verify_password_async, create_access_token
 from app.models.user import User, UserRole
 from app.schemas.users import UserCreate, UserLogin, UserUpdate
+from app.services.avatar_storage import (
+    avatar_lock, delete_avatar_files, discard_staged_avatar, place_avatar, receive_avatar
+)
+from app.services.psychologist_directory import psychologist_directory
+from app.utils.cache import TTLCache
+
+# token subject (email) -> User, read by app.api.dependencies.get_current_user
+auth_user_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
 
 
 class AuthService:
     @staticmethod
     async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
         """Creates a new user, hashes the password before saving."""
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
 
         user = User(
             email=user_data.email,
@@ -34,6 +43,7 @@ class AuthService:
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        psychologist_directory.upsert(user)
         return user
 
     @staticmethod
@@ -41,7 +51,7 @@ class AuthService:
         result = await db.execute(select(User).where(User.email == login_data.email))
         user = result.scalars().first()
 
-        if not user or not verify_password(login_data.password, user.hashed_password):
+        if not user or not await verify_password_async(login_data.password, user.hashed_password):
             return None
 
         access_token = create_access_token({"sub": user.email})
@@ -52,15 +62,14 @@ class AuthService:
             "user": user
         }
 
-    @staticmethod
-    async def get_psychologists(db: AsyncSession):
-        """Get all psychologists"""
-        query = select(User).where(User.role == UserRole.psychologist)
-        result = await db.execute(query)
-        return result.scalars().all()
-
 
 class UserService:
+    @staticmethod
+    def refresh_cached_user(user: User) -> None:
+        """Refreshes the in-process caches after the user's row changes."""
+        auth_user_cache.invalidate(user.email)
+        psychologist_directory.upsert(user)
+
     @staticmethod
     async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
         """Отримати користувача за ID."""
@@ -88,44 +97,38 @@ class UserService:
 
         await db.commit()
         await db.refresh(user)
+        UserService.refresh_cached_user(user)
         return user
 
     @staticmethod
     async def update_avatar(db: AsyncSession, user_id: int, avatar: UploadFile) -> User:
         """Оновити аватар користувача."""
-        import os
-        import uuid
-        import aiofiles
-        
         user = await UserService.get_user_by_id(db, user_id)
         if not user:
             raise ValueError(f"Користувача з ID {user_id} не знайдено")
 
-        allowed_types = ["image/jpeg", "image/png", "image/jpg"]
-        if avatar.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Дозволені лише файли формату JPEG, JPG або PNG"
-            )
-        
-        # Створюємо директорію для зберігання аватарів, якщо вона не існує
-        upload_dir = os.path.join("static", "avatars")
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Генеруємо унікальне ім'я файлу
-        file_extension = avatar.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        # Зберігаємо файл
-        async with aiofiles.open(file_path, "wb") as out_file:
-            content = await avatar.read()
-            await out_file.write(content)
-        
-        # Використовуємо відносний шлях для зберігання в БД
-        avatar_url = f"/static/avatars/{unique_filename}"
-        user.avatar_url = avatar_url
-        
-        await db.commit()
+        # Файл зберігається потоково під хешем вмісту, разом з мініатюрами
+        staged = await receive_avatar(avatar)
+        old_avatar_url = user.avatar_url
+        try:
+            async with avatar_lock(staged.url):
+                user.avatar_thumbnail_sizes = await place_avatar(staged)
+                user.avatar_url = staged.url
+                await db.commit()
+        finally:
+            discard_staged_avatar(staged.tmp_path)
         await db.refresh(user)
+        UserService.refresh_cached_user(user)
+
+        # Однакові зображення спільні для кількох користувачів, тож видаляємо старий файл,
+        # лише якщо на нього більше ніхто не посилається
+        if old_avatar_url and old_avatar_url != user.avatar_url:
+            async with avatar_lock(old_avatar_url):
+                # Блокуюче читання бачить і збереження, закомічені після початку нашої транзакції
+                result = await db.execute(
+                    select(User.id).where(User.avatar_url == old_avatar_url).limit(1).with_for_update(read=True)
+                )
+                if result.first() is None:
+                    delete_avatar_files(old_avatar_url)
+
         return user
@@ -1,26 +1,65 @@
-from typing import Dict
+from typing import Optional
 
 import socketio
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
 from app.core.security import decode_access_token
+from app.db.instrumentation import instrument_event
 from app.db.sessions import AsyncSessionLocal
+from app.models.message import Message
 from app.models.user import User  # <-- We'll use this for ORM
 from app.schemas.messages import MessageCreate
 from app.services.chat_service import ChatService
+from app.services.message_writer import message_writer
+from app.services.read_receipts import read_receipts
+from app.utils.connections import create_connection_registry, user_room
+
+
+def create_client_manager() -> Optional[socketio.AsyncManager]:
+    """
+    With SOCKETIO_MESSAGE_QUEUE set, emits are published through Redis so that every
+    worker delivers them to its own clients; otherwise the default in-process manager is used.
+    """
+    if settings.SOCKETIO_MESSAGE_QUEUE:
+        return socketio.AsyncRedisManager(settings.SOCKETIO_MESSAGE_QUEUE)
+    return None
+
 
 sio = socketio.AsyncServer(
     async_mode="asgi",
     cors_allowed_origins=["*", "http://localhost:8000"],
+    client_manager=create_client_manager(),
     logger=True,
     engineio_logger=True
 )
 
-connected_users: Dict[int, str] = {}
+connected_users = create_connection_registry(settings.SOCKETIO_MESSAGE_QUEUE)
+
+
+async def emit_to_user(user_id: int, event: str, data: dict) -> None:
+    """
+    Sends an event to every device of the user, whichever worker it is connected to.
+    """
+    await sio.emit(event, data, room=user_room(user_id))
+
+
+def message_payload(msg: Message) -> dict:
+    """
+    Serializes a message the way clients receive it in new_message and sync_batch events.
+    """
+    return {
+        "chat_id": msg.chat_id,
+        "sender_id": msg.sender_id,
+        "text": msg.text,
+        "message_id": msg.id,
+        "created_at": str(msg.created_at)
+    }
 
 
 @sio.event
+@instrument_event("connect")
 async def connect(sid, environ, auth):
     token = None
 
@@ -55,7 +94,8 @@ async def connect(sid, environ, auth):
             print("user not found -> 403")
             return False
 
-        connected_users[user_id] = sid
+        await connected_users.add(user_id, sid)
+        await sio.enter_room(sid, user_room(user_id))
         print(f"User {user_id} (email={email}) connected with sid={sid}")
         return True
     except Exception as e:
@@ -64,19 +104,17 @@ async def connect(sid, environ, auth):
 
 
 @sio.event
+@instrument_event("disconnect")
 async def disconnect(sid):
     """
     Fired when the client disconnects.
     """
     print(f"[socket.io] disconnect sid={sid}")
-    # Remove from connected_users
-    for uid, stored_sid in list(connected_users.items()):
-        if stored_sid == sid:
-            del connected_users[uid]
-            break
+    await connected_users.remove(sid)
 
 
 @sio.on("send_message")
+@instrument_event("send_message")
 async def handle_send_message(sid, data):
     """
     Receives a message event from the client.
@@ -98,12 +136,12 @@ async def handle_send_message(sid, data):
     text = data["text"]
 
     async with AsyncSessionLocal() as db:
-        chat = await ChatService.get_chat_by_id(db, chat_id)
-        if not chat:
+        participants = await ChatService.get_chat_participants(db, chat_id)
+        if not participants:
             print(f"Chat {chat_id} not found.")
             return
 
-        if chat.student_id != sender_id and chat.psychologist_id != sender_id:
+        if not participants.includes(sender_id):
             print(f"User {sender_id} is not a participant of chat {chat_id}")
             return
 
@@ -112,28 +150,18 @@ async def handle_send_message(sid, data):
             sender_id=sender_id,
             text=text
         )
-        saved_msg = await ChatService.save_message(db, msg_data)
-
-        if sender_id == chat.student_id:
-            other_user_id = chat.psychologist_id
-        else:
-            other_user_id = chat.student_id
-
-        recipient_sid = connected_users.get(other_user_id)
-        if recipient_sid:
-            await sio.emit(
-                "new_message",
-                {
-                    "chat_id": chat_id,
-                    "sender_id": sender_id,
-                    "text": text,
-                    "message_id": saved_msg.id,
-                    "created_at": str(saved_msg.created_at)
-                },
-                room=recipient_sid
-            )
+        if settings.CHAT_BATCH_WRITES:
+            # Повертаємо з'єднання в пул, поки повідомлення чекає на свій пакет
+            await db.rollback()
+            saved_msg = await message_writer.submit(msg_data)
         else:
-            print(f"User {other_user_id} is offline.")
+            saved_msg = await ChatService.save_message(db, msg_data)
+
+        other_user_id = participants.other(sender_id)
+
+        # Розсилаємо повідомлення на всі пристрої отримувача (на будь-якому воркері);
+        # якщо він офлайн, кімната порожня, і подія нікуди не йде
+        await emit_to_user(other_user_id, "new_message", message_payload(saved_msg))
 
         await sio.emit(
             "message_sent",
@@ -145,6 +173,125 @@ async def handle_send_message(sid, data):
         )
 
 
+@sio.on("sync")
+@instrument_event("sync")
+async def handle_sync(sid, data):
+    """
+    Streams the messages a client missed while it was offline.
+    data example:
+    {
+      "chats": {"123": 4567, "124": null}   # chat_id -> last seen message id
+    }
+    For every chat, newer messages are sent in "sync_batch" events of up to
+    CHAT_SYNC_BATCH_SIZE messages:
+    {"chat_id": 123, "messages": [...], "has_more": false, "reset": false}
+    A chat without a last seen id gets its latest page. So does a chat whose last seen
+    id is not one of its messages; that batch has "reset": true and the client should
+    replace its local history of the chat with it. After CHAT_SYNC_MAX_MESSAGES
+    messages per chat, "has_more" stays true and the client should reload that chat
+    via REST. "sync_complete" closes the stream.
+    """
+    user_id = get_user_id_by_sid(sid)
+    if not user_id:
+        print("Sync requested by unknown sid.")
+        return
+
+    chats = (data or {}).get("chats") or {}
+    synced_chat_ids = []
+
+    async with AsyncSessionLocal() as db:
+        for raw_chat_id, last_seen_id in chats.items():
+            try:
+                chat_id = int(raw_chat_id)
+                cursor = int(last_seen_id) if last_seen_id is not None else None
+            except (TypeError, ValueError):
+                print(f"Invalid sync entry {raw_chat_id}: {last_seen_id}")
+                continue
+
+            participants = await ChatService.get_chat_participants(db, chat_id)
+            if not participants or not participants.includes(user_id):
+                print(f"User {user_id} is not a participant of chat {chat_id}")
+                continue
+
+            sent = 0
+            reset = False
+            while True:
+                batch = await ChatService.get_chat_messages(
+                    db, chat_id, after_id=cursor, limit=settings.CHAT_SYNC_BATCH_SIZE
+                )
+                unknown_cursor = (
+                    not batch and not sent and cursor is not None
+                    and not await ChatService.is_chat_message(db, chat_id, cursor)
+                )
+                if unknown_cursor:
+                    # Курсор не з цього чату: інакше клієнт вважав би, що нових повідомлень немає
+                    print(f"Unknown last seen message {cursor} in chat {chat_id}, sending the latest page")
+                    cursor, reset = None, True
+                    continue
+                sent += len(batch)
+                has_more = len(batch) == settings.CHAT_SYNC_BATCH_SIZE
+                if batch or cursor is None:
+                    await sio.emit(
+                        "sync_batch",
+                        {
+                            "chat_id": chat_id,
+                            "messages": [message_payload(msg) for msg in batch],
+                            "has_more": has_more,
+                            "reset": reset
+                        },
+                        room=sid
+                    )
+                # Без курсора клієнт отримує лише останню сторінку
+                if not has_more or cursor is None or sent >= settings.CHAT_SYNC_MAX_MESSAGES:
+                    break
+                cursor = batch[-1].id
+
+            synced_chat_ids.append(chat_id)
+
+    await sio.emit("sync_complete", {"chats": synced_chat_ids}, room=sid)
+
+
+@sio.on("mark_read")
+@instrument_event("mark_read")
+async def handle_mark_read(sid, data):
+    """
+    Marks a chat as read up to a message.
+    data example:
+    {
+      "chat_id": 123,
+      "message_id": 4567
+    }
+    The read receipt ("messages_read") is pushed to the other participant and to the
+    reader's other devices right away; the database write is coalesced by read_receipts.
+    """
+    user_id = get_user_id_by_sid(sid)
+    if not user_id:
+        print("mark_read from unknown sid.")
+        return
+
+    try:
+        chat_id = int(data["chat_id"])
+        message_id = int(data["message_id"])
+    except (KeyError, TypeError, ValueError):
+        print(f"Invalid mark_read payload from user {user_id}: {data}")
+        return
+    if message_id <= 0:
+        print(f"Invalid mark_read message id from user {user_id}: {message_id}")
+        return
+
+    async with AsyncSessionLocal() as db:
+        participants = await ChatService.get_chat_participants(db, chat_id)
+    if not participants or not participants.includes(user_id):
+        print(f"User {user_id} is not a participant of chat {chat_id}")
+        return
+
+    read_receipts.mark(chat_id, user_id, message_id)
+
+    receipt = {"chat_id": chat_id, "user_id": user_id, "message_id": message_id}
+    await emit_to_user(participants.other(user_id), "messages_read", receipt)
+    await sio.emit("messages_read", receipt, room=user_room(user_id), skip_sid=sid)
+
+
 async def get_user_id_by_email(db: AsyncSession, email: str) -> int:
     """
     Uses SQLAlchemy ORM to find user_id by email.
@@ -155,14 +302,11 @@ async def get_user_id_by_email(db: AsyncSession, email: str) -> int:
     return user_id
 
 
-def get_user_id_by_sid(sid: str) -> int:
+def get_user_id_by_sid(sid: str) -> Optional[int]:
     """
-    Finds user_id by sid in the connected_users dict.
+    Finds user_id by sid in the connected_users registry.
     """
-    for uid, stored_sid in connected_users.items():
-        if stored_sid == sid:
-            return uid
-    return None
+    return connected_users.get_user_id(sid)
 
 
 # Додайте цей код для налагодження CORS
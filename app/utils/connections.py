@@ -0,0 +1,177 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Set
+
+import redis.asyncio as aioredis
+
+
+def user_room(user_id: int) -> str:
+    """
+    Name of the Socket.IO room every connection of the user joins.
+    Emitting to this room reaches all devices of the user on every worker.
+    """
+    return f"user:{user_id}"
+
+
+class ConnectionRegistry(ABC):
+    """
+    Presence registry of Socket.IO connections (user -> set of sids, sid -> user).
+
+    A sid always lives on the worker that accepted the connection, so the
+    sid -> user map is kept in process and lookups on the message hot path never
+    leave the worker. Implementations only differ in where the user -> sids side
+    (who is online, on which devices) is stored.
+    """
+
+    def __init__(self):
+        self._user_by_sid: Dict[str, int] = {}
+
+    @abstractmethod
+    async def add(self, user_id: int, sid: str) -> None:
+        """Registers a new connection of the user."""
+
+    @abstractmethod
+    async def remove(self, sid: str) -> Optional[int]:
+        """Forgets a connection, returns the user it belonged to."""
+
+    @abstractmethod
+    async def online_users(self, user_ids: Iterable[int]) -> Set[int]:
+        """Returns those of the users who have a connection on any worker."""
+
+    async def is_online(self, user_id: int) -> bool:
+        """Whether the user has a connection on any worker."""
+        return user_id in await self.online_users([user_id])
+
+    def start(self) -> None:
+        """Starts background upkeep, if the implementation needs any."""
+
+    async def stop(self) -> None:
+        """Stops the background upkeep started by ``start``."""
+
+    def get_user_id(self, sid: str) -> Optional[int]:
+        """Returns the user connected with the given local sid."""
+        return self._user_by_sid.get(sid)
+
+    def __len__(self) -> int:
+        return len(self._user_by_sid)
+
+
+class InMemoryConnectionRegistry(ConnectionRegistry):
+    """
+    Process-local registry, O(1) in both directions.
+    Suitable for a single worker and for tests.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._sids_by_user: Dict[int, Set[str]] = {}
+
+    async def add(self, user_id: int, sid: str) -> None:
+        self._user_by_sid[sid] = user_id
+        self._sids_by_user.setdefault(user_id, set()).add(sid)
+
+    async def remove(self, sid: str) -> Optional[int]:
+        user_id = self._user_by_sid.pop(sid, None)
+        if user_id is None:
+            return None
+
+        sids = self._sids_by_user.get(user_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._sids_by_user[user_id]
+        return user_id
+
+    async def online_users(self, user_ids: Iterable[int]) -> Set[int]:
+        return {user_id for user_id in user_ids if user_id in self._sids_by_user}
+
+
+class RedisConnectionRegistry(ConnectionRegistry):
+    """
+    Registry shared by all workers through Redis (or any server speaking its protocol).
+    Each user has a sorted set under ``<prefix>:user:<id>`` of sids scored by the
+    time their registration expires.
+
+    Every sid expires on its own, ``ttl`` seconds after it was last confirmed: each
+    worker re-confirms its live sids every ``ttl / 3`` seconds (see ``start``), so
+    the sids of a worker that died without running its disconnect handlers stop
+    counting after ``ttl`` even if the user keeps reconnecting elsewhere. Expired
+    sids are ignored by ``online_users`` and pruned on the user's next connect.
+    """
+
+    def __init__(self, url: str, prefix: str = "mindspace:presence", ttl: int = 5 * 60):
+        super().__init__()
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self._ttl = ttl
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self._prefix}:user:{user_id}"
+
+    async def add(self, user_id: int, sid: str) -> None:
+        self._user_by_sid[sid] = user_id
+        key = self._user_key(user_id)
+        now = time.time()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, "-inf", now)
+            pipe.zadd(key, {sid: now + self._ttl})
+            pipe.expire(key, self._ttl)
+            await pipe.execute()
+
+    async def remove(self, sid: str) -> Optional[int]:
+        user_id = self._user_by_sid.pop(sid, None)
+        if user_id is None:
+            return None
+        await self._redis.zrem(self._user_key(user_id), sid)
+        return user_id
+
+    async def online_users(self, user_ids: Iterable[int]) -> Set[int]:
+        """Counts the unexpired sids of every user in one round trip."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        now = time.time()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.zcount(self._user_key(user_id), now, "+inf")
+            counts = await pipe.execute()
+        return {user_id for user_id, count in zip(user_ids, counts) if count}
+
+    async def refresh(self) -> None:
+        """Extends the registration of every sid connected to this worker, in one round trip."""
+        if not self._user_by_sid:
+            return
+        expires_at = time.time() + self._ttl
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for sid, user_id in list(self._user_by_sid.items()):
+                key = self._user_key(user_id)
+                pipe.zadd(key, {sid: expires_at})
+                pipe.expire(key, self._ttl)
+            await pipe.execute()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._ttl / 3)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error refreshing Socket.IO presence: {e}")
+
+    def start(self) -> None:
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+
+def create_connection_registry(url: Optional[str] = None) -> ConnectionRegistry:
+    """Returns the Redis-backed registry when a URL is configured, the in-memory one otherwise."""
+    if url:
+        return RedisConnectionRegistry(url)
+    return InMemoryConnectionRegistry()
@@ -0,0 +1,46 @@
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# <sha256>.<ext> або мініатюра <sha256>_<size>.jpg
+_CONTENT_ADDRESSED = re.compile(r"^([0-9a-f]{64})(?:_(\d+))?\.[a-z]+$")
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles for files that never change once written (avatars are stored under
+    unique or content-hash names). Responses carry a long-lived immutable
+    Cache-Control and a strong ETag, so clients keep them without revalidating and
+    conditional requests are answered with 304.
+    """
+
+    def __init__(self, *args, max_age: int = 365 * 24 * 60 * 60, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    def file_response(
+            self,
+            full_path: "os.PathLike[str] | str",
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["cache-control"] = f"public, max-age={self.max_age}, immutable"
+
+        # Для файлів, названих за хешем вмісту, хеш і є ETag; для старих UUID-імен
+        # лишається ETag Starlette (mtime + розмір), який теж стабільний, бо файли не змінюються
+        match = _CONTENT_ADDRESSED.match(os.path.basename(full_path))
+        if match:
+            digest, size = match.groups()
+            response.headers["etag"] = f'"{digest}-{size}"' if size else f'"{digest}"'
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,74 @@
+"""
+Runs N concurrent password verifications and measures logins/s and event-loop lag.
+
+    python -m benchmarks.login_throughput
+    python -m benchmarks.login_throughput --logins 200 --concurrency 50
+
+"blocking" calls verify_password on the event loop (the old login path),
+"executor" awaits verify_password_async. Lag is how late a 10 ms ticker wakes up
+while the logins run: with the blocking path every tick waits for a whole hash.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.config import settings
+from app.core.security import hash_password, password_hash_metrics, verify_password, verify_password_async
+
+TICK_SECONDS = 0.01
+
+
+async def measure_lag(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append((time.perf_counter() - started - TICK_SECONDS) * 1000)
+
+
+async def run(mode: str, hashed: str, logins: int, concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with slots:
+            if mode == "blocking":
+                verify_password("password", hashed)
+                await asyncio.sleep(0)
+            else:
+                await verify_password_async("password", hashed)
+
+    stop = asyncio.Event()
+    lags: list = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    await asyncio.sleep(TICK_SECONDS * 5)
+    lags.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    lags.sort()
+    print(f"{mode:9} {logins / elapsed:8.1f} logins/s   loop lag (ms): "
+          f"p50 {statistics.median(lags):7.1f}, p99 {lags[int(len(lags) * 0.99)]:7.1f}, max {lags[-1]:7.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="Logins in flight at once")
+    args = parser.parse_args()
+
+    hashed = hash_password("password")
+    print(f"{args.logins} logins, {args.concurrency} in flight, "
+          f"PASSWORD_HASH_CONCURRENCY={settings.PASSWORD_HASH_CONCURRENCY}")
+    for mode in ("blocking", "executor"):
+        asyncio.run(run(mode, hashed, args.logins, args.concurrency))
+
+    queued = password_hash_metrics["queue_time_total"] / max(password_hash_metrics["calls"], 1)
+    print(f"executor: average wait for a hashing slot {queued * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compares GET /materials served from the warm MaterialCatalog snapshot with the old
+path (load every material with its categories and serialize full MaterialOut rows).
+
+    python -m benchmarks.material_catalog
+    python -m benchmarks.material_catalog --materials 5000 --content 8000
+
+Runs against a temporary SQLite database, so the old path's numbers leave out the
+network round trips to MySQL; the real gap is larger.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from starlette.requests import Request
+
+from app.api.v1.endpoints.materials import catalog_response
+from app.db.base import Base
+from app.models.material import Category, Material, material_category
+from app.schemas.materials import MaterialOut
+from app.services.material_catalog import MaterialCatalog, materials_json
+
+_materials_out = TypeAdapter(List[MaterialOut])
+
+
+def add_mysql_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("char_length", 1, lambda value: None if value is None else len(value))
+    dbapi_connection.create_function("concat", -1, lambda *parts: "".join(map(str, parts)))
+
+
+async def seed(session_factory, materials: int, categories: int, content: int, rng: random.Random) -> None:
+    async with session_factory() as db:
+        await db.execute(insert(Category).values([
+            {"id": i, "name": f"Категорія {i}", "slug": f"category-{i}"} for i in range(1, categories + 1)
+        ]))
+        await db.execute(insert(Material).values([
+            {"id": i, "title": f"Матеріал {i}", "content": "текст " * (content // 6), "type": "article"}
+            for i in range(1, materials + 1)
+        ]))
+        await db.execute(insert(material_category).values([
+            {"material_id": i, "category_id": category_id}
+            for i in range(1, materials + 1)
+            for category_id in rng.sample(range(1, categories + 1), k=min(2, categories))
+        ]))
+        await db.commit()
+
+
+async def old_path(session_factory) -> bytes:
+    async with session_factory() as db:
+        result = await db.execute(select(Material).options(selectinload(Material.categories)))
+        return _materials_out.dump_json(result.scalars().all())
+
+
+async def snapshot_path(session_factory, catalog: MaterialCatalog, request: Request, limit: int) -> int:
+    async with session_factory() as db:
+        snapshot = await catalog.get(db)
+
+        def build():
+            materials = snapshot.list_materials()
+            return len(materials), materials_json(materials[:limit])
+
+        return catalog_response(request, snapshot, ("materials", frozenset(), 0, limit), build).status_code
+
+
+async def measure(label: str, call, seconds: float) -> None:
+    await call()
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        await call()
+        count += 1
+    print(f"{label:28} {count / (time.perf_counter() - started):10.1f} req/s")
+
+
+async def run(args, path: str) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    event.listen(engine.sync_engine, "connect", add_mysql_functions)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await seed(session_factory, args.materials, args.categories, args.content, random.Random(args.seed))
+
+    catalog = MaterialCatalog(ttl=3600)
+    plain = Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": []})
+    async with session_factory() as db:
+        etag = (await catalog.get(db)).etag
+    conditional = Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"if-none-match", etag.encode())]
+    })
+
+    print(f"{args.materials} materials x {args.content} chars, {args.categories} categories")
+    await measure("old path (all, full content)", lambda: old_path(session_factory), args.seconds)
+    await measure(f"warm snapshot (page {args.limit})",
+                  lambda: snapshot_path(session_factory, catalog, plain, args.limit), args.seconds)
+    await measure("warm snapshot, 304",
+                  lambda: snapshot_path(session_factory, catalog, conditional, args.limit), args.seconds)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--materials", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--content", type=int, default=4000, help="Characters of content per material")
+    parser.add_argument("--limit", type=int, default=20, help="Page size of the snapshot path")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, os.path.join(directory, "catalog.db")))
+
+
+if __name__ == "__main__":
+    main()
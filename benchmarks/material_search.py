@@ -0,0 +1,113 @@
+"""
+Builds MaterialSearchIndex over a generated catalog and measures indexing and query time.
+
+    python -m benchmarks.material_search
+    python -m benchmarks.material_search --articles 20000 --words 300
+
+No database is needed: articles are generated from a Zipf-like vocabulary of
+Ukrainian-looking words, so some terms are common and most are rare, as in real text.
+Loop lag is how late a 10 ms ticker wakes up while the same queries run through
+search_async, as they do in the endpoint.
+"""
+import argparse
+import asyncio
+import random
+import resource
+import statistics
+import time
+from itertools import accumulate
+
+from app.services.material_search import MaterialSearchIndex
+
+_SYLLABLES = ["ра", "ко", "ні", "ст", "ви", "то", "ли", "ма", "дя", "жу", "ць", "ої", "пе", "ро", "ба", "чи"]
+_ENDINGS = ["", "а", "и", "ів", "ою", "ість", "ості", "ий", "ого", "ами"]
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(_SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def max_rss_mib() -> float:
+    # ru_maxrss у кілобайтах (Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+TICK_SECONDS = 0.01
+
+
+async def measure_loop_lag(index: MaterialSearchIndex, queries: list) -> list:
+    stop = asyncio.Event()
+    lags: list = []
+
+    async def ticker() -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append((time.perf_counter() - started - TICK_SECONDS) * 1000)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK_SECONDS * 5)
+    lags.clear()
+    for query in queries:
+        await index.search_async(query, limit=20)
+    stop.set()
+    await task
+    index.close()
+    return sorted(lags)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=200, help="Words per article")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def text(length: int) -> str:
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=length)
+        return " ".join(map(str.__add__, words, rng.choices(_ENDINGS, k=length)))
+
+    index = MaterialSearchIndex()
+    rss_before = max_rss_mib()
+    build_seconds = 0.0
+    for material_id in range(1, args.articles + 1):
+        title, content = text(6), text(args.words)
+        started = time.perf_counter()
+        index.add(material_id, title, content)
+        build_seconds += time.perf_counter() - started
+
+    queries = [
+        " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 3)))
+        for _ in range(args.queries)
+    ]
+    latencies = []
+    matches = []
+    for query in queries:
+        started = time.perf_counter()
+        total, _ = index.search(query, limit=20)
+        latencies.append((time.perf_counter() - started) * 1000)
+        matches.append(total)
+    latencies.sort()
+    lags = asyncio.run(measure_loop_lag(index, queries))
+
+    print(f"articles:           {args.articles} x {args.words} words, vocabulary {args.vocabulary}")
+    print(f"index build:        {build_seconds:.1f}s ({args.articles / build_seconds:.0f} articles/s), "
+          f"max RSS +{max_rss_mib() - rss_before:.0f} MiB")
+    print(f"queries:            {len(queries)}, median {statistics.median(matches):.0f} matches")
+    print(f"query latency (ms): p50 {latencies[len(latencies) // 2]:.2f}, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.2f}, max {latencies[-1]:.2f}")
+    print(f"loop lag (ms):      p50 {statistics.median(lags):.2f}, "
+          f"p99 {lags[int(len(lags) * 0.99)]:.2f}, max {lags[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Serves generated avatars through StaticFiles (before) and ImmutableStaticFiles (after)
+and measures requests/s for full responses and for conditional (If-None-Match) ones.
+
+    python -m benchmarks.static_files
+    python -m benchmarks.static_files --files 200 --size 40000
+
+The ASGI apps are called directly, so the numbers are server-side cost only.
+With StaticFiles a browser revalidates every avatar on each page load (one 304
+round trip per image); the immutable Cache-Control of ImmutableStaticFiles lets it
+skip those requests entirely, so the "after" page load makes none of them.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+from starlette.staticfiles import StaticFiles
+
+from app.utils.static_files import ImmutableStaticFiles
+
+
+def make_avatars(directory: str, count: int, size: int) -> list:
+    names = []
+    for i in range(count):
+        data = os.urandom(size)
+        name = f"{hashlib.sha256(data).hexdigest()}.jpg"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+        names.append(name)
+    return names
+
+
+async def call(app, name: str, etag: bytes = None) -> dict:
+    headers = [(b"if-none-match", etag)] if etag else []
+    scope = {
+        "type": "http", "method": "GET", "path": f"/{name}", "root_path": "", "query_string": b"",
+        "headers": headers, "http_version": "1.1", "scheme": "http", "server": ("bench", 80),
+    }
+    start = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            start.update(message)
+
+    await app(scope, receive, send)
+    return start
+
+
+async def requests_per_second(app, names: list, etags: dict, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            await call(app, name, etags.get(name))
+    return rounds * len(names) / (time.perf_counter() - started)
+
+
+async def run(label: str, app, names: list, rounds: int) -> None:
+    etags = {}
+    for name in names:
+        headers = dict((await call(app, name))["headers"])
+        etags[name] = headers[b"etag"]
+        cache_control = headers.get(b"cache-control", b"-").decode()
+
+    full = await requests_per_second(app, names, {}, rounds)
+    conditional = await requests_per_second(app, names, etags, rounds)
+    revalidations = 0 if "immutable" in cache_control else len(names)
+    print(f"{label:7} 200: {full:7.0f} req/s   304: {conditional:7.0f} req/s   "
+          f"revalidations per page load: {revalidations:3}   cache-control: {cache_control}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size", type=int, default=20_000, help="Bytes per avatar")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = make_avatars(directory, args.files, args.size)
+        print(f"{args.files} avatars x {args.size} bytes, {args.rounds} rounds")
+        asyncio.run(run("before", StaticFiles(directory=directory), names, args.rounds))
+        asyncio.run(run("after", ImmutableStaticFiles(directory=directory), names, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, literal, literal_column
+from sqlalchemy.dialects.mysql.dml import OnDuplicateClause
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import ClauseElement, ColumnClause
+
+from app.db.base import Base
+from app.db.functions import minutes_after
+from app.models.chat import Chat
+from app.models.chat_read_state import ChatReadState
+from app.models.message import Message
+from app.models.user import User, UserRole
+
+
+@compiles(minutes_after, "sqlite")
+def _minutes_after_sqlite(element, compiler, **kw):
+    timestamp, minutes = list(element.clauses)
+    return f"datetime({compiler.process(timestamp, **kw)}, '+' || {compiler.process(minutes, **kw)} || ' minutes')"
+
+
+@compiles(OnDuplicateClause, "sqlite")
+def _on_duplicate_key_update_sqlite(clause, compiler, **kw):
+    """MySQL upserts as ON CONFLICT (primary key) DO UPDATE, with inserted.<column> read from excluded"""
+    table = compiler.current_executable.table
+    quote = compiler.preparer.quote
+
+    def replace(element):
+        if isinstance(element, ColumnClause) and element.table is clause.inserted_alias:
+            return literal_column(f"excluded.{quote(element.name)}")
+        return None
+
+    assignments = []
+    for key, value in clause.update.items():
+        column = table.c[key]
+        if not isinstance(value, ClauseElement):
+            value = literal(value, type_=column.type)
+        value = visitors.replacement_traverse(value, {}, replace)
+        assignments.append(f"{quote(column.name)} = {compiler.process(value.self_group(), **kw)}")
+    target = ", ".join(quote(column.name) for column in table.primary_key)
+    return f"ON CONFLICT ({target}) DO UPDATE SET {', '.join(assignments)}"
+
+
+def sqlite_engine(path) -> AsyncEngine:
+    """
+    File-backed SQLite engine standing in for MySQL in service tests.
+    Registers the MySQL functions and upserts the services use in SQL expressions.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def add_mysql_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function("char_length", 1, lambda value: None if value is None else len(value))
+        dbapi_connection.create_function(
+            "concat", -1, lambda *parts: None if None in parts else "".join(map(str, parts))
+        )
+        dbapi_connection.create_function("least", -1, lambda *values: None if None in values else min(values))
+
+    return engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqlite_engine(tmp_path / "test.db")
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def user(user_id: int, role: UserRole) -> User:
+    return User(
+        id=user_id, email=f"user{user_id}@example.com", hashed_password="-", role=role,
+        first_name=f"Name{user_id}", last_name="Test", birth_date=date(2000, 1, 1), phone_number="0"
+    )
+
+
+def seed_chats(session_factory, chats: int = 10) -> None:
+    """Student 1 chatting with psychologists 100.., three unread messages per chat, latest chat last"""
+    async def insert():
+        async with session_factory() as db:
+            db.add(user(1, UserRole.student))
+            db.add_all([user(100 + i, UserRole.psychologist) for i in range(chats)])
+            started = datetime(2026, 1, 1)
+            for i in range(chats):
+                chat = Chat(id=i + 1, student_id=1, psychologist_id=100 + i, created_at=started)
+                db.add(chat)
+                for n in range(3):
+                    db.add(Message(
+                        id=i * 3 + n + 1, chat_id=chat.id, sender_id=100 + i, text=f"chat {chat.id} message {n}",
+                        created_at=started + timedelta(minutes=i * 10 + n)
+                    ))
+                chat.last_message_id = i * 3 + 3
+                chat.last_message_at = started + timedelta(minutes=i * 10 + 2)
+                db.add(ChatReadState(chat_id=chat.id, user_id=1, unread_count=3))
+            await db.commit()
+
+    asyncio.run(insert())
@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.dependencies import get_current_admin
+from app.core.config import settings
+
+
+def test_listed_email_is_admin(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", frozenset({"admin@example.com"}))
+    user = SimpleNamespace(email="Admin@Example.com")
+    assert asyncio.run(get_current_admin(user)) is user
+
+
+def test_other_users_get_403(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", frozenset({"admin@example.com"}))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_current_admin(SimpleNamespace(email="student@example.com")))
+    assert error.value.status_code == 403
+
+
+def test_nobody_is_admin_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", frozenset())
+    with pytest.raises(HTTPException):
+        asyncio.run(get_current_admin(SimpleNamespace(email="admin@example.com")))
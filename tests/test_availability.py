@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models.availability import PsychologistAvailability
+from app.models.session import Session, SessionStatus
+from app.models.user import UserRole
+from app.services.availability_service import (
+    AvailabilityService, _align, merge_intervals, subtract_intervals, working_intervals
+)
+from tests.conftest import user
+
+STUDENT, PSYCHOLOGIST = 1, 10
+MONDAY = datetime(2026, 3, 2)
+
+
+def at(hour: int, minute: int = 0, day: datetime = MONDAY) -> datetime:
+    return day + timedelta(hours=hour, minutes=minute)
+
+
+def hours(weekday: int, start: str, end: str) -> SimpleNamespace:
+    return SimpleNamespace(weekday=weekday, start_time=time.fromisoformat(start), end_time=time.fromisoformat(end))
+
+
+def test_merge_joins_overlapping_and_touching_intervals():
+    assert merge_intervals([(at(12), at(13)), (at(9), at(11)), (at(10), at(10, 30)), (at(11), at(12))]) == [
+        (at(9), at(13))
+    ]
+    assert merge_intervals([(at(9), at(10)), (at(10, 1), at(11))]) == [(at(9), at(10)), (at(10, 1), at(11))]
+
+
+def test_session_ending_at_slot_start_leaves_it_free():
+    busy = [(at(9), at(10)), (at(11), at(11, 30))]
+    free = subtract_intervals((at(10), at(12)), busy, [end for _, end in busy])
+    assert free == [(at(10), at(11)), (at(11, 30), at(12))]
+
+
+def test_subtract_handles_busy_spanning_the_interval():
+    busy = [(at(8), at(13))]
+    assert subtract_intervals((at(9), at(12)), busy, [at(13)]) == []
+
+
+def test_working_intervals_merge_overlapping_hours_and_clip_to_range():
+    availability = [hours(0, "09:00", "12:00"), hours(0, "11:00", "14:00"), hours(1, "10:00", "11:00")]
+    assert working_intervals(availability, at(10), at(10, day=MONDAY + timedelta(days=1)) + timedelta(minutes=30)) == [
+        (at(10), at(14)),
+        (at(10, day=MONDAY + timedelta(days=1)), at(10, 30, day=MONDAY + timedelta(days=1))),
+    ]
+
+
+def test_align_rounds_up_to_the_step_and_wraps_at_midnight():
+    assert _align(at(9, 30), 30) == at(9, 30)
+    assert _align(at(9, 31), 30) == at(10)
+    assert _align(at(9, 30) + timedelta(seconds=1), 30) == at(10)
+    assert _align(at(23, 50), 45) == at(24)  # кроки рахуються від півночі: 23:15, потім 00:00
+    assert _align(at(23, 59) + timedelta(seconds=30), 15) == at(24)
+
+
+def seed(session_factory, availability: list, sessions: list) -> None:
+    async def insert():
+        async with session_factory() as db:
+            db.add_all([user(STUDENT, UserRole.student), user(PSYCHOLOGIST, UserRole.psychologist)])
+            db.add_all([
+                PsychologistAvailability(psychologist_id=PSYCHOLOGIST, **vars(item)) for item in availability
+            ])
+            for session_id, (starts_at, duration) in enumerate(sessions, 1):
+                db.add(Session(
+                    id=session_id, student_id=STUDENT, psychologist_id=PSYCHOLOGIST, starts_at=starts_at,
+                    duration=duration, price=100, status=SessionStatus.upcoming
+                ))
+            await db.commit()
+
+    asyncio.run(insert())
+
+
+def free_slots(session_factory, start: datetime, end: datetime, duration: int) -> list:
+    async def query():
+        async with session_factory() as db:
+            return await AvailabilityService.get_free_slots(db, PSYCHOLOGIST, start, end, duration)
+
+    return [slot["starts_at"] for slot in asyncio.run(query())]
+
+
+def test_slots_skip_sessions_and_keep_adjacent_starts(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_SLOT_STEP_MINUTES", 30)
+    seed(session_factory, [hours(0, "09:00", "12:00")], [(at(10), 50)])
+    assert free_slots(session_factory, at(0), at(24), 60) == [at(9), at(11)]
+    assert free_slots(session_factory, at(0), at(24), 30) == [at(9), at(9, 30), at(11), at(11, 30)]
+
+
+def test_without_working_hours_any_free_time_is_offered_and_bookable(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_SLOT_STEP_MINUTES", 30)
+    seed(session_factory, [], [(at(23, 30), 30)])
+    next_day = MONDAY + timedelta(days=1)
+    assert free_slots(session_factory, at(22, 10), at(1, day=next_day), 30) == [
+        at(22, 30), at(23), at(0, day=next_day), at(0, 30, day=next_day)
+    ]
+
+    async def book(starts_at: datetime):
+        async with session_factory() as db:
+            await AvailabilityService.ensure_bookable(db, PSYCHOLOGIST, starts_at, 30)
+
+    asyncio.run(book(at(0, day=next_day)))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(book(at(23, 15)))
+    assert error.value.status_code == 409
@@ -0,0 +1,119 @@
+import asyncio
+import io
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.schemas.users import UserUpdate
+from app.services import avatar_storage
+from app.services.avatar_storage import avatar_thumbnail_url, place_avatar, receive_avatar
+from app.utils.request_limits import BodySizeLimitMiddleware
+
+DIGEST = "a" * 64
+
+
+def png_bytes(color: str = "red") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def avatar_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(avatar_storage, "AVATAR_DIR", str(tmp_path))
+    monkeypatch.setattr(avatar_storage.settings, "AVATAR_THUMBNAIL_SIZES", (64, 256))
+    return tmp_path
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="me.png", headers=Headers({"content-type": "image/png"}))
+
+
+def test_thumbnail_url_uses_the_recorded_sizes():
+    url = f"/static/avatars/{DIGEST}.png"
+    assert avatar_thumbnail_url(url, "64,256") == f"/static/avatars/{DIGEST}_64.jpg"
+    assert avatar_thumbnail_url(url, "64,256", size=100) == f"/static/avatars/{DIGEST}_256.jpg"
+    assert avatar_thumbnail_url(url, "64,256", size=1000) == f"/static/avatars/{DIGEST}_256.jpg"
+    assert avatar_thumbnail_url(url, None) == url
+    assert avatar_thumbnail_url("/static/avatars/legacy-uuid.png", "64") == "/static/avatars/legacy-uuid.png"
+    assert avatar_thumbnail_url(None, None) is None
+
+
+def test_profile_update_cannot_set_the_avatar():
+    update = UserUpdate(first_name="Іван", avatar_url="/static/avatars/other.png")
+    assert update.model_dump(exclude_unset=True) == {"first_name": "Іван"}
+
+
+def test_place_avatar_stores_once_and_reports_thumbnails(avatar_dir):
+    async def scenario():
+        data = png_bytes()
+        first = await receive_avatar(upload(data))
+        assert await place_avatar(first) == "64,256"
+
+        second = await receive_avatar(upload(data))
+        assert second.url == first.url
+        assert await place_avatar(second) == "64,256"
+        assert not os.path.exists(second.tmp_path)
+        return first
+
+    staged = asyncio.run(scenario())
+    assert sorted(os.listdir(avatar_dir)) == sorted([
+        staged.filename, f"{staged.digest}_64.jpg", f"{staged.digest}_256.jpg"
+    ])
+
+
+def test_receive_avatar_enforces_the_size_cap(avatar_dir, monkeypatch):
+    monkeypatch.setattr(avatar_storage.settings, "AVATAR_MAX_BYTES", 10)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(receive_avatar(upload(b"x" * 100)))
+    assert error.value.status_code == 413
+    assert os.listdir(avatar_dir) == []
+
+
+def limited_app(limit: int):
+    app = FastAPI()
+    received = []
+
+    @app.post("/avatar")
+    async def avatar(file: UploadFile = File(...)):
+        received.append(len(await file.read()))
+        return {"ok": True}
+
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/avatar": limit})
+    return app, received
+
+
+def post(app, **kwargs) -> httpx.Response:
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/avatar", **kwargs)
+
+    return asyncio.run(request())
+
+
+def test_oversized_upload_is_rejected_before_parsing():
+    app, received = limited_app(1024)
+    response = post(app, files={"file": ("me.png", b"x" * 4096, "image/png")})
+    assert response.status_code == 413
+    assert received == []
+
+    assert post(app, files={"file": ("me.png", b"x" * 100, "image/png")}).status_code == 200
+    assert received == [100]
+
+
+def test_chunked_upload_is_cut_off_at_the_limit():
+    app, received = limited_app(1024)
+
+    async def body():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"me.png\"\r\n\r\n"
+        for _ in range(10):
+            yield b"x" * 512
+        yield b"\r\n--b--\r\n"
+
+    response = post(app, content=body(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert received == []
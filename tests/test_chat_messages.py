@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.api.dependencies import Principal, get_current_principal
+from app.db.sessions import get_db
+from app.main import app
+from app.models.user import UserRole
+from app.services.chat_service import chat_participants_cache
+from tests.conftest import seed_chats
+
+
+@pytest.fixture
+def get(session_factory):
+    """GET as the seeded student against the test database"""
+    async def test_db():
+        async with session_factory() as db:
+            yield db
+
+    seed_chats(session_factory, 2)
+    chat_participants_cache.clear()
+    app.dependency_overrides[get_db] = test_db
+    app.dependency_overrides[get_current_principal] = lambda: Principal(1, "user1@example.com", UserRole.student)
+
+    def get(path: str, **params) -> httpx.Response:
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get(path, params=params)
+
+        return asyncio.run(scenario())
+
+    yield get
+    app.dependency_overrides.clear()
+    chat_participants_cache.clear()
+
+
+def message_ids(response: httpx.Response) -> list:
+    assert response.status_code == 200, response.text
+    return [message["id"] for message in response.json()]
+
+
+def test_cursors_page_through_the_chat(get):
+    assert message_ids(get("/api/v1/chats/1/messages", limit=2)) == [2, 3]
+    assert message_ids(get("/api/v1/chats/1/messages", before=2)) == [1]
+    assert message_ids(get("/api/v1/chats/1/messages", before=1)) == [], "start of history"
+    assert message_ids(get("/api/v1/chats/1/messages", after=3)) == [], "up to date"
+
+
+@pytest.mark.parametrize("cursor", [{"before": 4}, {"after": 4}, {"before": 999}])
+def test_cursor_from_another_chat_is_rejected(get, cursor):
+    # Повідомлення 4 належить чату 2
+    assert get("/api/v1/chats/1/messages", **cursor).status_code == 400
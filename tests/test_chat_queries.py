@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from sqlalchemy.future import select
+
+from app.db.instrumentation import assert_query_budget, instrument_engine
+from app.models.chat import Chat
+from app.models.message import Message
+from app.services.chat_service import ChatService
+from tests.conftest import seed_chats
+
+CHATS = 10
+
+
+def test_list_chats_for_user_runs_one_query(engine, session_factory):
+    seed_chats(session_factory, CHATS)
+    instrument_engine(engine)
+
+    async def list_chats():
+        async with session_factory() as db:
+            with assert_query_budget(1):
+                return await ChatService.list_chats_for_user(db, 1)
+
+    chats = asyncio.run(list_chats())
+    assert [chat["id"] for chat in chats] == list(range(CHATS, 0, -1)), "most recent activity first"
+    latest = chats[0]
+    assert latest["last_message"]["text"] == f"chat {CHATS} message 2"
+    assert latest["participant_info"]["id"] == 100 + CHATS - 1
+    assert latest["unread_count"] == 3
+
+
+def test_query_budget_catches_n_plus_one(engine, session_factory):
+    seed_chats(session_factory, CHATS)
+    instrument_engine(engine)
+
+    async def last_message_per_chat():
+        async with session_factory() as db:
+            chats = (await db.execute(select(Chat))).scalars().all()
+            for chat in chats:
+                await db.execute(select(Message).where(Message.id == chat.last_message_id))
+
+    async def run():
+        with assert_query_budget(2):
+            await last_message_per_chat()
+
+    with pytest.raises(AssertionError, match=f"got {CHATS + 1}"):
+        asyncio.run(run())
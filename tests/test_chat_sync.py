@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app import socketio_events
+from app.services.chat_service import chat_participants_cache
+from tests.conftest import seed_chats
+
+STUDENT = 1
+
+
+@pytest.fixture
+def emitted(session_factory, monkeypatch):
+    """Runs Socket.IO handlers as the seeded student against the test database"""
+    events = []
+
+    async def emit(event, data, room=None, **kwargs):
+        events.append((event, data))
+
+    seed_chats(session_factory)
+    chat_participants_cache.clear()
+    monkeypatch.setattr(socketio_events, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(socketio_events, "get_user_id_by_sid", lambda sid: STUDENT)
+    monkeypatch.setattr(socketio_events.sio, "emit", emit)
+    yield events
+    chat_participants_cache.clear()
+
+
+def sync(chats: dict) -> None:
+    asyncio.run(socketio_events.handle_sync("sid", {"chats": chats}))
+
+
+def test_sync_sends_messages_after_the_last_seen_one(emitted):
+    sync({"1": 1})
+    (event, batch), complete = emitted
+    assert event == "sync_batch"
+    assert [message["message_id"] for message in batch["messages"]] == [2, 3]
+    assert batch["reset"] is False
+    assert complete == ("sync_complete", {"chats": [1]})
+
+
+def test_sync_sends_nothing_when_up_to_date(emitted):
+    sync({"1": 3})
+    assert emitted == [("sync_complete", {"chats": [1]})]
+
+
+def test_sync_with_a_message_of_another_chat_resets_to_the_latest_page(emitted):
+    # Повідомлення 4 належить чату 2
+    sync({"1": 4})
+    (event, batch), complete = emitted
+    assert [message["message_id"] for message in batch["messages"]] == [1, 2, 3]
+    assert batch["reset"] is True
+    assert complete == ("sync_complete", {"chats": [1]})
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+import redis.asyncio
+from fakeredis import FakeAsyncRedis
+
+from app.utils import connections
+from app.utils.connections import ConnectionRegistry, InMemoryConnectionRegistry, RedisConnectionRegistry
+
+TTL = 300
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(connections.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def redis_registry(monkeypatch):
+    server = FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis.asyncio, "from_url", lambda url, **kwargs: server)
+
+    def create() -> RedisConnectionRegistry:
+        """A registry of one more worker sharing the same server"""
+        return RedisConnectionRegistry("redis://test", ttl=TTL)
+
+    return create
+
+
+def test_registry_is_abstract():
+    with pytest.raises(TypeError):
+        ConnectionRegistry()
+
+
+def test_in_memory_registry_tracks_devices():
+    async def scenario():
+        registry = InMemoryConnectionRegistry()
+        await registry.add(1, "a")
+        await registry.add(1, "b")
+        assert registry.get_user_id("a") == 1 and len(registry) == 2
+
+        assert await registry.remove("a") == 1
+        assert await registry.is_online(1)
+        await registry.remove("b")
+        assert not await registry.is_online(1)
+        assert await registry.remove("b") is None
+
+    asyncio.run(scenario())
+
+
+def test_redis_presence_is_shared_between_workers(redis_registry, clock):
+    async def scenario():
+        first, second = redis_registry(), redis_registry()
+        await first.add(1, "a")
+        assert await second.is_online(1)
+        assert second.get_user_id("a") is None, "sid -> user stays on the worker that owns the sid"
+
+        await first.remove("a")
+        assert not await second.is_online(1)
+
+    asyncio.run(scenario())
+
+
+def test_sids_of_a_dead_worker_expire_although_the_user_reconnects(redis_registry, clock):
+    async def scenario():
+        dead, alive = redis_registry(), redis_registry()
+        await dead.add(1, "lost")
+
+        # Користувач перепідключається до іншого воркера раз на хвилину; мертвий воркер нічого не оновлює
+        for minute in range(10):
+            clock.now += 60
+            await alive.add(1, f"live-{minute}")
+            await alive.remove(f"live-{minute}")
+        assert not await alive.is_online(1)
+
+        members = await alive._redis.zrange(alive._user_key(1), 0, -1)
+        assert "lost" not in members
+
+    asyncio.run(scenario())
+
+
+def test_refresh_keeps_long_connections_online(redis_registry, clock):
+    async def scenario():
+        registry = redis_registry()
+        await registry.add(1, "a")
+        for _ in range(10):
+            clock.now += TTL / 3
+            await registry.refresh()
+        assert await registry.is_online(1)
+
+        clock.now += TTL + 1
+        assert not await registry.is_online(1)
+
+    asyncio.run(scenario())
+
+
+def test_online_users_checks_many_users_at_once(redis_registry, clock):
+    async def scenario():
+        first, second = redis_registry(), redis_registry()
+        await first.add(1, "a")
+        await second.add(2, "b")
+        assert await first.online_users([1, 2, 3]) == {1, 2}
+        assert await first.online_users([]) == set()
+
+        memory = InMemoryConnectionRegistry()
+        await memory.add(1, "a")
+        assert await memory.online_users([1, 2]) == {1}
+
+    asyncio.run(scenario())
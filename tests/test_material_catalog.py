@@ -0,0 +1,121 @@
+import asyncio
+from typing import Optional
+
+from starlette.requests import Request
+
+from app.api.v1.endpoints.materials import catalog_response
+from app.models.material import Category, Material
+from app.schemas.materials import CategoryOut, MaterialListItem
+from app.services.material_catalog import MaterialCatalog, category_facets_json, materials_json
+
+
+def seed(session_factory) -> None:
+    async def insert():
+        async with session_factory() as db:
+            sleep = Category(id=1, name="Сон", slug="sleep")
+            stress = Category(id=2, name="Стрес", slug="stress")
+            db.add_all([
+                Material(id=1, title="Сон", content="Короткий текст", type="article", categories=[sleep]),
+                Material(id=2, title="Стрес", content="x" * 200, type="article", categories=[stress]),
+                Material(id=3, title="Сон і стрес", content="Текст", type="exercise", categories=[sleep, stress]),
+            ])
+            await db.commit()
+
+    asyncio.run(insert())
+
+
+def load(session_factory) -> MaterialCatalog:
+    catalog = MaterialCatalog(ttl=60)
+
+    async def rebuild():
+        async with session_factory() as db:
+            await catalog.get(db)
+
+    asyncio.run(rebuild())
+    return catalog
+
+
+def request(if_none_match: Optional[str] = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+
+def test_rebuild_loads_excerpts_and_category_counts(session_factory):
+    seed(session_factory)
+    snapshot = load(session_factory)._snapshot
+
+    assert [material.title for material in snapshot.list_materials()] == ["Сон", "Стрес", "Сон і стрес"]
+    assert snapshot.materials[2].excerpt == "x" * 150 + "..."
+    assert snapshot.category_counts == {1: 2, 2: 2}
+    assert [material.id for material in snapshot.list_materials([1, 2])] == [3]
+
+
+def test_if_none_match_returns_304(session_factory):
+    seed(session_factory)
+    snapshot = load(session_factory)._snapshot
+    builds = []
+
+    def build():
+        builds.append(1)
+        materials = snapshot.list_materials()
+        return len(materials), materials_json(materials)
+
+    response = catalog_response(request(), snapshot, "all", build)
+    assert response.status_code == 200
+    assert response.headers["etag"] == snapshot.etag
+    assert response.headers["x-total-count"] == "3"
+
+    for if_none_match in (snapshot.etag, f'"other", W/{snapshot.etag}', "*"):
+        response = catalog_response(request(if_none_match), snapshot, "all", build)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == snapshot.etag
+
+    assert catalog_response(request('"stale"'), snapshot, "all", build).status_code == 200
+    assert len(builds) == 1, "the body is serialized once per snapshot"
+
+
+def test_add_material_updates_the_snapshot(session_factory):
+    seed(session_factory)
+    catalog = load(session_factory)
+    before = catalog._snapshot
+    sleep = before.categories[0]
+
+    catalog.add_material(MaterialListItem(id=10, title="Новий", type="article", excerpt="...", categories=[sleep]))
+    after = catalog._snapshot
+
+    assert after is not before and after.version == before.version + 1
+    assert after.etag != before.etag
+    assert [material.id for material in after.list_materials([sleep.id])] == [1, 3, 10]
+    assert after.category_counts == {1: 3, 2: 2}
+    assert before.category_counts == {1: 2, 2: 2}, "the old snapshot stays unchanged"
+    assert catalog.is_fresh()
+
+
+def test_add_category_updates_the_snapshot(session_factory):
+    seed(session_factory)
+    catalog = load(session_factory)
+    before = catalog._snapshot
+
+    catalog.add_category(CategoryOut(id=7, name="Харчування"))
+    after = catalog._snapshot
+
+    assert [category.id for category in after.categories] == [1, 2, 7]
+    assert after.category_counts[7] == 0
+    assert after.etag != before.etag
+    assert b'"material_count":0' in category_facets_json(after)
+    assert len(after.materials) == 3
+
+
+def test_add_during_rebuild_invalidates_instead(session_factory):
+    seed(session_factory)
+    catalog = load(session_factory)
+    snapshot = catalog._snapshot
+
+    async def add_while_locked():
+        async with catalog._lock:
+            catalog.add_category(CategoryOut(id=7, name="Харчування"))
+
+    asyncio.run(add_while_locked())
+    assert catalog._snapshot is snapshot
+    assert not catalog.is_fresh()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from app.models.material import Category
+from app.services.material_import import MaterialImporter, iter_csv, iter_lines, iter_ndjson
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def from_lines(lines):
+    for line in lines:
+        yield line
+
+
+def collect(iterator) -> list:
+    async def run():
+        return [item async for item in iterator]
+
+    return asyncio.run(run())
+
+
+def test_lines_survive_chunks_splitting_characters():
+    data = "﻿перший\r\nдругий\nтретій".encode("utf-8")
+    for size in (1, 2, 3, 7, len(data)):
+        assert collect(iter_lines(chunked(data, size))) == ["перший\r\n", "другий\n", "третій"]
+
+
+def test_csv_quoted_fields_span_lines_and_escape_quotes():
+    lines = [
+        "title,content,type,image_url,categories\n",
+        '"Сон","Перший рядок\n',
+        'другий рядок з ""лапками""",article,,sleep|anxiety\n',
+        "\n",
+        "Харчування,Текст,article,,\n",
+    ]
+    assert collect(iter_csv(from_lines(lines))) == [
+        (2, {"title": "Сон", "content": 'Перший рядок\nдругий рядок з "лапками"', "type": "article",
+             "image_url": "", "categories": "sleep|anxiety"}),
+        (5, {"title": "Харчування", "content": "Текст", "type": "article", "image_url": "", "categories": ""}),
+    ]
+
+
+def test_csv_reports_bad_rows_by_their_first_line():
+    lines = ["title,content,type\n", "a,b\n", 'c,"never closed,article\n', "d,e,f\n"]
+    assert collect(iter_csv(from_lines(lines))) == [
+        (2, "Expected 3 columns, got 2"),
+        (3, "Unterminated quoted field"),
+    ]
+
+
+def test_ndjson_skips_blank_lines_and_reports_invalid_json():
+    lines = ['{"title": "a"}\n', "\n", "{broken\n", '{"title": "b"}']
+    records = collect(iter_ndjson(from_lines(lines)))
+    assert [line for line, _ in records] == [1, 3, 4]
+    assert records[0][1] == {"title": "a"}
+    assert records[1][1].startswith("Invalid JSON")
+
+
+def material(title: str, **fields) -> dict:
+    return {"title": title, "content": "текст", "type": "article", **fields}
+
+
+def run_import(session_factory, records: list, **options):
+    """Runs the importer with a fake batch INSERT (the real one relies on MySQL auto-increment)"""
+    batches = []
+
+    async def scenario():
+        async with session_factory() as db:
+            db.add(Category(id=1, name="Сон", slug="sleep"))
+            await db.commit()
+
+            importer = MaterialImporter(db, **options)
+
+            async def insert(batch):
+                batches.append([row.title for _, row, _ in batch])
+                if any(row.title == "bad" for _, row, _ in batch):
+                    raise RuntimeError("Data too long")
+                importer.report.imported += len(batch)
+
+            importer._insert = insert
+            lines = from_lines([json.dumps(record) + "\n" for record in records])
+            return await importer.run(iter_ndjson(lines))
+
+    return asyncio.run(scenario()), batches
+
+
+def test_invalid_rows_are_reported_and_skipped(session_factory):
+    report, batches = run_import(session_factory, [
+        material("a", categories=["sleep"]),
+        material("b", categories=["astronomy"]),
+        {"title": "c"},
+        [1, 2],
+        material("d"),
+    ])
+    assert report.imported == 2 and report.failed == 3
+    assert [(error.line, error.error.split(":")[0]) for error in report.errors] == [
+        (2, "Unknown categories"), (3, "content"), (4, "Record must be an object")
+    ]
+    assert batches == [["a", "d"]]
+
+
+def test_error_list_is_truncated_but_failures_are_counted(session_factory):
+    report, _ = run_import(session_factory, [{"title": str(i)} for i in range(5)], max_errors=2)
+    assert report.failed == 5
+    assert [error.line for error in report.errors] == [1, 2]
+
+
+def test_rejected_batch_is_retried_row_by_row(session_factory):
+    report, batches = run_import(
+        session_factory, [material(title) for title in ("a", "bad", "c", "d")], batch_size=3
+    )
+    assert batches == [["a", "bad", "c"], ["a"], ["bad"], ["c"], ["d"]]
+    assert report.imported == 3 and report.failed == 1
+    assert report.errors[0].line == 2 and "Data too long" in report.errors[0].error
@@ -0,0 +1,120 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+from app.services.material_search import MaterialSearchIndex, stem, tokenize
+
+
+def test_tokenize_casefolds_and_drops_stop_words():
+    assert tokenize("Сон і ВІДПОЧИНОК для студентів") == [stem("сон"), stem("відпочинок"), stem("студентів")]
+
+
+def test_tokenize_keeps_apostrophe_words_whole():
+    assert tokenize("М’які вправи") == tokenize("м'які вправи") == [stem("мякі"), stem("вправи")]
+
+
+def test_inflected_forms_share_a_term():
+    assert len({stem(word) for word in ("тривожність", "тривожності", "тривожністю")}) == 1
+    assert stem("студенти") == stem("студентів") == stem("студентами")
+
+
+def build_index() -> MaterialSearchIndex:
+    index = MaterialSearchIndex()
+    index.add(1, "Сон", "Як покращити сон. Тривожність іноді заважає заснути.")
+    index.add(2, "Тривожність у студентів", "Що робити з тривожністю перед сесією.")
+    index.add(3, "Дихальні вправи", "Вправи для зняття напруги та тривожності, тривожності, тривожності.")
+    index.add(4, "Харчування", "Про режим харчування.")
+    return index
+
+
+def test_search_ranks_title_matches_first():
+    total, hits = build_index().search("тривожність")
+    assert total == 3
+    assert hits[0][0] == 2
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_rare_terms_weigh_more_than_common_ones():
+    index = build_index()
+    _, hits = index.search("тривожність харчування")
+    assert hits[0][0] == 4
+
+
+def test_search_paginates_and_reports_total():
+    index = build_index()
+    total, first_page = index.search("тривожність", offset=0, limit=2)
+    _, second_page = index.search("тривожність", offset=2, limit=2)
+    assert total == 3
+    assert len(first_page) == 2 and len(second_page) == 1
+    assert not {hit[0] for hit in first_page} & {hit[0] for hit in second_page}
+
+
+def test_unknown_or_empty_query_matches_nothing():
+    index = build_index()
+    assert index.search("астрономія") == (0, [])
+    assert index.search("і та") == (0, [])
+
+
+def test_add_is_idempotent():
+    index = build_index()
+    index.add(1, "Сон", "інший текст")
+    assert len(index) == 4
+    assert index.search("покращити")[0] == 1
+
+
+def exhaustive_search(index: MaterialSearchIndex, query: str):
+    """Plain BM25 over every posting, the reference for the pruned search"""
+    documents = len(index._lengths)
+    average_length = index._total_length / documents
+    scores = {}
+    for term in set(tokenize(query)):
+        postings = index._postings.get(term)
+        if postings is None:
+            continue
+        idf = math.log(1 + (documents - len(postings.ids) + 0.5) / (len(postings.ids) + 0.5))
+        for material_id, frequency in zip(postings.ids, postings.frequencies):
+            norm = index.k1 * (1 - index.b + index.b * index._lengths[material_id] / average_length)
+            scores[material_id] = scores.get(material_id, 0.0) + idf * frequency * (index.k1 + 1) / (frequency + norm)
+    return len(scores), sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def test_pruned_search_matches_exhaustive_ranking():
+    rng = random.Random(7)
+    vocabulary = [f"слово{n}" for n in range(300)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    index = MaterialSearchIndex()
+    for material_id in rng.sample(range(1, 5000), 1500):
+        index.add(material_id, " ".join(rng.choices(vocabulary, weights, k=3)),
+                  " ".join(rng.choices(vocabulary, weights, k=rng.randint(5, 80))))
+
+    for _ in range(200):
+        query = " ".join(rng.choices(vocabulary, weights, k=rng.randint(1, 4)))
+        offset, limit = rng.choice([(0, 5), (0, 20), (10, 10)])
+        expected_total, expected = exhaustive_search(index, query)
+        total, hits = index.search(query, offset=offset, limit=limit)
+        assert total == expected_total
+        assert [material_id for material_id, _ in hits] == [material_id for material_id, _ in expected[offset:offset + limit]]
+        assert [score for _, score in hits] == pytest.approx([score for _, score in expected[offset:offset + limit]])
+
+
+def test_postings_stay_sorted_when_ids_arrive_out_of_order():
+    index = MaterialSearchIndex()
+    for material_id in (5, 2, 9, 1):
+        index.add(material_id, "Сон", "сон")
+    assert list(index._postings[stem("сон")].ids) == [1, 2, 5, 9]
+
+
+def test_async_wrappers_run_on_the_index_thread():
+    async def scenario():
+        index = build_index()
+        await index.add_async(5, "Сон", "Тривожність і сон")
+        try:
+            return await index.search_async("тривожність")
+        finally:
+            index.close()
+
+    total, _ = asyncio.run(scenario())
+    assert total == 4
@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas.messages import MessageCreate
+from app.services import message_writer as message_writer_module
+from app.services.message_writer import MessageBatchWriter
+
+
+class FakeSession:
+    """Stands in for AsyncSession: records whether the batch transaction was committed."""
+
+    def __init__(self):
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeStore:
+    """
+    Replaces ChatService.save_messages. Each call is one batch; ``fail`` makes it raise,
+    ``gate`` holds the batch before its commit so the test can look at the submitters.
+    """
+
+    def __init__(self):
+        self.sessions = []
+        self.batches = []
+        self.fail = False
+        self.gate = None
+        self.next_id = 1
+
+    def session_factory(self):
+        session = FakeSession()
+        self.sessions.append(session)
+        return session
+
+    async def save_messages(self, db, msgs_data):
+        self.batches.append(list(msgs_data))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("database is down")
+        db.committed = True
+        messages = []
+        for msg_data in msgs_data:
+            messages.append(SimpleNamespace(id=self.next_id, text=msg_data.text, session=db))
+            self.next_id += 1
+        return messages
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore()
+    monkeypatch.setattr(message_writer_module.ChatService, "save_messages", store.save_messages)
+    return store
+
+
+def message(text: str) -> MessageCreate:
+    return MessageCreate(chat_id=1, sender_id=2, text=text)
+
+
+def test_submit_returns_only_after_commit(store):
+    async def scenario():
+        writer = MessageBatchWriter(window_ms=1, max_batch=10, session_factory=store.session_factory)
+        store.gate = asyncio.Event()
+        submit = asyncio.create_task(writer.submit(message("hi")))
+
+        await asyncio.sleep(0.05)
+        assert store.batches, "the batch should have started"
+        assert not submit.done(), "submitter must not be acked before the commit"
+
+        store.gate.set()
+        msg = await submit
+        assert msg.session.committed
+        await writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_rejects_every_submitter(store):
+    async def scenario():
+        writer = MessageBatchWriter(window_ms=20, max_batch=10, session_factory=store.session_factory)
+        store.fail = True
+        results = await asyncio.gather(
+            *(writer.submit(message(f"m{i}")) for i in range(3)),
+            return_exceptions=True
+        )
+        assert len(store.batches) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        await writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_flushes_at_max_batch_without_waiting_for_window(store):
+    async def scenario():
+        writer = MessageBatchWriter(window_ms=60_000, max_batch=3, session_factory=store.session_factory)
+        messages = await asyncio.wait_for(
+            asyncio.gather(*(writer.submit(message(f"m{i}")) for i in range(3))),
+            timeout=1
+        )
+        assert [len(batch) for batch in store.batches] == [3]
+        assert [msg.text for msg in messages] == ["m0", "m1", "m2"]
+        await writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_drains_the_buffer(store):
+    async def scenario():
+        writer = MessageBatchWriter(window_ms=60_000, max_batch=100, session_factory=store.session_factory)
+        submits = [asyncio.create_task(writer.submit(message(f"m{i}"))) for i in range(2)]
+        await asyncio.sleep(0)
+        assert not store.batches
+
+        await writer.close()
+        assert [len(batch) for batch in store.batches] == [2]
+        assert all(task.done() and task.result().session.committed for task in submits)
+
+    asyncio.run(scenario())
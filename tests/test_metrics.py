@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+
+from app.api.dependencies import get_current_admin
+from app.main import app
+
+
+def get(path: str) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(scenario())
+
+
+def test_metrics_require_a_token():
+    assert get("/api/v1/metrics").status_code == 403
+
+
+def test_metrics_report_every_collector():
+    app.dependency_overrides[get_current_admin] = lambda: None
+    try:
+        response = get("/api/v1/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {
+        "db_pool", "queries", "password_hashing", "auth_user_cache", "chat_participants_cache", "session_scheduler"
+    }
+    assert "hit_rate" in body["chat_participants_cache"]
+    assert "checked_out" in body["db_pool"]
+    assert "reminders_sent" in body["session_scheduler"]
@@ -0,0 +1,72 @@
+import asyncio
+
+from app.models.user import UserRole
+from app.services.psychologist_directory import PsychologistDirectory
+from tests.conftest import user
+
+
+def psychologist(user_id: int, last_name: str, specialization: str, experience_years):
+    profile = user(user_id, UserRole.psychologist)
+    profile.last_name = last_name
+    profile.specialization = specialization
+    profile.experience_years = experience_years
+    return profile
+
+
+def loaded_directory(session_factory) -> PsychologistDirectory:
+    async def load():
+        async with session_factory() as db:
+            db.add_all([
+                user(1, UserRole.student),
+                psychologist(10, "Шевченко", "Сімейна терапія", 12),
+                psychologist(11, "антоненко", "КПТ, тривожність", 3),
+                psychologist(12, "Бондар", "Тривожні розлади", None),
+            ])
+            await db.commit()
+            directory = PsychologistDirectory()
+            await directory.ensure_loaded(db)
+            return directory
+
+    return asyncio.run(load())
+
+
+def ids(result):
+    total, page = result
+    return total, [profile.id for profile in page]
+
+
+def test_search_filters_by_specialization_and_experience(session_factory):
+    directory = loaded_directory(session_factory)
+    assert ids(directory.search()) == (3, [11, 12, 10]), "students are not listed, names sort case-insensitively"
+    assert ids(directory.search(specialization="ТРИВОЖ")) == (2, [11, 12])
+    assert ids(directory.search(min_experience=3)) == (2, [11, 10])
+    assert ids(directory.search(max_experience=3)) == (2, [11, 12]), "missing experience counts as 0"
+    assert ids(directory.search(offset=1, limit=1)) == (3, [12])
+
+
+def test_search_sorts_by_experience(session_factory):
+    directory = loaded_directory(session_factory)
+    assert ids(directory.search(sort_by="experience_years", descending=True)) == (3, [10, 11, 12])
+    assert ids(directory.search(sort_by="experience_years")) == (3, [12, 11, 10])
+
+
+def test_upsert_updates_adds_and_removes_profiles(session_factory):
+    directory = loaded_directory(session_factory)
+    assert ids(directory.search(sort_by="experience_years")) == (3, [12, 11, 10])
+
+    directory.upsert(psychologist(12, "Бондар", "Тривожні розлади", 20))
+    directory.upsert(psychologist(13, "Коваль", "Підлітки", 5))
+    assert ids(directory.search(sort_by="experience_years")) == (4, [11, 13, 10, 12]), "cached order is rebuilt"
+
+    demoted = psychologist(11, "антоненко", "КПТ, тривожність", 3)
+    demoted.role = UserRole.student
+    directory.upsert(demoted)
+    directory.upsert(user(2, UserRole.student))
+    assert ids(directory.search(sort_by="experience_years")) == (3, [13, 10, 12])
+
+
+def test_upsert_before_the_first_load_is_ignored():
+    directory = PsychologistDirectory()
+    directory.upsert(psychologist(10, "Шевченко", "Сімейна терапія", 12))
+    assert not directory.is_fresh()
+    assert directory.search() == (0, [])
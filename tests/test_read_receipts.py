@@ -0,0 +1,92 @@
+import asyncio
+from contextlib import nullcontext
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from app.db.migrations import backfill_chat_read_states
+from app.models.chat_read_state import ChatReadState
+from app.services import read_receipts
+from app.services.chat_service import ChatService
+from app.services.read_receipts import ReadReceiptBuffer
+from tests.conftest import seed_chats
+
+STUDENT = 1
+
+
+def read_states(session_factory) -> dict:
+    async def load():
+        async with session_factory() as db:
+            result = await db.execute(select(ChatReadState))
+            return {
+                (state.chat_id, state.user_id): (state.last_read_message_id, state.unread_count)
+                for state in result.scalars()
+            }
+
+    return asyncio.run(load())
+
+
+def mark_read(session_factory, marks: dict) -> None:
+    async def mark():
+        async with session_factory() as db:
+            await ChatService.mark_chats_read(db, marks)
+
+    asyncio.run(mark())
+
+
+def test_buffer_keeps_the_highest_id_and_flushes_once_per_interval(monkeypatch):
+    flushes = []
+
+    async def mark_chats_read(db, marks):
+        flushes.append(marks)
+
+    monkeypatch.setattr(read_receipts.ChatService, "mark_chats_read", mark_chats_read)
+
+    async def run():
+        buffer = ReadReceiptBuffer(flush_ms=20, session_factory=nullcontext)
+        for message_id in (5, 9, 3):
+            buffer.mark(1, STUDENT, message_id)
+        buffer.mark(2, STUDENT, 4)
+        await asyncio.sleep(0.05)
+        buffer.mark(1, STUDENT, 12)
+        await buffer.close()
+
+    asyncio.run(run())
+    assert flushes == [{(1, STUDENT): 9, (2, STUDENT): 4}, {(1, STUDENT): 12}]
+
+
+def test_partial_read_counts_only_later_messages(session_factory):
+    seed_chats(session_factory, 2)
+    mark_read(session_factory, {(1, STUDENT): 2})
+    assert read_states(session_factory)[(1, STUDENT)] == (2, 1)
+
+
+def test_read_position_never_moves_backward(session_factory):
+    seed_chats(session_factory, 2)
+    mark_read(session_factory, {(1, STUDENT): 3})
+    mark_read(session_factory, {(1, STUDENT): 1})
+    assert read_states(session_factory)[(1, STUDENT)] == (3, 0)
+
+
+def test_read_position_is_clamped_to_the_latest_message(session_factory):
+    seed_chats(session_factory, 2)
+    # Повідомлення 6 належить чату 2, а 999 не існує
+    mark_read(session_factory, {(1, STUDENT): 6, (2, STUDENT): 999})
+    states = read_states(session_factory)
+    assert states[(1, STUDENT)] == (3, 0)
+    assert states[(2, STUDENT)] == (6, 0)
+
+
+def test_backfill_counts_messages_from_the_other_participant(engine, session_factory):
+    seed_chats(session_factory, 2)
+
+    async def backfill():
+        async with engine.begin() as conn:
+            await conn.execute(delete(ChatReadState))
+            await backfill_chat_read_states(conn)
+
+    asyncio.run(backfill())
+    assert read_states(session_factory) == {
+        (1, STUDENT): (None, 3), (1, 100): (None, 0),
+        (2, STUDENT): (None, 3), (2, 101): (None, 0)
+    }
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.session import Session, SessionStatus
+from app.models.user import UserRole
+from app.services.session_service import SessionService
+from tests.conftest import user
+
+STUDENT, PSYCHOLOGIST, OTHER_PSYCHOLOGIST = 1, 10, 11
+
+
+def seed(session_factory) -> datetime:
+    """
+    Sessions one hour apart from 5 hours ago to 4 hours ahead, alternating between the
+    student's sessions with PSYCHOLOGIST and PSYCHOLOGIST's own sessions with OTHER_PSYCHOLOGIST
+    """
+    now = datetime.now().replace(microsecond=0)
+
+    async def insert():
+        async with session_factory() as db:
+            db.add_all([
+                user(STUDENT, UserRole.student),
+                user(PSYCHOLOGIST, UserRole.psychologist),
+                user(OTHER_PSYCHOLOGIST, UserRole.psychologist),
+            ])
+            for i in range(10):
+                student_id, psychologist_id = (STUDENT, PSYCHOLOGIST) if i % 2 == 0 else (PSYCHOLOGIST, OTHER_PSYCHOLOGIST)
+                db.add(Session(
+                    id=i + 1, student_id=student_id, psychologist_id=psychologist_id,
+                    starts_at=now + timedelta(hours=i - 5), duration=50, price=100, status=SessionStatus.upcoming
+                ))
+            await db.commit()
+
+    asyncio.run(insert())
+    return now
+
+
+def list_sessions(session_factory, user_id: int, role: UserRole, **filters) -> list:
+    async def query():
+        async with session_factory() as db:
+            return await SessionService.get_user_sessions(db, user_id, role, **filters)
+
+    return [session["id"] for session in asyncio.run(query())]
+
+
+def test_default_page_starts_with_the_oldest_sessions(session_factory):
+    seed(session_factory)
+    assert list_sessions(session_factory, STUDENT, UserRole.student) == [1, 3, 5, 7, 9]
+    assert list_sessions(session_factory, PSYCHOLOGIST, UserRole.psychologist, limit=3) == [1, 2, 3]
+
+
+def test_upcoming_includes_sessions_in_progress(session_factory):
+    seed(session_factory)
+    # сесія 6 почалась щойно й триває 50 хвилин, сесія 5 закінчилась 10 хвилин тому
+    assert list_sessions(session_factory, STUDENT, UserRole.student, upcoming=True) == [7, 9]
+    assert list_sessions(session_factory, PSYCHOLOGIST, UserRole.psychologist, upcoming=True) == [6, 7, 8, 9, 10]
+
+
+def test_psychologist_sees_sessions_on_both_sides(session_factory):
+    now = seed(session_factory)
+    since = now - timedelta(days=1)
+    assert list_sessions(session_factory, PSYCHOLOGIST, UserRole.psychologist, starts_from=since) == list(range(1, 11))
+    assert list_sessions(session_factory, OTHER_PSYCHOLOGIST, UserRole.psychologist, starts_from=since) == [2, 4, 6, 8, 10]
+    assert list_sessions(session_factory, STUDENT, UserRole.student, starts_from=since) == [1, 3, 5, 7, 9]
+
+
+def test_cursor_pages_do_not_skip_or_repeat(session_factory):
+    seed(session_factory)
+    pages, after_id = [], None
+    while True:
+        page = list_sessions(
+            session_factory, PSYCHOLOGIST, UserRole.psychologist,
+            status=SessionStatus.upcoming, after_id=after_id, limit=3
+        )
+        if not page:
+            break
+        pages.append(page)
+        after_id = page[-1]
+    assert pages == [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]
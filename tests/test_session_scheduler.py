@@ -0,0 +1,120 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy.future import select
+
+from app.models.session import Session, SessionStatus
+from app.models.user import UserRole
+from app.services.session_scheduler import SessionScheduler
+from tests.conftest import user
+
+STUDENT, PSYCHOLOGIST = 1, 10
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+def seed(session_factory, sessions: list) -> None:
+    """``sessions`` are (id, starts_at, duration, status)"""
+    async def insert():
+        async with session_factory() as db:
+            db.add_all([user(STUDENT, UserRole.student), user(PSYCHOLOGIST, UserRole.psychologist)])
+            for session_id, starts_at, duration, status in sessions:
+                db.add(Session(
+                    id=session_id, student_id=STUDENT, psychologist_id=PSYCHOLOGIST,
+                    starts_at=starts_at, duration=duration, price=100, status=status
+                ))
+            await db.commit()
+
+    asyncio.run(insert())
+
+
+def statuses(session_factory) -> dict:
+    async def query():
+        async with session_factory() as db:
+            return dict((await db.execute(select(Session.id, Session.status))).all())
+
+    return asyncio.run(query())
+
+
+def scheduler(session_factory, emitted: list, **kwargs) -> SessionScheduler:
+    async def emit(user_id, event, payload):
+        emitted.append((user_id, event, payload))
+
+    return SessionScheduler(emit=emit, session_factory=session_factory, leader_lock=None, **kwargs)
+
+
+def test_finished_sessions_are_completed_in_batches(session_factory):
+    ended = [(i, NOW - timedelta(hours=i + 1), 50, SessionStatus.upcoming) for i in range(1, 6)]
+    seed(session_factory, ended + [
+        (10, NOW - timedelta(minutes=30), 50, SessionStatus.upcoming),   # ще триває
+        (11, NOW + timedelta(hours=1), 50, SessionStatus.upcoming),
+        (12, NOW - timedelta(hours=3), 50, SessionStatus.cancelled),
+        (13, NOW - timedelta(minutes=50), 50, SessionStatus.upcoming),   # закінчилась щойно
+    ])
+    jobs = scheduler(session_factory, [], batch_size=2)
+
+    assert asyncio.run(jobs.complete_finished_sessions(now=NOW)) == 6
+    assert statuses(session_factory) == {
+        **{i: SessionStatus.completed for i in (1, 2, 3, 4, 5, 13)},
+        10: SessionStatus.upcoming, 11: SessionStatus.upcoming, 12: SessionStatus.cancelled,
+    }
+    assert jobs.metrics["max_batch_size"] == 2
+    assert asyncio.run(jobs.complete_finished_sessions(now=NOW)) == 0
+
+
+def test_reminders_skip_rescheduled_and_cancelled_sessions(session_factory):
+    starts_at = NOW + timedelta(minutes=11)
+    seed(session_factory, [(i, starts_at, 50, SessionStatus.upcoming) for i in (1, 2, 3)])
+    emitted = []
+    jobs = scheduler(session_factory, emitted, reminder_offsets=(10,))
+
+    async def scenario():
+        await jobs.load_reminders(now=NOW)
+        async with session_factory() as db:
+            (await db.get(Session, 2)).starts_at = starts_at + timedelta(hours=2)
+            (await db.get(Session, 3)).status = SessionStatus.cancelled
+            await db.commit()
+        early = await jobs.send_due_reminders(now=NOW)
+        due = await jobs.send_due_reminders(now=starts_at - timedelta(minutes=10))
+        return early, due
+
+    assert asyncio.run(scenario()) == (0, 1)
+    assert sorted(user_id for user_id, _, _ in emitted) == [STUDENT, PSYCHOLOGIST]
+    assert {payload["session_id"] for _, event, payload in emitted if event == "session_reminder"} == {1}
+    assert emitted[0][2]["minutes_before"] == 10
+
+
+def test_only_the_lock_holder_runs_the_jobs(session_factory):
+    lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def leader_lock(timeout):
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError
+        try:
+            yield None
+        finally:
+            lock.release()
+
+    async def scenario():
+        workers = [
+            SessionScheduler(emit=None, session_factory=session_factory, interval=0.05, leader_lock=leader_lock)
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        await asyncio.sleep(0.1)
+        leaders = [worker.metrics["leader"] for worker in workers]
+
+        await workers[leaders.index(1)].stop()
+        await asyncio.sleep(0.1)
+        takeover = workers[leaders.index(0)].metrics["leader"]
+        for worker in workers:
+            await worker.stop()
+        return leaders, takeover
+
+    leaders, takeover = asyncio.run(scenario())
+    assert sorted(leaders) == [0, 1]
+    assert takeover == 1
@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+
+import httpx
+
+from app.utils.static_files import ImmutableStaticFiles
+
+
+def get(app, path: str, headers: dict = None) -> httpx.Response:
+    async def request():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(request())
+
+
+def write_avatar(directory, suffix: str = ".jpg") -> str:
+    data = b"avatar bytes"
+    name = hashlib.sha256(data).hexdigest() + suffix
+    (directory / name).write_bytes(data)
+    return name
+
+
+def test_content_addressed_file_gets_strong_etag_and_immutable_cache(tmp_path):
+    name = write_avatar(tmp_path)
+    response = get(ImmutableStaticFiles(directory=tmp_path), f"/{name}")
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{name[:64]}"'
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+def test_thumbnail_etag_includes_the_size(tmp_path):
+    name = write_avatar(tmp_path, suffix="_64.jpg")
+    response = get(ImmutableStaticFiles(directory=tmp_path), f"/{name}")
+
+    assert response.headers["etag"] == f'"{name[:64]}-64"'
+
+
+def test_if_none_match_returns_304_without_body(tmp_path):
+    name = write_avatar(tmp_path)
+    app = ImmutableStaticFiles(directory=tmp_path)
+    etag = get(app, f"/{name}").headers["etag"]
+
+    response = get(app, f"/{name}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert "immutable" in response.headers["cache-control"]
+
+    assert get(app, f"/{name}", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_legacy_names_keep_starlette_etag(tmp_path):
+    (tmp_path / "2f1c6c1e-uuid.png").write_bytes(b"old avatar")
+    app = ImmutableStaticFiles(directory=tmp_path)
+    response = get(app, "/2f1c6c1e-uuid.png")
+
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    assert get(app, "/2f1c6c1e-uuid.png", headers={"If-None-Match": response.headers["etag"]}).status_code == 304